@@ -2,51 +2,271 @@
 -----------------------------
 Script pour exécuter périodiquement la suppression et l'anonymisation
 des données sensibles conformément au GDPR.
+
+Les fichiers sont lus en flux (module csv), traités en parallèle dans un pool
+de processus, écrits de façon atomique, et chaque fichier dispose d'un point
+de reprise : un job interrompu reprend là où il s'était arrêté.
+
+Les jeux de données partitionnés par date (data/<jeu>/dt=YYYY-MM-DD/*.csv) ne
+sont pas réécrits : les partitions expirées sont supprimées entières et seules
+celles à cheval sur la date limite sont traitées ligne à ligne. Les archives
+sont elles aussi écrites par partition (archive/<jeu>/dt=.../) et expirées de même.
 """
 
 import os
+import csv
+import sys
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from src.compliance import gdpr_verification, anonymization_utils
-from src.utils import csv_exporter
+from src.compliance.subject_index import SubjectIndex, KIND_FILE
+from src.utils.partitioning import (
+    partition_dir, partition_key, list_partitions, classify_partitions, drop_partitions
+)
 
 # Paramètres
 DATA_DIR = "data"
 ARCHIVE_DIR = "archive"
-os.makedirs(ARCHIVE_DIR, exist_ok=True)
+CHECKPOINT_DIR = os.path.join(ARCHIVE_DIR, ".checkpoints")
+SUBJECT_INDEX_PATH = os.path.join(DATA_DIR, "subject_index.db")
+WORKERS = int(os.getenv("GDPR_CLEANUP_WORKERS", os.cpu_count() or 1))
+CHECKPOINT_EVERY = int(os.getenv("GDPR_CLEANUP_CHECKPOINT_ROWS", "50000"))
+BATCH_ROWS = int(os.getenv("GDPR_CLEANUP_BATCH_ROWS", "5000"))
 
 # Définir la période après laquelle les données doivent être anonymisées/supprimées
 RETENTION_DAYS = 365  # 1 an
+ARCHIVE_RETENTION_DAYS = int(os.getenv("GDPR_ARCHIVE_RETENTION_DAYS", "730"))
 cutoff_date = datetime.now() - timedelta(days=RETENTION_DAYS)
 
-def process_gdpr_cleanup():
-    """Exécute le nettoyage GDPR pour tous les fichiers de données"""
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith(".csv"):
-            filepath = os.path.join(DATA_DIR, filename)
-            print(f"[INFO] Traitement GDPR du fichier : {filepath}")
-
-            # Charger les données
-            with open(filepath, "r") as f:
-                lines = f.readlines()
-
-            # Séparer les en-têtes et les données
-            headers = lines[0].strip().split(",")
-            records = [dict(zip(headers, line.strip().split(","))) for line in lines[1:]]
-
-            updated_records = []
-            for record in records:
-                record_date = datetime.strptime(record.get("created_at", "1970-01-01"), "%Y-%m-%d")
-                if record_date < cutoff_date:
-                    # Anonymiser les champs sensibles
-                    record = anonymization_utils.anonymize_record(record)
-                updated_records.append(record)
-
-            # Exporter les données anonymisées
-            output_file = os.path.join(ARCHIVE_DIR, f"{filename.replace('.csv','')}_gdpr_{datetime.now().strftime('%Y%m%d')}.csv")
-            csv_exporter.export_csv(updated_records, output_file)
-            print(f"[INFO] Fichier GDPR nettoyé exporté : {output_file}")
+
+class _TrackedLines:
+    """Itérateur de lignes sur un fichier binaire qui mémorise l'offset consommé."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode("utf-8")
+
+
+def _is_expired(record: dict, cutoff: str) -> bool:
+    """Compare la date ISO `created_at` au seuil sans parser de datetime."""
+    created_at = record.get("created_at") or ""
+    if len(created_at) < 10 or created_at[4] != "-":
+        return True  # date absente ou invalide : on anonymise par précaution
+    return created_at[:10] < cutoff
+
+
+def _save_checkpoint(path: str, state: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _load_checkpoint(path: str, source_stat: os.stat_result):
+    """Retourne le point de reprise s'il correspond toujours au fichier source."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("source_size") != source_stat.st_size or state.get("source_mtime") != source_stat.st_mtime:
+        return None
+    if not os.path.exists(state.get("part_path", "")):
+        return None
+    return state
+
+
+def process_file(filepath: str, cutoff: str, output_file: str) -> dict:
+    """
+    Anonymise en flux les lignes expirées d'un fichier CSV.
+    La sortie est écrite dans un fichier `.part` puis renommée atomiquement ;
+    un point de reprise est enregistré toutes les CHECKPOINT_EVERY lignes.
+    """
+    checkpoint_name = os.path.relpath(filepath, DATA_DIR).replace(os.sep, "__")
+    checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{checkpoint_name}.json")
+    source_stat = os.stat(filepath)
+    state = _load_checkpoint(checkpoint_path, source_stat)
+
+    if state is None:
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        state = {
+            "source_size": source_stat.st_size,
+            "source_mtime": source_stat.st_mtime,
+            "output_file": output_file,
+            "part_path": output_file + ".part",
+            "fieldnames": None,
+            "source_offset": 0,
+            "part_bytes": 0,
+            "rows_done": 0,
+            "rows_anonymized": 0,
+        }
+    else:
+        print(f"[INFO] Reprise de {filepath} à la ligne {state['rows_done']}")
+
+    with open(filepath, "rb") as src, open(state["part_path"], "a", newline="", encoding="utf-8") as out:
+        # Reprise : on ignore ce qui a été écrit après le dernier point de reprise
+        out.truncate(state["part_bytes"])
+        src.seek(state["source_offset"])
+        lines = _TrackedLines(src)
+
+        if state["fieldnames"] is None:
+            state["fieldnames"] = next(csv.reader(lines), [])
+            csv.writer(out).writerow(state["fieldnames"])
+        reader = csv.DictReader(lines, fieldnames=state["fieldnames"])
+        writer = csv.DictWriter(out, fieldnames=state["fieldnames"])
+
+        # Les lignes sont anonymisées par lots, colonne par colonne (plan compilé une fois)
+        batch, expired = [], []
+        last_checkpoint = state["rows_done"]
+        for record in reader:
+            batch.append(record)
+            if _is_expired(record, cutoff):
+                expired.append(record)
+            if len(batch) < BATCH_ROWS:
+                continue
+
+            anonymization_utils.anonymize_records(expired)
+            writer.writerows(batch)
+            state["rows_done"] += len(batch)
+            state["rows_anonymized"] += len(expired)
+            batch, expired = [], []
+
+            if state["rows_done"] - last_checkpoint >= CHECKPOINT_EVERY:
+                out.flush()
+                os.fsync(out.fileno())
+                state["source_offset"] = lines.offset
+                state["part_bytes"] = os.fstat(out.fileno()).st_size
+                _save_checkpoint(checkpoint_path, state)
+                last_checkpoint = state["rows_done"]
+
+        anonymization_utils.anonymize_records(expired)
+        writer.writerows(batch)
+        state["rows_done"] += len(batch)
+        state["rows_anonymized"] += len(expired)
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(state["part_path"], state["output_file"])
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return {"source": filepath, "output": state["output_file"],
+            "rows": state["rows_done"], "anonymized": state["rows_anonymized"]}
+
+
+def plan_gdpr_cleanup() -> list:
+    """
+    Applique la rétention par partition et retourne les fichiers restant à
+    traiter ligne à ligne, sous forme de couples (source, sortie archivée).
+    """
+    today_key = partition_key(datetime.now().date())
+    jobs = []
+    for name in sorted(os.listdir(DATA_DIR)):
+        path = os.path.join(DATA_DIR, name)
+        if name.endswith(".csv"):
+            # Fichier non partitionné : traitement ligne à ligne complet
+            stem = name[:-4]
+            archive = partition_dir(os.path.join(ARCHIVE_DIR, stem), today_key)
+            jobs.append((path, os.path.join(archive, f"{stem}_gdpr.csv")))
+            continue
+
+        partitions = list_partitions(path)
+        if not partitions:
+            continue
+        classes = classify_partitions(partitions, cutoff_date.date())
+        drop_partitions(path, classes["expired"])
+        print(f"[INFO] {name} : {len(classes['expired'])} partitions expirées supprimées, "
+              f"{len(classes['straddling'])} à traiter, {len(classes['retained'])} conservées")
+        for key in classes["straddling"]:
+            source_dir = partition_dir(path, key)
+            archive = partition_dir(os.path.join(ARCHIVE_DIR, name), key)
+            for filename in sorted(os.listdir(source_dir)):
+                if filename.endswith(".csv"):
+                    jobs.append((os.path.join(source_dir, filename), os.path.join(archive, filename)))
+    return jobs
+
+
+def expire_archives():
+    """Supprime les partitions d'archive plus anciennes que ARCHIVE_RETENTION_DAYS."""
+    archive_cutoff = (datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS)).date()
+    for name in sorted(os.listdir(ARCHIVE_DIR)):
+        path = os.path.join(ARCHIVE_DIR, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        expired = classify_partitions(list_partitions(path), archive_cutoff)["expired"]
+        drop_partitions(path, expired)
+
+
+def process_gdpr_cleanup(workers: int = WORKERS):
+    """Exécute le nettoyage GDPR pour tous les fichiers de données, en parallèle"""
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    cutoff = cutoff_date.strftime("%Y-%m-%d")
+    jobs = plan_gdpr_cleanup()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, source, cutoff, output): source for source, output in jobs}
+        for future in as_completed(futures):
+            filepath = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[ERROR] Échec du traitement de {filepath} (reprise possible) : {e}")
+                continue
+            print(f"[INFO] Fichier GDPR nettoyé exporté : {result['output']} "
+                  f"({result['anonymized']}/{result['rows']} lignes anonymisées)")
+
+    expire_archives()
+
+
+def process_erasure_requests(user_ids, index: SubjectIndex = None):
+    """
+    Anonymise uniquement les lignes des personnes demandant l’effacement,
+    en s’appuyant sur l’index des personnes plutôt que sur un parcours de DATA_DIR.
+    """
+    index = index or SubjectIndex(SUBJECT_INDEX_PATH)
+    for filepath, rows in index.files_for(user_ids).items():
+        if not os.path.exists(filepath):
+            continue
+        print(f"[INFO] Effacement GDPR de {len(rows)} lignes dans : {filepath}")
+
+        tmp_path = filepath + ".tmp"
+        with open(filepath, "r", newline="", encoding="utf-8") as src, \
+                open(tmp_path, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.DictReader(src)
+            writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+            writer.writeheader()
+            batch, selected = [], []
+            for row_number, record in enumerate(reader):
+                batch.append(record)
+                if row_number in rows:
+                    selected.append(record)
+                if len(batch) >= BATCH_ROWS:
+                    anonymization_utils.anonymize_records(selected)
+                    writer.writerows(batch)
+                    batch, selected = [], []
+            anonymization_utils.anonymize_records(selected)
+            writer.writerows(batch)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, filepath)
+        # Seules les lignes de ce fichier sont traitées : les documents indexés restent localisés
+        index.remove_locations(user_ids, KIND_FILE, filepath)
+
 
 if __name__ == "__main__":
     print("[INFO] Démarrage du job GDPR Cleanup...")
-    process_gdpr_cleanup()
+    if len(sys.argv) > 1:
+        # Demandes d’effacement ciblées : python gdpr_cleanup_job.py <user_id> [...]
+        process_erasure_requests(sys.argv[1:])
+    else:
+        process_gdpr_cleanup()
     print("[INFO] GDPR Cleanup terminé avec succès !")
@@ -0,0 +1,87 @@
+"""
+==============================================================
+ Fichier : aimd_controller.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Ajuster taille des lots `_bulk` et concurrence des
+           envois (augmentation additive, diminution multiplicative).
+==============================================================
+"""
+
+import random
+import threading
+import logging
+
+logger = logging.getLogger("AIMDController")
+
+
+class AIMDController:
+    """
+    Régulation AIMD de l’ingestion :
+      - lot acquitté sous la latence cible : +`batch_step` documents par lot,
+        +1 requête simultanée tous les `concurrency_every` succès consécutifs
+      - rejet (429 / es_rejected_execution_exception) : taille et concurrence
+        multipliées par `decrease_factor`, puis attente exponentielle avant renvoi
+      - latence au-dessus de la cible : taille du lot multipliée par `latency_factor`
+    Les bornes min/max évitent l’effondrement comme l’emballement.
+    """
+
+    def __init__(self, initial_batch: int = 500, min_batch: int = 50, max_batch: int = 5000,
+                 batch_step: int = 100, max_concurrency: int = 8, concurrency_every: int = 5,
+                 target_latency: float = 1.0, decrease_factor: float = 0.5, latency_factor: float = 0.8,
+                 base_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.batch_step = batch_step
+        self.max_concurrency = max_concurrency
+        self.concurrency_every = concurrency_every
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.batch_size = max(min_batch, min(initial_batch, max_batch))
+        self.concurrency = 1
+        self.successes = 0
+        self.rejections = 0  # rejets consécutifs (pour l’attente exponentielle)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, rejected: bool = False):
+        """Intègre le résultat d’un envoi : latence observée et rejet éventuel du cluster."""
+        with self._lock:
+            if rejected:
+                self.rejections += 1
+                self.successes = 0
+                self.batch_size = max(self.min_batch, int(self.batch_size * self.decrease_factor))
+                self.concurrency = max(1, int(self.concurrency * self.decrease_factor))
+                logger.warning(
+                    f"Rejet du cluster : lots de {self.batch_size} documents, concurrence {self.concurrency}."
+                )
+            elif latency > self.target_latency:
+                self.rejections = 0
+                self.successes = 0
+                self.batch_size = max(self.min_batch, int(self.batch_size * self.latency_factor))
+            else:
+                self.rejections = 0
+                self.successes += 1
+                self.batch_size = min(self.max_batch, self.batch_size + self.batch_step)
+                if self.successes % self.concurrency_every == 0:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+    def backoff_delay(self) -> float:
+        """Attente avant renvoi après des rejets consécutifs (exponentielle, avec gigue)."""
+        if not self.rejections:
+            return 0.0
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (self.rejections - 1))
+        return delay * (0.5 + random.random() / 2)
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    controller = AIMDController()
+    for _ in range(10):
+        controller.record(latency=0.2)
+    print(controller.batch_size, controller.concurrency)
+    controller.record(latency=0.2, rejected=True)
+    print(controller.batch_size, controller.concurrency, round(controller.backoff_delay(), 2))
@@ -14,14 +14,14 @@ import smtplib
 import yaml
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from elk_connector import ELKConnector
+from async_elk_connector import shared_connector
 from datetime import datetime
 import requests
 
 
 class AlertingSystem:
     def __init__(self, elk_config_path: str, rules_path: str, smtp_config: dict, slack_webhook: str = None):
-        self.connector = ELKConnector(elk_config_path)
+        self.connector = shared_connector(elk_config_path)
         self.rules = self._load_rules(rules_path)
         self.smtp_config = smtp_config
         self.slack_webhook = slack_webhook
@@ -33,8 +33,9 @@ class AlertingSystem:
 
     def check_for_alerts(self):
         """Vérifie les logs récents et déclenche des alertes selon les règles."""
-        for rule in self.rules.get("rules", []):
-            query = {
+        rules = self.rules.get("rules", [])
+        queries = [
+            {
                 "query": {
                     "bool": {
                         "must": [
@@ -44,8 +45,10 @@ class AlertingSystem:
                     }
                 }
             }
-            logs = self.connector.search_logs(query)
-
+            for rule in rules
+        ]
+        # Une seule requête _msearch pour toutes les règles
+        for rule, logs in zip(rules, self.connector.search_many(queries)):
             if len(logs) >= rule.get("threshold", 1):
                 message = f"⚠️ Alerte {rule['category']}: {len(logs)} événements suspects détectés.\n"
                 message += f"Condition: {rule['description']}\nHeure: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
@@ -0,0 +1,380 @@
+"""
+==============================================================
+ Fichier : async_elk_connector.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Accès Elasticsearch asynchrone (aiohttp) partagé par
+           tout le processus, avec façade synchrone pour les
+           modules de monitoring et de reporting.
+==============================================================
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import aiohttp
+import yaml
+
+from ndjson_builder import NDJSONBuilder, document_id, dumps
+from circuit_breaker import CircuitBreaker, FallbackSpool
+from node_pool import NodePool, parse_nodes_http
+from index_router import IndexRouter
+from elk_connector import (
+    ACK_STATUSES, API_KEY, BREAKER_FAILURES, BREAKER_RESET, BULK_BATCH_DOCS, CONNECT_TIMEOUT,
+    DEAD_TIMEOUT, ELASTIC_HOSTS, INDEX_GRANULARITY, INDEX_PREFIX, MAX_DEAD_TIMEOUT, NODE_DOWN_STATUSES, NODE_SELECTOR,
+    PROBE_INTERVAL, SNIFF_INTERVAL, SNIFF_ON_START, SPOOL_DIR, TIMEOUT, USE_TLS, is_retryable, split_failed,
+)
+
+logger = logging.getLogger("AsyncElkConnector")
+
+MAX_CONCURRENCY = int(os.getenv("ELK_MAX_CONCURRENCY", "32"))
+SEARCH_SIZE = int(os.getenv("ELK_SEARCH_SIZE", "1000"))
+
+
+class AsyncElkConnector:
+    """
+    Connecteur asyncio :
+      - une seule ClientSession (connexions keep-alive réutilisées, pool par nœud)
+      - requêtes réparties sur les nœuds du cluster (NodePool), nœud en panne écarté
+      - sémaphore explicite : au plus `max_concurrency` requêtes en vol
+      - écritures idempotentes (`_create` / `_bulk` create, `_id` déterministe),
+        lots `_bulk` envoyés simultanément ; recherches groupées via `_msearch`
+      - index datés (IndexRouter) : chaque document dans l’index de son jour, chaque
+        recherche limitée aux index qui recoupent sa plage de dates
+      - disjoncteur : échec immédiat pendant une panne, écritures en échec temporaire
+        (documents non acquittés compris) en file de secours, rejouée via `_bulk`
+        quand la sonde constate le retour du cluster ; refus définitifs mis au rebut
+    """
+
+    def __init__(self, hosts: Union[str, Iterable[str]] = ELASTIC_HOSTS, router: Optional[IndexRouter] = None,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None, timeout: float = TIMEOUT,
+                 max_concurrency: int = MAX_CONCURRENCY, spool_dir: str = SPOOL_DIR,
+                 selector: str = NODE_SELECTOR, sniff_on_start: bool = SNIFF_ON_START):
+        self.nodes = NodePool(
+            [hosts] if isinstance(hosts, str) else hosts, selector=selector, dead_timeout=DEAD_TIMEOUT,
+            max_dead_timeout=MAX_DEAD_TIMEOUT, sniff_interval=SNIFF_INTERVAL,
+        )
+        self._sniff_pending = sniff_on_start
+        self.router = router or IndexRouter(INDEX_PREFIX, INDEX_GRANULARITY)
+        self.auth = aiohttp.BasicAuth(username, password or "") if username and not API_KEY else None
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=CONNECT_TIMEOUT)
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker("elasticsearch-async", failure_threshold=BREAKER_FAILURES,
+                                      reset_timeout=BREAKER_RESET, probe=self._probe,
+                                      probe_interval=PROBE_INTERVAL, on_recover=self.replay_spool)
+        self.spool = FallbackSpool(spool_dir)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_config(cls, elk_config_path: str = "config/elk_config.yaml", **kwargs) -> "AsyncElkConnector":
+        with open(elk_config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        es = config.get("elasticsearch", {})
+        partitioning = config.get("index_partitioning", {})
+        if os.getenv("ELASTIC_HOSTS") or os.getenv("ELASTIC_URL"):
+            hosts = ELASTIC_HOSTS
+        else:
+            hosts = es.get("hosts") or [f"{es.get('host', 'http://localhost')}:{es.get('port', 9200)}"]
+        kwargs.setdefault("router", IndexRouter(
+            es.get("index_prefix", INDEX_PREFIX), partitioning.get("granularity", INDEX_GRANULARITY),
+            (partitioning.get("timestamp_field", "@timestamp"), "timestamp"),
+            legacy_indices=partitioning.get("legacy_indices") or (),
+        ))
+        kwargs.setdefault("sniff_on_start", es.get("sniff_on_start", SNIFF_ON_START))
+        return cls(hosts, username=es.get("username"), password=es.get("password"),
+                   timeout=es.get("timeout", TIMEOUT), **kwargs)
+
+    # ----------------------------------------------------------
+    # Transport
+    # ----------------------------------------------------------
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """Session et sémaphore créés dans la boucle qui les utilise."""
+        if self._session is None or self._session.closed:
+            headers = {"Authorization": f"ApiKey {API_KEY}"} if API_KEY else None
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout, auth=self.auth, headers=headers
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = asyncio.get_running_loop()
+        return self._session
+
+    def _run_in_loop(self, coroutine, timeout: float):
+        """Exécute une coroutine dans la boucle de la session depuis un autre thread (sonde, reprise)."""
+        if self._loop is None or self._loop.is_closed():
+            coroutine.close()
+            raise RuntimeError("boucle asyncio du connecteur arrêtée")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    async def _request(self, method: str, path: str, body: Any = None,
+                       content_type: str = "application/json") -> Tuple[Optional[int], Any]:
+        """
+        (statut, réponse JSON) ; (None, None) si le circuit est ouvert ou en cas d’erreur
+        réseau. Chaque nœud est essayé au plus une fois, un nœud injoignable est écarté.
+        """
+        if not self.breaker.allow():
+            return None, None
+        session = self._ensure_session()
+        if self._sniff_pending or self.nodes.sniff_due():
+            self._sniff_pending = False
+            await self.sniff()
+        data = body if body is None or isinstance(body, (bytes, bytearray)) else dumps(body)
+        status, payload, error = None, None, None
+        async with self._semaphore:
+            for _ in range(len(self.nodes)):
+                node = self.nodes.select()
+                try:
+                    async with session.request(method, f"{node.url}{path}", data=data,
+                                               headers={"Content-Type": content_type}) as response:
+                        payload = await response.json(content_type=None)
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    status, payload, error = None, None, e
+                node_up = status is not None and status not in NODE_DOWN_STATUSES
+                self.nodes.release(node, ok=node_up)
+                if node_up:
+                    break
+        if status is None:
+            self.breaker.record_failure()
+            logger.error(f"Erreur réseau Elasticsearch ({method} {path}) : {error}")
+            return None, None
+        if status == 429:
+            self.breaker.record_backpressure()
+        elif status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return status, payload
+
+    # ----------------------------------------------------------
+    # Sonde et reprise du disjoncteur (threads du CircuitBreaker)
+    # ----------------------------------------------------------
+    async def _ping_nodes(self) -> bool:
+        """Sonde du cluster, hors disjoncteur : chaque nœud répondant est remis dans le pool."""
+        session = self._ensure_session()
+        healthy = False
+        for node in list(self.nodes.nodes):
+            try:
+                async with session.get(node.url, timeout=aiohttp.ClientTimeout(total=CONNECT_TIMEOUT)) as response:
+                    up = response.status < 500
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                up = False
+            if up:
+                self.nodes.mark_live(node)
+                healthy = True
+        return healthy
+
+    def _probe(self) -> bool:
+        return self._run_in_loop(self._ping_nodes(), CONNECT_TIMEOUT * len(self.nodes) + 1)
+
+    def replay_spool(self) -> int:
+        """
+        Rejoue la file de secours via `_bulk` (appelé à la fermeture du circuit).
+        Bloquant : à appeler hors de la boucle asyncio du connecteur.
+        """
+        if self._loop is None or self._loop.is_closed():
+            return 0
+        return self.spool.replay("elasticsearch", self._replay_segment)
+
+    def _replay_segment(self, body: bytes) -> Optional[bool]:
+        """Contrat de FallbackSpool.replay : True traité, None cluster indisponible, False lot encore refusé."""
+        try:
+            status, _, retry = self._run_in_loop(self._post_bulk(body), self.timeout.total * 2)
+        except (FutureTimeoutError, RuntimeError):
+            return None
+        if not retry:
+            return True
+        if status not in (200, 201):
+            return None
+        if len(retry) == len(body):
+            return False
+        self.spool.append("elasticsearch", retry)
+        return True
+
+    async def sniff(self) -> bool:
+        """Découvre les nœuds HTTP du cluster (`_nodes/http`) et met le pool à jour."""
+        session = self._ensure_session()
+        for node in list(self.nodes.nodes):
+            try:
+                async with session.get(f"{node.url}/_nodes/http") as response:
+                    response.raise_for_status()
+                    payload = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"Découverte impossible via {node.url} : {e}")
+                continue
+            self.nodes.set_hosts(parse_nodes_http(payload, "https" if USE_TLS else "http"))
+            return True
+        return False
+
+    # ----------------------------------------------------------
+    # Écritures
+    # ----------------------------------------------------------
+    async def send_log(self, event: Dict[str, Any]) -> bool:
+        body = dumps(event)
+        doc_id = document_id(body[:-1])
+        index = self.router.index_for_document(event)
+        status, _ = await self._request("PUT", f"/{index}/_create/{doc_id}", body)
+        if status in ACK_STATUSES:
+            return True
+        action = dumps({"create": {"_index": index, "_id": doc_id}})
+        if is_retryable(status):
+            self.spool.append("elasticsearch", action + b"\n" + body + b"\n")
+        else:
+            self._dead_letter(action + b"\n" + body + b"\n", status)
+        return False
+
+    def _dead_letter(self, body: bytes, reason):
+        path = self.spool.dead_letter("elasticsearch", body)
+        logger.error(f"Documents refusés définitivement ({reason}), conservés dans {path}.")
+
+    async def _post_bulk(self, body: bytes) -> Tuple[Optional[int], int, bytes]:
+        """
+        POST `_bulk` : retourne (statut HTTP, documents acquittés, lignes à réessayer).
+        Les refus définitifs (lot entier ou documents) sont mis au rebut.
+        """
+        status, payload = await self._request(
+            "POST", f"/{self.router.index_for(None)}/_bulk", body, content_type="application/x-ndjson"
+        )
+        documents = body.count(b"\n") // 2
+        if status in (200, 201) and isinstance(payload, dict):
+            items = payload.get("items", [])
+            if not payload.get("errors") and len(items) >= documents:
+                return status, documents, b""
+            retry, dead, failed = split_failed(body, items)
+            if dead:
+                self._dead_letter(dead, "refus par document")
+            return status, documents - failed, retry
+        if status in (200, 201) or is_retryable(status):
+            return status, 0, body
+        self._dead_letter(body, status)
+        return status, 0, b""
+
+    async def _send_batch(self, events: List[Dict[str, Any]]) -> int:
+        batch = NDJSONBuilder(
+            op_type="create", index_for=self.router.index_for, timestamp_fields=self.router.timestamp_fields
+        )
+        for event in events:
+            batch.add_document(event)
+        _, acked, retry = await self._post_bulk(bytes(batch.buffer))
+        if retry:
+            self.spool.append("elasticsearch", retry)
+        if acked < batch.count:
+            logger.warning(f"{batch.count - acked} documents non acquittés dans un lot _bulk.")
+        return acked
+
+    async def send_logs(self, events: List[Dict[str, Any]], batch_docs: int = BULK_BATCH_DOCS) -> int:
+        """Découpe en lots `_bulk` envoyés simultanément ; retourne le nombre de documents acquittés."""
+        chunks = [events[i:i + batch_docs] for i in range(0, len(events), batch_docs)]
+        return sum(await asyncio.gather(*(self._send_batch(chunk) for chunk in chunks)))
+
+    # ----------------------------------------------------------
+    # Recherches
+    # ----------------------------------------------------------
+    async def search(self, query: Dict[str, Any], index: Optional[str] = None,
+                     size: int = SEARCH_SIZE) -> List[Dict[str, Any]]:
+        """Sans `index`, seuls les index datés recoupant la plage de dates de la requête sont lus."""
+        index = index or self.router.indices_for_query(query)
+        status, payload = await self._request("POST", f"/{index}/_search?ignore_unavailable=true",
+                                              dict(query, size=size))
+        if status != 200:
+            logger.warning(f"Recherche Elasticsearch en échec (statut {status}).")
+            return []
+        return [hit["_source"] for hit in payload.get("hits", {}).get("hits", [])]
+
+    async def search_many(self, queries: Iterable[Dict[str, Any]], index: Optional[str] = None,
+                          size: int = SEARCH_SIZE) -> List[List[Dict[str, Any]]]:
+        """Plusieurs recherches en un seul aller-retour (`_msearch`)."""
+        queries = list(queries)
+        body = bytearray()
+        for query in queries:
+            header = {"index": index or self.router.indices_for_query(query), "ignore_unavailable": True}
+            body += dumps(header) + b"\n" + dumps(dict(query, size=size)) + b"\n"
+        status, payload = await self._request("POST", "/_msearch", bytes(body), content_type="application/x-ndjson")
+        if status != 200:
+            logger.warning(f"Recherche groupée Elasticsearch en échec (statut {status}).")
+            return [[] for _ in queries]
+        return [
+            [hit["_source"] for hit in response.get("hits", {}).get("hits", [])]
+            for response in payload.get("responses", [])
+        ]
+
+    async def close(self):
+        self.breaker.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class ELKConnector:
+    """
+    Façade synchrone du connecteur asynchrone : une boucle asyncio tourne dans
+    un thread dédié, les appels bloquants y sont soumis. `send_log(wait=False)`
+    retourne un Future : l’appelant peut garder de nombreux envois en vol.
+    """
+
+    def __init__(self, elk_config_path: str = "config/elk_config.yaml",
+                 connector: Optional[AsyncElkConnector] = None):
+        self.connector = connector or AsyncElkConnector.from_config(elk_config_path)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="elk-io", daemon=True)
+        self._thread.start()
+
+    def _submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def send_log(self, event: Dict[str, Any], wait: bool = True):
+        future = self._submit(self.connector.send_log(event))
+        return future.result() if wait else future
+
+    def send_logs(self, events: List[Dict[str, Any]]) -> int:
+        return self._submit(self.connector.send_logs(events)).result()
+
+    def search_logs(self, query: Dict[str, Any], index: Optional[str] = None,
+                    size: int = SEARCH_SIZE) -> List[Dict[str, Any]]:
+        return self._submit(self.connector.search(query, index, size)).result()
+
+    def search_many(self, queries: Iterable[Dict[str, Any]], index: Optional[str] = None,
+                    size: int = SEARCH_SIZE) -> List[List[Dict[str, Any]]]:
+        return self._submit(self.connector.search_many(queries, index, size)).result()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._submit(self.connector.close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+# ==========================================================
+# Connecteur partagé par processus
+# ==========================================================
+_shared: Dict[str, ELKConnector] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_connector(elk_config_path: str = "config/elk_config.yaml") -> ELKConnector:
+    """Un seul connecteur (session, pool de connexions, boucle) par configuration et par processus."""
+    with _shared_lock:
+        connector = _shared.get(elk_config_path)
+        if connector is None:
+            connector = _shared[elk_config_path] = ELKConnector(elk_config_path)
+        return connector
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    elk = shared_connector("config/elk_config.yaml")
+    pending = [elk.send_log({"category": "AML", "transaction_id": f"TX{i}"}, wait=False) for i in range(100)]
+    print(sum(future.result() for future in pending), "logs envoyés")
+    print(len(elk.search_logs({"query": {"match": {"category": "AML"}}})), "logs trouvés")
+    elk.close()
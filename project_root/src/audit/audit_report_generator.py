@@ -14,13 +14,13 @@ import csv
 import os
 from datetime import datetime
 from fpdf import FPDF
-from elk_connector import ELKConnector
+from async_elk_connector import shared_connector
 
 
 class AuditReportGenerator:
     def __init__(self, elk_config_path: str):
         """Initialise le connecteur Elasticsearch."""
-        self.connector = ELKConnector(elk_config_path)
+        self.connector = shared_connector(elk_config_path)
 
     def fetch_logs(self, start_date: str, end_date: str, category: str):
         """
@@ -0,0 +1,259 @@
+"""
+==============================================================
+ Fichier : circuit_breaker.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Disjoncteur autour des destinations ELK (fermé,
+           ouvert, semi-ouvert) et file de secours sur disque.
+==============================================================
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("CircuitBreaker")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+# Sous-répertoires de la file de secours (jamais rejoués automatiquement)
+DEAD_LETTER_DIR = "dead_letter"
+QUARANTINE_DIR = "quarantine"
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d’une destination :
+      - fermé : les appels passent ; `failure_threshold` échecs consécutifs l’ouvrent
+      - ouvert : refus immédiat (aucune attente réseau) ; une sonde légère tourne en
+        arrière-plan toutes les `probe_interval` secondes
+      - semi-ouvert : après `reset_timeout` (ou une sonde réussie), un seul appel
+        d’essai passe ; son succès referme le circuit, son échec le rouvre
+    `on_recover` est appelé dans un thread dédié à la fermeture du circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 probe: Optional[Callable[[], bool]] = None, probe_interval: float = 5.0,
+                 on_recover: Optional[Callable[[], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.on_recover = on_recover
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ----------------------------------------------------------
+    # Transitions
+    # ----------------------------------------------------------
+    def allow(self) -> bool:
+        """True si l’appel peut être tenté maintenant."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+        if recovered:
+            logger.info(f"Circuit {self.name} refermé.")
+            self._recover()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                opening = self.state != OPEN
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._trial_running = False
+            else:
+                opening = False
+        if opening:
+            logger.warning(f"Circuit {self.name} ouvert après {self.failures} échecs : envois redirigés.")
+            self._start_probe()
+
+    def record_backpressure(self):
+        """
+        Surcharge signalée (429) : ni succès ni échec, la contre-pression relève
+        de l’AIMD ; seul l’appel d’essai du semi-ouvert est libéré.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    # ----------------------------------------------------------
+    # Sonde de santé en arrière-plan
+    # ----------------------------------------------------------
+    def _start_probe(self):
+        if self.probe is None or (self._probe_thread is not None and self._probe_thread.is_alive()):
+            return
+        self._probe_thread = threading.Thread(target=self._probe_loop, name=f"probe-{self.name}", daemon=True)
+        self._probe_thread.start()
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval):
+            if self.state == CLOSED:
+                return
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                self.record_success()
+                return
+
+    def _recover(self):
+        if self.on_recover is not None:
+            threading.Thread(target=self._run_recover, name=f"recover-{self.name}", daemon=True).start()
+
+    def _run_recover(self):
+        try:
+            self.on_recover()
+        except Exception as e:
+            logger.error(f"Échec de la reprise après fermeture du circuit {self.name} : {e}")
+
+    def close(self):
+        self._stop.set()
+
+
+class FallbackSpool:
+    """
+    File de secours sur disque : un segment par lot en échec temporaire
+    (`<sink>-<ns>.ndjson`), rejoué dans l’ordre quand la destination revient.
+    Les documents portant un identifiant déterministe, un rejeu partiel ne crée
+    pas de doublon.
+      - `dead_letter/<sink>.ndjson` : documents refusés définitivement (4xx), conservés pour analyse
+      - `quarantine/` : segments en échec à chaque rejeu, écartés pour ne pas bloquer les suivants
+    """
+
+    def __init__(self, directory: str = "data/elk_spool", max_bytes: int = 1024 * 1024 * 1024,
+                 max_failures: int = 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_failures = max_failures
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+
+    def size(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+    def append(self, sink: str, body) -> bool:
+        body = bytes(body)
+        if not body:
+            return True
+        with self._lock:
+            if self.size() + len(body) > self.max_bytes:
+                logger.error(f"File de secours pleine, lot {sink} de {len(body)} octets perdu.")
+                return False
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{sink}-{time.time_ns():020d}.ndjson")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return True
+
+    def dead_letter(self, sink: str, body) -> str:
+        """Conserve des documents refusés définitivement ; ils ne sont jamais rejoués."""
+        body = bytes(body)
+        path = os.path.join(self.directory, DEAD_LETTER_DIR, f"{sink}.ndjson")
+        if body:
+            with self._lock:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(body)
+        return path
+
+    def _paths(self, sink: str) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        prefix = f"{sink}-"
+        return [
+            os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+            if name.startswith(prefix) and name.endswith(".ndjson")
+        ]
+
+    def pending(self, sink: str) -> int:
+        """Nombre de segments en attente de rejeu (sans les lire)."""
+        return len(self._paths(sink))
+
+    def segments(self, sink: str) -> Iterator[Tuple[str, bytes]]:
+        for path in self._paths(sink):
+            with open(path, "rb") as f:
+                yield path, f.read()
+
+    def _quarantine(self, path: str, failures: int):
+        directory = os.path.join(self.directory, QUARANTINE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        os.replace(path, os.path.join(directory, os.path.basename(path)))
+        logger.error(f"Segment {os.path.basename(path)} en échec {failures} fois, mis en quarantaine.")
+
+    def replay(self, sink: str, send: Callable[[bytes], Optional[bool]]) -> int:
+        """
+        Renvoie les segments dans l’ordre. `send` retourne True (segment traité),
+        None (destination indisponible : arrêt, nouvel essai plus tard) ou False
+        (segment refusé). Un segment refusé `max_failures` fois de suite est mis en
+        quarantaine et le rejeu continue. Retourne le nombre de segments rejoués.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return 0  # rejeu déjà en cours
+        replayed = 0
+        try:
+            for path, body in self.segments(sink):
+                try:
+                    result = send(body)
+                except Exception as e:
+                    logger.error(f"Rejeu de {os.path.basename(path)} en erreur : {e}")
+                    result = False
+                if result:
+                    os.remove(path)
+                    self._failures.pop(path, None)
+                    replayed += 1
+                    continue
+                if result is None:
+                    break
+                failures = self._failures.pop(path, 0) + 1
+                if failures < self.max_failures:
+                    self._failures[path] = failures
+                    break
+                self._quarantine(path, failures)
+        finally:
+            self._replay_lock.release()
+        if replayed:
+            logger.info(f"{replayed} lots {sink} rejoués depuis la file de secours.")
+        return replayed
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    breaker = CircuitBreaker("demo", failure_threshold=2, reset_timeout=1.0)
+    for _ in range(2):
+        breaker.record_failure()
+    print(breaker.state, breaker.allow())
+    time.sleep(1.1)
+    print(breaker.allow(), breaker.state)
+    breaker.record_success()
+    print(breaker.state)
@@ -8,13 +8,21 @@
 """
 
 import os
-import json
 import time
 import logging
+import threading
 import requests
-from typing import Dict, Any, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 from requests.adapters import HTTPAdapter, Retry
 from dotenv import load_dotenv
+from ndjson_builder import NDJSONBuilder, document_id, dumps
+from circuit_breaker import CircuitBreaker, FallbackSpool, CLOSED
+from aimd_controller import AIMDController
+from node_pool import NodePool, parse_nodes_http
+from index_router import IndexRouter
 
 # Chargement des variables d'environnement (.env)
 load_dotenv()
@@ -23,11 +31,84 @@ load_dotenv()
 # Configuration globale
 # ==========================================================
 ELASTIC_URL = os.getenv("ELASTIC_URL", "http://localhost:9200")
+# Nœuds HTTP du cluster (séparés par des virgules) ; à défaut, ELASTIC_URL seul
+ELASTIC_HOSTS = [host.strip() for host in os.getenv("ELASTIC_HOSTS", ELASTIC_URL).split(",") if host.strip()]
+NODE_SELECTOR = os.getenv("ELK_NODE_SELECTOR", "round_robin")
+DEAD_TIMEOUT = float(os.getenv("ELK_DEAD_TIMEOUT", "60"))
+MAX_DEAD_TIMEOUT = float(os.getenv("ELK_MAX_DEAD_TIMEOUT", "1800"))
+SNIFF_ON_START = os.getenv("ELK_SNIFF_ON_START", "false").lower() == "true"
+SNIFF_INTERVAL = float(os.getenv("ELK_SNIFF_INTERVAL", "0")) or None
 LOGSTASH_URL = os.getenv("LOGSTASH_URL", "http://localhost:5044")
-INDEX_NAME = os.getenv("ELK_INDEX", "compliance-logs-2025")
+# Index datés `prefix-YYYY.MM.DD` (ou `prefix-YYYY.MM`), routés sur le timestamp des documents
+INDEX_PREFIX = os.getenv("ELK_INDEX_PREFIX", "compliance-logs")
+INDEX_GRANULARITY = os.getenv("ELK_INDEX_GRANULARITY", "day")
 USE_TLS = os.getenv("USE_TLS", "false").lower() == "true"
 API_KEY = os.getenv("ELK_API_KEY", "")
 TIMEOUT = int(os.getenv("ELK_TIMEOUT", "10"))
+CONNECT_TIMEOUT = float(os.getenv("ELK_CONNECT_TIMEOUT", "2"))
+BREAKER_FAILURES = int(os.getenv("ELK_BREAKER_FAILURES", "3"))
+BREAKER_RESET = float(os.getenv("ELK_BREAKER_RESET", "30"))
+PROBE_INTERVAL = float(os.getenv("ELK_PROBE_INTERVAL", "5"))
+SPOOL_DIR = os.getenv("ELK_SPOOL_DIR", "data/elk_spool")
+# Rejeu de la file de secours au démarrage puis périodiquement (0 = désactivé)
+SPOOL_REPLAY_INTERVAL = float(os.getenv("ELK_SPOOL_REPLAY_INTERVAL", "30"))
+BULK_BATCH_DOCS = int(os.getenv("ELK_BULK_BATCH_DOCS", "500"))
+BULK_MAX_DOCS = int(os.getenv("ELK_BULK_MAX_DOCS", "5000"))
+BULK_MAX_CONCURRENCY = int(os.getenv("ELK_BULK_MAX_CONCURRENCY", "8"))
+BULK_TARGET_LATENCY = float(os.getenv("ELK_BULK_TARGET_LATENCY", "1.0"))
+BULK_MAX_ATTEMPTS = int(os.getenv("ELK_BULK_MAX_ATTEMPTS", "4"))
+
+# Statuts `_bulk` considérés comme acquittés ; 409 = document déjà présent (create)
+ACK_STATUSES = frozenset({200, 201, 409})
+# Réponses d’un nœud indisponible (redémarrage, proxy) : la requête passe au nœud suivant
+NODE_DOWN_STATUSES = frozenset({502, 503, 504})
+# Échecs temporaires (avec le réseau et les 5xx) : mis en file de secours ; autres 4xx : au rebut
+RETRYABLE_STATUSES = frozenset({408, 429})
+
+
+def is_retryable(status: Optional[int]) -> bool:
+    """Erreur réseau (None), 408, 429 ou 5xx : l’envoi pourra réussir plus tard."""
+    return status is None or status in RETRYABLE_STATUSES or status >= 500
+
+
+def _is_rejection(item: Dict[str, Any]) -> bool:
+    """Item `_bulk` refusé par saturation du cluster (file d’écriture pleine)."""
+    if item.get("status") == 429:
+        return True
+    error = item.get("error")
+    return isinstance(error, dict) and error.get("type") == "es_rejected_execution_exception"
+
+
+def _outcome(item: Dict[str, Any]) -> Optional[bool]:
+    """Item `_bulk` : True acquitté, False à réessayer, None refusé définitivement (mapping, 4xx)."""
+    status = item.get("status")
+    if status in ACK_STATUSES:
+        return True
+    if _is_rejection(item) or is_retryable(status):
+        return False
+    return None
+
+
+def split_failed(body, items: List[Dict[str, Any]]) -> Tuple[bytes, bytes, int]:
+    """
+    Sépare les documents (action + source) non acquittés d’un lot `_bulk` :
+    (à réessayer, refusés définitivement, nombre d’échecs). Items manquants : à réessayer.
+    """
+    lines = bytes(body).splitlines(keepends=True)
+    retry, dead = bytearray(), bytearray()
+    failed = 0
+    for position, entry in enumerate(items):
+        (result,) = entry.values()
+        outcome = _outcome(result)
+        if outcome:
+            continue
+        failed += 1
+        (retry if outcome is False else dead).extend(b"".join(lines[2 * position:2 * position + 2]))
+    documents = len(lines) // 2
+    if len(items) < documents:
+        failed += documents - len(items)
+        retry += b"".join(lines[2 * len(items):])
+    return bytes(retry), bytes(dead), failed
 
 logger = logging.getLogger("ElkConnector")
 logger.setLevel(logging.INFO)
@@ -38,28 +119,72 @@ class ElkConnector:
     Classe de connexion et d’envoi des logs vers la stack ELK.
     Supporte :
       - Transmission directe à Logstash (HTTP)
-      - Indexation directe dans Elasticsearch
+      - Indexation directe dans Elasticsearch, dans l’index daté de chaque document,
+        répartie sur les nœuds du cluster
+        (liste ELASTIC_HOSTS ou découverte `_nodes/http`, nœud en panne écarté)
       - Reconnexion automatique en cas d’échec réseau
+      - Identifiants déterministes et sémantique `create` : un retry ne duplique pas
+      - Disjoncteur par destination : échec immédiat pendant une panne, lots
+        mis en file de secours puis rejoués au rétablissement, au démarrage et
+        périodiquement tant que la file n’est pas vide
+      - Refus définitifs (4xx hors 408/429) mis au rebut au lieu d’être rejoués
+      - Alimentation optionnelle de l’index des personnes (SubjectIndex)
     """
 
-    def __init__(self):
-        self.elastic_url = ELASTIC_URL.rstrip("/")
+    def __init__(self, subject_index=None):
+        self.nodes = NodePool(
+            ELASTIC_HOSTS, selector=NODE_SELECTOR, dead_timeout=DEAD_TIMEOUT,
+            max_dead_timeout=MAX_DEAD_TIMEOUT, sniff_interval=SNIFF_INTERVAL,
+        )
         self.logstash_url = LOGSTASH_URL.rstrip("/")
-        self.index_name = INDEX_NAME
+        self.router = IndexRouter(INDEX_PREFIX, INDEX_GRANULARITY)
         self.session = self._init_session()
+        self.subject_index = subject_index
+        self.spool = FallbackSpool(SPOOL_DIR)
+        # Débit d’ingestion adapté à l’état du cluster (taille des lots, concurrence)
+        self.controller = AIMDController(
+            initial_batch=BULK_BATCH_DOCS, max_batch=BULK_MAX_DOCS,
+            max_concurrency=BULK_MAX_CONCURRENCY, target_latency=BULK_TARGET_LATENCY,
+        )
+        self.breakers = {
+            sink: CircuitBreaker(
+                sink, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET,
+                probe=probe, probe_interval=PROBE_INTERVAL,
+                on_recover=partial(self.replay_spool, sink),
+            )
+            for sink, probe in (("logstash", partial(self._ping, self.logstash_url)),
+                                ("elasticsearch", self._ping_nodes))
+        }
+        if SNIFF_ON_START:
+            self.sniff()
+        self._stop = threading.Event()
+        if SPOOL_REPLAY_INTERVAL > 0:
+            threading.Thread(target=self._replay_loop, name="elk-spool-replay", daemon=True).start()
+
+    @property
+    def elastic_url(self) -> str:
+        """URL de base d’un nœud disponible (appels directs via `session`)."""
+        return self.nodes.peek().url
 
     # ----------------------------------------------------------
     # Configuration de la session HTTP avec retry
     # ----------------------------------------------------------
     def _init_session(self) -> requests.Session:
         session = requests.Session()
+        # Peu de retries : au-delà, le disjoncteur et la file de secours prennent le relais
+        # Pas de retry de connexion : un nœud injoignable est écarté, le suivant est essayé
         retries = Retry(
-            total=5,
-            backoff_factor=1.5,
+            total=2,
+            connect=0,
+            backoff_factor=0.5,
             status_forcelist=[500, 502, 503, 504],
             allowed_methods=["POST", "PUT"]
         )
-        adapter = HTTPAdapter(max_retries=retries)
+        # urllib3 garde un pool de connexions keep-alive par nœud
+        adapter = HTTPAdapter(
+            max_retries=retries, pool_connections=max(10, len(self.nodes)),
+            pool_maxsize=max(10, BULK_MAX_CONCURRENCY),
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
@@ -70,19 +195,135 @@ class ElkConnector:
         logger.info("Session HTTP initialisée avec retry et sécurité.")
         return session
 
+    # ----------------------------------------------------------
+    # Requête protégée par le disjoncteur de la destination
+    # ----------------------------------------------------------
+    def _request(self, sink: str, method: str, url: str, body, **kwargs) -> Optional[requests.Response]:
+        """
+        None si le circuit est ouvert ou en cas d’erreur réseau (sans attente supplémentaire).
+        Pour Elasticsearch, `url` est un chemin (`/index/_bulk`) : chaque nœud est
+        essayé au plus une fois, un nœud injoignable est écarté du pool.
+        """
+        breaker = self.breakers[sink]
+        if not breaker.allow():
+            return None
+        if sink == "elasticsearch" and self.nodes.sniff_due():
+            self.sniff()
+        response, error = None, None
+        for _ in range(len(self.nodes) if sink == "elasticsearch" else 1):
+            node = self.nodes.select() if sink == "elasticsearch" else None
+            try:
+                response = self.session.request(
+                    method, node.url + url if node else url, data=body,
+                    timeout=(CONNECT_TIMEOUT, TIMEOUT), **kwargs
+                )
+            except requests.RequestException as e:
+                response, error = None, e
+            node_up = response is not None and response.status_code not in NODE_DOWN_STATUSES
+            if node is not None:
+                self.nodes.release(node, ok=node_up)
+            if node_up:
+                break
+        if response is None:
+            breaker.record_failure()
+            logger.error(f"Erreur réseau vers {sink} : {error}")
+            return None
+        if response.status_code == 429:
+            breaker.record_backpressure()  # absorbé par l’AIMD, ne doit pas ouvrir le circuit
+        elif response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _ping(self, url: str) -> bool:
+        """Sonde légère : la destination répond (sans retry, délai court)."""
+        try:
+            return requests.get(url, timeout=CONNECT_TIMEOUT).status_code < 500
+        except requests.RequestException:
+            return False
+
+    def _ping_nodes(self) -> bool:
+        """Sonde du cluster : chaque nœud répondant est remis dans le pool."""
+        healthy = False
+        for node in list(self.nodes.nodes):
+            if self._ping(node.url):
+                self.nodes.mark_live(node)
+                healthy = True
+        return healthy
+
+    def sniff(self) -> bool:
+        """Découvre les nœuds HTTP du cluster (`_nodes/http`) et met le pool à jour."""
+        scheme = "https" if USE_TLS else "http"
+        for node in list(self.nodes.nodes):
+            try:
+                response = self.session.get(f"{node.url}/_nodes/http", timeout=(CONNECT_TIMEOUT, TIMEOUT))
+                response.raise_for_status()
+            except requests.RequestException as e:
+                logger.warning(f"Découverte impossible via {node.url} : {e}")
+                continue
+            self.nodes.set_hosts(parse_nodes_http(response.json(), scheme))
+            return True
+        return False
+
+    def replay_spool(self, sink: str) -> int:
+        """Rejoue la file de secours d’une destination (fermeture du circuit, démarrage, périodiquement)."""
+        return self.spool.replay(sink, partial(self._replay_segment, sink))
+
+    def _replay_segment(self, sink: str, body: bytes) -> Optional[bool]:
+        """
+        True si le segment est traité (documents acquittés, mis au rebut ou remis
+        en file), None si la destination est indisponible, False si elle refuse encore tout le lot.
+        """
+        status, acked, retry = self._post_ndjson(sink, body)
+        if acked:
+            return True
+        if status not in (200, 201) and is_retryable(status):
+            return None
+        if len(retry) == len(body):
+            return False
+        if retry:
+            self.spool.append(sink, retry)
+        return True
+
+    def _replay_loop(self):
+        """Rejeu au démarrage puis toutes les SPOOL_REPLAY_INTERVAL secondes si le circuit est fermé."""
+        while True:
+            for sink, breaker in self.breakers.items():
+                if breaker.state == CLOSED and self.spool.pending(sink):
+                    try:
+                        self.replay_spool(sink)
+                    except Exception as e:
+                        logger.error(f"Rejeu périodique de la file {sink} en échec : {e}")
+            if self._stop.wait(SPOOL_REPLAY_INTERVAL):
+                return
+
+    def _dead_letter(self, sink: str, body, reason):
+        path = self.spool.dead_letter(sink, body)
+        logger.error(f"Documents {sink} refusés définitivement ({reason}), conservés dans {path}.")
+
+    def close(self):
+        self._stop.set()
+        for breaker in self.breakers.values():
+            breaker.close()
+
     # ----------------------------------------------------------
     # Envoi d’un log unique vers Logstash
     # ----------------------------------------------------------
     def send_to_logstash(self, log: Dict[str, Any]) -> bool:
-        try:
-            response = self.session.post(self.logstash_url, json=log, timeout=TIMEOUT)
-            if response.status_code in [200, 201]:
-                logger.debug("Log envoyé à Logstash avec succès.")
-                return True
-            else:
-                logger.warning(f"Échec Logstash : {response.status_code} - {response.text}")
-        except requests.RequestException as e:
-            logger.error(f"Erreur réseau vers Logstash : {e}")
+        """Le document porte `event_id` (déterministe) : Logstash l’utilise comme `document_id`."""
+        body = dumps(log)
+        body = body[:-1] + b',"event_id":"' + document_id(body[:-1]).encode("ascii") + b'"}'
+        response = self._request("logstash", "POST", self.logstash_url, body)
+        if response is not None and response.status_code in [200, 201]:
+            logger.debug("Log envoyé à Logstash avec succès.")
+            return True
+        if response is not None:
+            logger.warning(f"Échec Logstash : {response.status_code} - {response.text}")
+            if not is_retryable(response.status_code):
+                self._dead_letter("logstash", body + b"\n", response.status_code)
+                return False
+        self.spool.append("logstash", body + b"\n")
         return False
 
     # ----------------------------------------------------------
@@ -90,41 +331,201 @@ class ElkConnector:
     # ----------------------------------------------------------
     def index_to_elasticsearch(self, log: Dict[str, Any]) -> bool:
         """
-        Envoie un log directement dans Elasticsearch (optionnel).
+        Envoie un log directement dans Elasticsearch (optionnel), en `_create`
+        avec un identifiant déterministe : 409 signifie déjà indexé.
         """
-        url = f"{self.elastic_url}/{self.index_name}/_doc"
-        try:
-            response = self.session.post(url, json=log, timeout=TIMEOUT)
-            if response.status_code in [200, 201]:
-                logger.debug("Log indexé dans Elasticsearch.")
-                return True
-            else:
-                logger.warning(f"Erreur d’indexation Elasticsearch : {response.text}")
-        except requests.RequestException as e:
-            logger.error(f"Erreur réseau Elasticsearch : {e}")
+        body = dumps(log)
+        doc_id = document_id(body[:-1])
+        index = self.router.index_for_document(log)
+        response = self._request("elasticsearch", "PUT", f"/{index}/_create/{doc_id}", body)
+        if response is not None and response.status_code in ACK_STATUSES:
+            logger.debug("Log indexé dans Elasticsearch.")
+            self._record_subject(log, doc_id)
+            return True
+        action = dumps({"create": {"_index": index, "_id": doc_id}})
+        if response is not None:
+            logger.warning(f"Erreur d’indexation Elasticsearch : {response.text}")
+            if not is_retryable(response.status_code):
+                self._dead_letter("elasticsearch", action + b"\n" + body + b"\n", response.status_code)
+                return False
+        self.spool.append("elasticsearch", action + b"\n" + body + b"\n")
         return False
 
+    def _record_subject(self, log: Dict[str, Any], doc_id: str):
+        """Enregistre l’emplacement du document pour les demandes GDPR."""
+        if self.subject_index is None or not doc_id:
+            return
+        user_id = log.get("user_id") or (log.get("context") or {}).get("user_id")
+        if user_id:
+            self.subject_index.add_documents(self.router.index_for_document(log), [(user_id, doc_id)])
+
+    def _builder(self, to_elastic: bool = True) -> NDJSONBuilder:
+        """Lot `_bulk` routé vers les index datés, ou lot Logstash avec `event_id`."""
+        if not to_elastic:
+            return NDJSONBuilder(embed_id=True)
+        return NDJSONBuilder(
+            op_type="create", index_for=self.router.index_for, timestamp_fields=self.router.timestamp_fields
+        )
+
+    def _bulk_path(self) -> str:
+        """Les actions portent leur `_index` ; l’index du chemin (jour courant) sert aux actions sans `_index`."""
+        return f"/{self.router.index_for(None)}/_bulk"
+
     # ----------------------------------------------------------
     # Envoi par lot (batch)
     # ----------------------------------------------------------
-    def bulk_send(self, logs: List[Dict[str, Any]], method: str = "logstash"):
+    def _timed_request(self, sink: str, url: str, body) -> Tuple[Optional[requests.Response], Optional[dict]]:
+        """POST d’un lot NDJSON ; latence et rejets éventuels transmis au contrôleur AIMD."""
+        started = time.monotonic()
+        response = self._request(sink, "POST", url, body, headers={"Content-Type": "application/x-ndjson"})
+        if response is None:
+            return None, None
+        payload = response.json() if sink == "elasticsearch" and response.status_code in [200, 201] else None
+        rejected = response.status_code == 429 or (
+            payload is not None and payload.get("errors") and any(
+                _is_rejection(item) for entry in payload.get("items", []) for item in entry.values()
+            )
+        )
+        self.controller.record(time.monotonic() - started, rejected=bool(rejected))
+        return response, payload
+
+    def _post_ndjson(self, sink: str, body) -> Tuple[Optional[int], bool, bytes]:
         """
-        Envoi en batch vers Logstash ou Elasticsearch.
+        POST d’un lot NDJSON : retourne (statut HTTP, tout acquitté, partie à réessayer).
+        Les refus définitifs (lot entier ou documents `_bulk`) sont mis au rebut.
         """
-        success_count = 0
-        for log in logs:
-            sent = (
-                self.send_to_logstash(log)
-                if method == "logstash"
-                else self.index_to_elasticsearch(log)
+        url = self._bulk_path() if sink == "elasticsearch" else self.logstash_url
+        response, payload = self._timed_request(sink, url, body)
+        status = None if response is None else response.status_code
+        if status in (200, 201):
+            if payload is None or not payload.get("errors"):
+                return status, True, b""
+            retry, dead, failed = split_failed(body, payload.get("items", []))
+            if dead:
+                self._dead_letter(sink, dead, "refus par document")
+            return status, failed == 0, retry
+        if response is not None:
+            logger.warning(f"Échec d’envoi du lot NDJSON : {status} - {response.text[:200]}")
+        if is_retryable(status):
+            return status, False, bytes(body)
+        self._dead_letter(sink, body, status)
+        return status, False, b""
+
+    def send_ndjson(self, body, bulk: bool = False, spool: bool = True) -> bool:
+        """
+        Envoie un lot NDJSON déjà sérialisé (bytes, bytearray ou memoryview,
+        transmis tel quel) à Logstash ou à l’API `_bulk` d’Elasticsearch.
+        En `_bulk`, le lot est réussi si chaque document est acquitté (409 compris).
+        Les échecs temporaires sont mis en file de secours (sauf spool=False),
+        les refus définitifs au rebut.
+        """
+        sink = "elasticsearch" if bulk else "logstash"
+        _, acked, retry = self._post_ndjson(sink, body)
+        if retry and spool:
+            self.spool.append(sink, retry)
+        return acked
+
+    def send_bulk(self, batch: NDJSONBuilder, spool: bool = True) -> Tuple[List[str], List[str]]:
+        """
+        Envoie un lot construit avec op_type="create" et suit les acquittements
+        document par document : retourne (identifiants acquittés, identifiants en échec).
+        Un document déjà indexé (409) est acquitté : renvoyer le lot est sans effet.
+        Les documents en échec temporaire sont mis en file de secours (sauf spool=False) ;
+        les refus définitifs vont au rebut et ne figurent dans aucune des deux listes.
+        """
+        ids = list(batch.ids)
+        with batch.view() as body:
+            response, payload = self._timed_request(
+                "elasticsearch", self._bulk_path(), body
             )
-            if sent:
-                success_count += 1
-            else:
-                logger.warning(f"Log non transmis : {json.dumps(log)[:200]}")
-            time.sleep(0.05)  # léger délai anti-surcharge
+            if payload is None:
+                status = None if response is None else response.status_code
+                if response is not None:
+                    logger.warning(f"Échec du lot _bulk : {status} - {response.text[:200]}")
+                if not is_retryable(status):
+                    self._dead_letter("elasticsearch", body, status)
+                    return [], []
+                if spool:
+                    self.spool.append("elasticsearch", body)
+                return [], ids
 
+            items = payload.get("items", [])
+            acked, failed = [], []
+            for doc_id, entry in zip(ids, items):
+                (result,) = entry.values()
+                outcome = _outcome(result)
+                if outcome:
+                    acked.append(doc_id)
+                elif outcome is False:
+                    failed.append(doc_id)
+            failed.extend(ids[len(items):])  # items manquants : non acquittés
+            retry, dead, _ = split_failed(body, items) if payload.get("errors") or len(items) < len(ids) \
+                else (b"", b"", 0)
+        if dead:
+            self._dead_letter("elasticsearch", dead, "refus par document")
+        if spool:
+            self.spool.append("elasticsearch", retry)
+        return acked, failed
+
+    def _send_chunk(self, logs: List[Dict[str, Any]], to_elastic: bool) -> List[Optional[bool]]:
+        """Envoie un lot ; par document : True acquitté, False à réessayer, None mis au rebut."""
+        batch = self._builder(to_elastic)
+        for log in logs:
+            batch.add_document(log)
+        if to_elastic:
+            acked, failed = self.send_bulk(batch, spool=False)
+            acked, failed = set(acked), set(failed)
+            return [True if doc_id in acked else (False if doc_id in failed else None) for doc_id in batch.ids]
+        with batch.view() as body:
+            _, sent, retry = self._post_ndjson("logstash", body)
+        return [True if sent else (False if retry else None)] * len(logs)
+
+    def bulk_send(self, logs: List[Dict[str, Any]], method: str = "logstash") -> int:
+        """
+        Envoi en batch vers Logstash ou Elasticsearch. Taille des lots et nombre
+        de requêtes simultanées suivent le contrôleur AIMD ; les documents rejetés
+        sont renvoyés après une attente exponentielle (BULK_MAX_ATTEMPTS essais),
+        puis mis en file de secours ; les refus définitifs ne sont pas renvoyés.
+        """
+        to_elastic = method != "logstash"
+        sink = "elasticsearch" if to_elastic else "logstash"
+        controller = self.controller
+        pending = deque((log, 1) for log in logs)
+        abandoned: List[Dict[str, Any]] = []
+        success_count = 0
+        with ThreadPoolExecutor(max_workers=controller.max_concurrency, thread_name_prefix="bulk") as pool:
+            inflight = {}
+            while pending or inflight:
+                while pending and len(inflight) < controller.concurrency:
+                    chunk = [pending.popleft() for _ in range(min(controller.batch_size, len(pending)))]
+                    inflight[pool.submit(self._send_chunk, [log for log, _ in chunk], to_elastic)] = chunk
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                retried = False
+                for future in done:
+                    chunk = inflight.pop(future)
+                    for (log, attempt), acked in zip(chunk, future.result()):
+                        if acked:
+                            success_count += 1
+                            if to_elastic:
+                                self._record_subject(log, document_id(dumps(log)[:-1]))
+                        elif acked is None:
+                            continue  # déjà mis au rebut
+                        elif attempt < BULK_MAX_ATTEMPTS and self.breakers[sink].state == CLOSED:
+                            pending.append((log, attempt + 1))
+                            retried = True
+                        else:
+                            abandoned.append(log)
+                if retried:
+                    time.sleep(controller.backoff_delay())
+
+        if abandoned:
+            batch = self._builder(to_elastic)
+            for log in abandoned:
+                batch.add_document(log)
+            self.spool.append(sink, batch.view())
+            logger.warning(f"{len(abandoned)} logs non acquittés mis en file de secours.")
         logger.info(f"Envoi terminé : {success_count}/{len(logs)} logs envoyés avec succès.")
+        return success_count
 
     # ----------------------------------------------------------
     # Vérification de la connexion ELK
@@ -133,14 +534,9 @@ class ElkConnector:
         """
         Vérifie que les services Elasticsearch / Logstash sont accessibles.
         """
-        try:
-            elastic_ok = requests.get(self.elastic_url, timeout=3).status_code == 200
-            logstash_ok = requests.get(self.logstash_url, timeout=3).status_code == 200
-            if elastic_ok or logstash_ok:
-                logger.info("Connexion ELK vérifiée avec succès ✅")
-                return True
-        except requests.RequestException:
-            pass
+        if self._ping_nodes() or self._ping(self.logstash_url):
+            logger.info("Connexion ELK vérifiée avec succès ✅")
+            return True
 
         logger.error("Échec de connexion à la stack ELK ❌")
         return False
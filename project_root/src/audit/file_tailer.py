@@ -0,0 +1,193 @@
+"""
+==============================================================
+ Fichier : file_tailer.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Suivre en continu plusieurs fichiers de logs (rotation
+           et troncature comprises) avec reprise sur offsets.
+==============================================================
+"""
+
+import os
+import glob
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("FileTailer")
+
+CHUNK_SIZE = 1024 * 1024
+MAX_BYTES_PER_POLL = 64 * 1024 * 1024  # rattrapage d’un gros fichier étalé sur plusieurs cycles
+
+
+class _TailedFile:
+    """État d’un fichier suivi : descripteur ouvert, inode et offsets."""
+
+    __slots__ = ("path", "source", "handle", "inode", "committed", "offset")
+
+    def __init__(self, path: str, source: str, handle, inode: Tuple[int, int], offset: int):
+        self.path = path
+        self.source = source
+        self.handle = handle
+        self.inode = inode
+        self.committed = offset  # dernier offset enregistré (lignes expédiées)
+        self.offset = offset     # offset lu, en attente d’acquittement
+
+
+class FileTailer:
+    """
+    Suit les fichiers correspondant à des motifs glob :
+      - lecture par blocs (CHUNK_SIZE), seules les lignes complètes sont rendues
+      - rotation détectée par changement d’inode : l’ancien fichier est vidé
+        via son descripteur encore ouvert, puis le nouveau est lu depuis 0
+      - troncature détectée par une taille inférieure à l’offset
+      - registre JSON des offsets, écrit atomiquement à chaque commit
+    """
+
+    def __init__(self, sources: Dict[str, str], registry_path: str = "data/tailer_registry.json",
+                 chunk_size: int = CHUNK_SIZE, start_at_end: bool = False,
+                 max_bytes_per_poll: int = MAX_BYTES_PER_POLL):
+        """
+        :param sources: motif glob -> nom de la source (ex : "logs/compliance_logs/*.log" -> "compliance")
+        :param registry_path: fichier des offsets par fichier
+        :param start_at_end: pour un fichier jamais vu, ignorer son contenu existant
+        :param max_bytes_per_poll: volume lu au plus par fichier et par cycle
+        """
+        self.sources = sources
+        self.registry_path = registry_path
+        self.chunk_size = chunk_size
+        self.start_at_end = start_at_end
+        self.max_bytes_per_poll = max_bytes_per_poll
+        self.registry = self._load_registry()
+        self.files: Dict[str, _TailedFile] = {}
+        self._dirty = False  # entrées retirées du registre depuis le dernier commit
+
+    # ----------------------------------------------------------
+    # Registre des offsets
+    # ----------------------------------------------------------
+    def _load_registry(self) -> Dict[str, dict]:
+        if not os.path.exists(self.registry_path):
+            return {}
+        with open(self.registry_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def commit(self):
+        """Enregistre les offsets des lignes expédiées (à appeler après un envoi réussi)."""
+        changed = self._dirty
+        for tailed in self.files.values():
+            if tailed.committed != tailed.offset or tailed.path not in self.registry:
+                tailed.committed = tailed.offset
+                self.registry[tailed.path] = {"inode": list(tailed.inode), "offset": tailed.offset}
+                changed = True
+        if not changed:
+            return
+        self._dirty = False
+        if os.path.dirname(self.registry_path):
+            os.makedirs(os.path.dirname(self.registry_path), exist_ok=True)
+        tmp_path = self.registry_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.registry, f)
+        os.replace(tmp_path, self.registry_path)
+
+    def rewind(self):
+        """Revient aux derniers offsets enregistrés (envoi échoué : les lignes seront relues)."""
+        for tailed in self.files.values():
+            tailed.offset = tailed.committed
+
+    # ----------------------------------------------------------
+    # Découverte / rotation
+    # ----------------------------------------------------------
+    def _open(self, path: str, source: str) -> Optional[_TailedFile]:
+        try:
+            handle = open(path, "rb")
+        except OSError as e:
+            logger.warning(f"Impossible d’ouvrir {path} : {e}")
+            return None
+        stat = os.fstat(handle.fileno())
+        inode = (stat.st_dev, stat.st_ino)
+        known = self.registry.get(path)
+        if known and tuple(known["inode"]) == inode and known["offset"] <= stat.st_size:
+            offset = known["offset"]
+        else:
+            offset = stat.st_size if (self.start_at_end and not known) else 0
+        return _TailedFile(path, source, handle, inode, offset)
+
+    def _discover(self):
+        for pattern, source in self.sources.items():
+            for path in glob.glob(pattern):
+                if path not in self.files:
+                    tailed = self._open(path, source)
+                    if tailed is not None:
+                        self.files[path] = tailed
+
+    def _read_lines(self, tailed: _TailedFile, drain: bool = False) -> List[str]:
+        """Lit depuis l’offset par blocs ; le reste d’une ligne incomplète est relu plus tard."""
+        lines: List[str] = []
+        handle = tailed.handle
+        handle.seek(tailed.offset)
+        limit = tailed.offset + self.max_bytes_per_poll
+        pending = b""
+        while drain or handle.tell() < limit:
+            chunk = handle.read(self.chunk_size)
+            if not chunk:
+                break
+            data = pending + chunk
+            end = data.rfind(b"\n")
+            if end < 0:
+                pending = data
+                continue
+            lines.extend(data[:end].decode("utf-8", errors="replace").splitlines())
+            tailed.offset += end + 1
+            pending = data[end + 1:]
+        return lines
+
+    def poll(self) -> List[Tuple[str, str, List[str]]]:
+        """Retourne les nouvelles lignes complètes : [(source, chemin, lignes), ...]."""
+        self._discover()
+        batches = []
+        for path, tailed in list(self.files.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+
+            rotated = stat is not None and (stat.st_dev, stat.st_ino) != tailed.inode
+            if stat is None or rotated:
+                # Fichier renommé ou supprimé : terminer la lecture via le descripteur ouvert
+                lines = self._read_lines(tailed, drain=True)
+                if lines:
+                    batches.append((tailed.source, path, lines))
+                tailed.handle.close()
+                del self.files[path]
+                self.registry.pop(path, None)
+                self._dirty = True
+                if not rotated:
+                    continue
+                logger.info(f"Rotation détectée : {path}")
+                tailed = self._open(path, tailed.source)
+                if tailed is None:
+                    continue
+                tailed.offset = tailed.committed = 0  # nouveau fichier : lu depuis le début
+                self.files[path] = tailed
+            elif stat.st_size < tailed.offset:
+                logger.info(f"Troncature détectée : {path}")
+                tailed.offset = 0
+
+            lines = self._read_lines(tailed)
+            if lines:
+                batches.append((tailed.source, path, lines))
+        return batches
+
+    def close(self):
+        for tailed in self.files.values():
+            tailed.handle.close()
+        self.files.clear()
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    tailer = FileTailer({"logs/compliance_logs/*.log": "compliance"})
+    for source, path, lines in tailer.poll():
+        print(source, path, len(lines))
+    tailer.commit()
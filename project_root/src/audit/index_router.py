@@ -0,0 +1,239 @@
+"""
+==============================================================
+ Fichier : index_router.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Router les écritures vers des index datés, limiter les
+           recherches aux index de leur fenêtre de temps et créer
+           modèles d’index et politiques ILM depuis elk_config.yaml.
+==============================================================
+"""
+
+import re
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+from partitioning import GRANULARITIES, index_name, index_patterns, partition_key
+
+logger = logging.getLogger("IndexRouter")
+
+# Calcul de dates Elasticsearch pris en charge : now, now-1h, now-7d/d...
+DATE_MATH = re.compile(r"now(?:([+-])(\d+)([smhdw]))?(?:/([smhd]))?$")
+DATE_MATH_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+# Clauses conjonctives : une plage de dates y restreint toujours le résultat
+CONJUNCTIVE_KEYS = ("query", "bool", "must", "filter", "constant_score")
+
+
+class IndexRouter:
+    """
+    Index datés `prefix-YYYY.MM.DD` (ou `prefix-YYYY.MM`) :
+      - écriture : index du jour (ou du mois) du timestamp du document
+      - recherche : plage de dates extraite de la requête (clauses must/filter)
+        puis motifs des seuls index qui la recoupent ; sans plage exploitable
+        (should, calcul de dates non pris en charge), tout `prefix-*`
+    Les index non datés antérieurs au partitionnement (`legacy_indices`, ex :
+    `compliance-logs-2025`) sont ajoutés à toute recherche élaguée tant qu’ils
+    n’ont pas été réindexés.
+    """
+
+    def __init__(self, prefix: str = "compliance-logs", granularity: str = "day",
+                 timestamp_fields: Iterable[str] = ("@timestamp", "timestamp"),
+                 clock: Callable[[], datetime] = datetime.utcnow, legacy_indices: Iterable[str] = ()):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularité inconnue : {granularity}")
+        self.prefix = prefix
+        self.granularity = granularity
+        self.timestamp_fields = tuple(dict.fromkeys(timestamp_fields))
+        self.clock = clock
+        self.legacy_indices = list(legacy_indices)
+
+    @classmethod
+    def from_config(cls, elk_config_path: str = "config/elk_config.yaml") -> "IndexRouter":
+        with open(elk_config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        partitioning = config.get("index_partitioning", {})
+        return cls(
+            config.get("elasticsearch", {}).get("index_prefix", "compliance-logs"),
+            partitioning.get("granularity", "day"),
+            (partitioning.get("timestamp_field", "@timestamp"), "timestamp"),
+            legacy_indices=partitioning.get("legacy_indices") or (),
+        )
+
+    @property
+    def all_indices(self) -> str:
+        return f"{self.prefix}-*"
+
+    # ----------------------------------------------------------
+    # Écriture
+    # ----------------------------------------------------------
+    def index_for(self, timestamp: Any) -> str:
+        """Index du timestamp (index courant s’il est absent ou illisible)."""
+        return index_name(self.prefix, timestamp, self.granularity)
+
+    def timestamp_of(self, document: Dict[str, Any]) -> Any:
+        for field in self.timestamp_fields:
+            if field in document:
+                return document[field]
+        return None
+
+    def index_for_document(self, document: Dict[str, Any]) -> str:
+        return self.index_for(self.timestamp_of(document))
+
+    # ----------------------------------------------------------
+    # Recherche
+    # ----------------------------------------------------------
+    def search_indices(self, start: Any, end: Any = None) -> str:
+        """Motifs d’index (séparés par des virgules) recoupant [start, end], index non datés compris."""
+        start_day = self._to_date(start, lower=True)
+        end_day = self._to_date(end, lower=False) if end is not None else self._today() + timedelta(days=1)
+        if start_day is None or end_day is None:
+            return self.all_indices
+        if end_day < start_day:
+            start_day = end_day  # fenêtre vide : un seul index, pas de balayage complet
+        return ",".join(index_patterns(self.prefix, start_day, end_day, self.granularity) + self.legacy_indices)
+
+    def indices_for_query(self, query: Dict[str, Any]) -> str:
+        window = self.time_window(query)
+        return self.search_indices(*window) if window else self.all_indices
+
+    def time_window(self, query: Dict[str, Any]) -> Optional[Tuple[date, date]]:
+        """
+        Fenêtre [début, fin] (jours) des plages de dates des clauses must/filter,
+        intersectées entre elles ; None si aucune plage ne restreint la requête.
+        """
+        starts, ends = [], []
+        for bounds in self._ranges(query):
+            widen = timedelta(days=1 if "time_zone" in bounds else 0)
+            lower = bounds.get("gte", bounds.get("gt"))
+            upper = bounds.get("lte", bounds.get("lt"))
+            start = self._to_date(lower, lower=True) if lower is not None else None
+            end = self._to_date(upper, lower=False) if upper is not None else None
+            if start is not None:
+                starts.append(start - widen)
+            if end is not None:
+                ends.append(end + widen)
+        if not starts:
+            return None
+        return max(starts), min(ends) if ends else self._today() + timedelta(days=1)
+
+    def _ranges(self, node: Any) -> Iterable[Dict[str, Any]]:
+        if isinstance(node, list):
+            for item in node:
+                yield from self._ranges(item)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if key == "range" and isinstance(value, dict):
+                    for field in self.timestamp_fields:
+                        if isinstance(value.get(field), dict):
+                            yield value[field]
+                elif key in CONJUNCTIVE_KEYS:
+                    yield from self._ranges(value)
+
+    def _today(self) -> date:
+        return self.clock().date()
+
+    def _to_date(self, value: Any, lower: bool) -> Optional[date]:
+        """Jour d’une borne ; None si elle n’est pas exploitable sans risque d’exclure des données."""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if not isinstance(value, str) or "||" in value:
+            return None
+        match = DATE_MATH.match(value.strip())
+        if match:
+            sign, amount, unit, _ = match.groups()
+            moment = self.clock()
+            if amount:
+                delta = timedelta(**{DATE_MATH_UNITS[unit]: int(amount)})
+                moment = moment - delta if sign == "-" else moment + delta
+            return moment.date()
+        key = partition_key(value, "day")
+        if key is None:
+            return None
+        day = date.fromisoformat(key)
+        if re.search(r"T[\d:.]+[+-]\d\d", value):  # décalage horaire : le jour UTC peut différer
+            day += timedelta(days=-1 if lower else 1)
+        return day
+
+
+class IndexBootstrapper:
+    """
+    Crée, pour chaque famille de `indices` (elk_config.yaml), une politique ILM
+    et un modèle d’index : shards, réplicas, politique et `mappings` communs.
+    Les index étant datés, la bascule est faite par le routage : `rollover_max_age`
+    fixe le passage en phase warm (index en lecture seule, fusion des segments).
+    La suppression reste à RetentionManager (section `retention`).
+    """
+
+    def __init__(self, elk_config_path: str = "config/elk_config.yaml", connector=None):
+        with open(elk_config_path, "r", encoding="utf-8") as f:
+            self.config = yaml.safe_load(f) or {}
+        self.connector = connector
+
+    def policy(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        phases = {"hot": {"min_age": "0ms", "actions": {"set_priority": {"priority": 100}}}}
+        if settings.get("rollover_max_age"):
+            phases["warm"] = {
+                "min_age": settings["rollover_max_age"],
+                "actions": {
+                    "readonly": {},
+                    "forcemerge": {"max_num_segments": 1},
+                    "set_priority": {"priority": 50},
+                },
+            }
+        return {"policy": {"phases": phases}}
+
+    def template(self, pattern: str, settings: Dict[str, Any], policy_name: str) -> Dict[str, Any]:
+        mappings = dict(self.config.get("mappings") or {})
+        return {
+            "index_patterns": [pattern],
+            "priority": 100,
+            "template": {
+                "settings": {
+                    "number_of_shards": settings.get("shards", 1),
+                    "number_of_replicas": settings.get("replicas", 1),
+                    "index.lifecycle.name": policy_name,
+                },
+                "mappings": mappings,
+            },
+        }
+
+    def definitions(self) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """(nom, politique ILM, modèle d’index) de chaque famille d’index."""
+        definitions = []
+        for settings in (self.config.get("indices") or {}).values():
+            pattern = settings["name"]
+            name = pattern.rstrip("*").rstrip("-.")
+            policy_name = f"{name}-policy"
+            definitions.append((name, self.policy(settings), self.template(pattern, settings, policy_name)))
+        return definitions
+
+    def apply(self) -> List[str]:
+        """Crée ou met à jour politiques ILM et modèles (PUT idempotents). Retourne les familles traitées."""
+        if self.connector is None:
+            from elk_connector import ElkConnector
+            self.connector = ElkConnector()
+        applied = []
+        for name, policy, template in self.definitions():
+            base_url = self.connector.elastic_url
+            self.connector.session.put(f"{base_url}/_ilm/policy/{name}-policy", json=policy, timeout=30).raise_for_status()
+            self.connector.session.put(f"{base_url}/_index_template/{name}", json=template, timeout=30).raise_for_status()
+            logger.info(f"Modèle d’index et politique ILM appliqués : {name}")
+            applied.append(name)
+        return applied
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    router = IndexRouter.from_config()
+    print(router.index_for_document({"@timestamp": "2025-10-14T08:00:00Z"}))
+    print(router.search_indices("2025-01-01", "2025-03-31"))
+    if "--bootstrap" in sys.argv:
+        IndexBootstrapper().apply()
@@ -0,0 +1,258 @@
+"""
+==============================================================
+ Fichier : ingest_pipeline.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Chaîne d’ingestion par étapes reliées par des files
+           bornées (analyse, filtrage, masquage PII, envoi).
+==============================================================
+"""
+
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from log_line_parser import LogLineParser, INDEXED_FIELDS, KEYWORD_FIELDS
+from log_formatter import LogFormatter, DEFAULT_SAFE_KEYS
+
+logger = logging.getLogger("IngestPipeline")
+
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+# En dessous de ce nombre d’éléments, une étape CPU s’exécute sur place :
+# l’aller-retour vers un processus coûterait plus que le traitement lui-même
+INLINE_BELOW = int(os.getenv("INGEST_INLINE_BELOW", "2000"))
+# Le collecteur est multithreadé : un fork hériterait de verrous tenus par
+# d’autres threads (logging, files). Processus démarrés par forkserver, ou spawn.
+START_METHOD = os.getenv(
+    "INGEST_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+# Identifiants et champs indexés : jamais masqués (user_id=100234567 ressemble à un téléphone)
+MASK_SAFE_KEYS = DEFAULT_SAFE_KEYS | KEYWORD_FIELDS | frozenset(INDEXED_FIELDS)
+
+_STOP = object()
+
+# Un lot circule d’étape en étape sous la forme (source, chemin, éléments)
+Batch = Tuple[str, str, List[Any]]
+
+
+class Stage:
+    """Étape de la chaîne : fonction lot -> lot, exécutée en thread ou en processus."""
+
+    __slots__ = ("name", "func", "kind", "workers", "queue", "processed")
+
+    def __init__(self, name: str, func: Callable[[Batch], Batch], kind: str = "thread", workers: int = 1):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Type d’étape inconnu : {kind}")
+        self.name = name
+        self.func = func  # étape "process" : fonction de module (sérialisable)
+        self.kind = kind
+        self.workers = workers
+        self.queue: Optional[queue.Queue] = None
+        self.processed = 0
+
+
+class IngestPipeline:
+    """
+    Étapes reliées par des files bornées :
+      - une file pleine bloque l’étape précédente, jusqu’à `submit` (contre-pression)
+      - étapes "process" : lots répartis sur un pool de processus partagé, résultats
+        remis dans l’ordre d’arrivée ; petits lots traités sur place (faible latence)
+      - étapes "thread" : E/S (filtrage, envoi réseau)
+      - `stats()` expose la profondeur de chaque file
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = QUEUE_SIZE,
+                 process_workers: int = WORKERS, inline_below: int = INLINE_BELOW):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.process_workers = process_workers
+        self.inline_below = inline_below
+        self.errors = 0
+        self._pending = 0
+        self._done = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        for stage in self.stages:
+            stage.queue = queue.Queue(maxsize=queue_size)
+
+    # ----------------------------------------------------------
+    # Cycle de vie
+    # ----------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        if any(stage.kind == "process" for stage in self.stages):
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context(START_METHOD)
+            )
+        for index, stage in enumerate(self.stages):
+            if stage.kind == "process":
+                targets = [self._dispatch]
+            else:
+                targets = [self._work] * stage.workers
+            for target in targets:
+                thread = threading.Thread(target=target, args=(index,), name=f"ingest-{stage.name}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Chaîne d’ingestion démarrée : {' -> '.join(s.name for s in self.stages)}")
+
+    def close(self):
+        """Attend la fin des lots en cours puis arrête threads et processus."""
+        if not self.running:
+            return
+        self.join()
+        for stage in self.stages:
+            for _ in range(1 if stage.kind == "process" else stage.workers):
+                stage.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    # ----------------------------------------------------------
+    # Entrée / suivi
+    # ----------------------------------------------------------
+    def submit(self, batch: Batch, timeout: Optional[float] = None):
+        """Injecte un lot ; bloque tant que la première file est pleine."""
+        with self._done:
+            self._pending += 1
+        try:
+            self.stages[0].queue.put(batch, timeout=timeout)
+        except queue.Full:
+            self._finish(failed=False)
+            raise
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Attend que tous les lots soumis aient traversé la chaîne."""
+        with self._done:
+            return self._done.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            stage.name: {"depth": stage.queue.qsize(), "capacity": self.queue_size, "processed": stage.processed}
+            for stage in self.stages
+        }
+
+    # ----------------------------------------------------------
+    # Exécution des étapes
+    # ----------------------------------------------------------
+    def _finish(self, failed: bool):
+        with self._done:
+            self._pending -= 1
+            if failed:
+                self.errors += 1
+            if self._pending == 0:
+                self._done.notify_all()
+
+    def _emit(self, index: int, batch: Batch):
+        self.stages[index].processed += 1
+        if index + 1 < len(self.stages):
+            self.stages[index + 1].queue.put(batch)  # bloque si l’étape suivante est saturée
+        else:
+            self._finish(failed=False)
+
+    def _fail(self, index: int, error: Exception):
+        logger.error(f"Étape {self.stages[index].name} en échec, lot abandonné : {error}")
+        self._finish(failed=True)
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        while True:
+            batch = stage.queue.get()
+            if batch is _STOP:
+                return
+            try:
+                result = stage.func(batch)
+            except Exception as e:
+                self._fail(index, e)
+            else:
+                self._emit(index, result)
+
+    def _dispatch(self, index: int):
+        """Répartit les lots d’une étape CPU sur le pool, au plus 2 lots en vol par processus."""
+        stage = self.stages[index]
+        inflight = deque()
+        limit = 2 * self.process_workers
+        while True:
+            if inflight and (len(inflight) >= limit or stage.queue.empty()):
+                self._collect(index, inflight.popleft())
+                continue
+            batch = stage.queue.get()
+            if batch is _STOP:
+                while inflight:
+                    self._collect(index, inflight.popleft())
+                return
+            if not inflight and len(batch[-1]) < self.inline_below:
+                try:
+                    result = stage.func(batch)
+                except Exception as e:
+                    self._fail(index, e)
+                else:
+                    self._emit(index, result)
+                continue
+            inflight.append(self._pool.submit(stage.func, batch))
+
+    def _collect(self, index: int, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            self._fail(index, e)
+        else:
+            self._emit(index, result)
+
+
+# ==========================================================
+# Étapes CPU standard (une instance par processus du pool)
+# ==========================================================
+_parser: Optional[LogLineParser] = None
+_formatter: Optional[LogFormatter] = None
+
+
+def parse_stage(batch: Batch) -> Batch:
+    """Lignes brutes -> événements structurés."""
+    global _parser
+    if _parser is None:
+        _parser = LogLineParser()
+    source, path, lines = batch
+    events = _parser.parse_lines(lines)
+    for event in events:
+        event["log_file"] = path
+    return source, path, events
+
+
+def mask_stage(batch: Batch) -> Batch:
+    """Masquage des PII et normalisation des timestamps (LogFormatter)."""
+    global _formatter
+    if _formatter is None:
+        _formatter = LogFormatter(safe_keys=MASK_SAFE_KEYS)
+    source, path, events = batch
+    return source, path, _formatter.mask_batch(events)
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    pipeline = IngestPipeline([
+        Stage("parse", parse_stage, kind="process"),
+        Stage("mask", mask_stage, kind="process"),
+        Stage("print", lambda batch: print(batch[2]) or batch),
+    ])
+    pipeline.start()
+    pipeline.submit(("compliance", "demo.log", [
+        "2025-10-14 08:20:05 ALERT AML threshold exceeded: user_id=107, email=mark.taylor@example.com",
+    ]))
+    pipeline.close()
@@ -12,12 +12,19 @@ import json
 import time
 import socket
 import logging
-from datetime import datetime
 from typing import Dict, Any, List
 from logging.handlers import RotatingFileHandler
 
 import requests  # Pour envoyer vers Logstash
 from dotenv import load_dotenv
+from tombstone_filter import TombstoneFilter
+from crypto_shredding import CryptoShredder
+from ndjson_builder import NDJSONBuilder, ENVELOPE_FIELDS
+from timestamp_normalizer import TimestampNormalizer
+from file_tailer import FileTailer
+from log_line_parser import INDEXED_FIELDS
+from rate_limiter import RateLimiter
+from ingest_pipeline import IngestPipeline, Stage, parse_stage, mask_stage
 
 # Chargement des variables d'environnement
 load_dotenv()
@@ -26,15 +33,33 @@ load_dotenv()
 # Configuration générale
 # ==========================================================
 LOG_FILE = os.getenv("LOG_FILE", "logs/system_events.log")
+# Journal propre au collecteur : hors des fichiers suivis, sinon ses propres
+# avertissements seraient relus et renvoyés (boucle de rétroaction)
+COLLECTOR_LOG_FILE = os.getenv("COLLECTOR_LOG_FILE", "logs/log_collector.log")
 LOGSTASH_URL = os.getenv("LOGSTASH_URL", "http://localhost:5044")
 SERVICE_NAME = os.getenv("SERVICE_NAME", "compliance_audit_system")
+GDPR_CONFIG_PATH = os.getenv("GDPR_CONFIG_PATH", "config/gdpr_config.yaml")
+FLUSH_BYTES = int(os.getenv("COLLECTOR_FLUSH_BYTES", str(5 * 1024 * 1024)))
+TAILER_REGISTRY = os.getenv("TAILER_REGISTRY", "data/tailer_registry.json")
+POLL_INTERVAL = float(os.getenv("COLLECTOR_POLL_INTERVAL", "0.5"))
+LOGGING_CONFIG = os.getenv("LOGGING_CONFIG", "config/logging.yaml")
+COMPLIANCE_RULES = os.getenv("COMPLIANCE_RULES", "config/compliance_rules.yaml")
+BATCH_LINES = int(os.getenv("COLLECTOR_BATCH_LINES", "5000"))
+
+# Fichiers suivis : motif glob -> source
+TAIL_SOURCES = {
+    "logs/access_logs/access_*.log": "access",
+    "logs/compliance_logs/*.log": "compliance",
+    LOG_FILE: "system",
+}
 
 # ==========================================================
 # Initialisation du logger local
 # ==========================================================
 logger = logging.getLogger("LogCollector")
 logger.setLevel(logging.INFO)
-handler = RotatingFileHandler(LOG_FILE, maxBytes=5_000_000, backupCount=5)
+logger.propagate = False  # le handler racine (logging.yaml) écrit dans LOG_FILE
+handler = RotatingFileHandler(COLLECTOR_LOG_FILE, maxBytes=5_000_000, backupCount=5, delay=True)
 formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
 handler.setFormatter(formatter)
 logger.addHandler(handler)
@@ -53,87 +78,162 @@ class LogCollector:
         self.service = SERVICE_NAME
         self.logstash_url = LOGSTASH_URL
         self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.headers.update({"Content-Type": "application/x-ndjson"})
+        self.timestamps = TimestampNormalizer()
+        # Lot NDJSON courant : host / service encodés une seule fois ; `event_id`
+        # déterministe pour que Logstash indexe en create sans doublon au renvoi
+        self.batch = NDJSONBuilder(self.hostname, self.service, top_level_fields=INDEXED_FIELDS, embed_id=True)
+        # Personnes effacées : leurs nouveaux événements ne doivent pas atteindre ELK.
+        # Même configuration que GDPRVerification, qui publie les tombstones
+        self.tombstones = TombstoneFilter.from_config(GDPR_CONFIG_PATH)
+        # Crypto-shredding (si activé) : champs personnels chiffrés avec la clé de
+        # chaque personne avant envoi, illisibles une fois la clé détruite
+        self.shredder = CryptoShredder.from_config(GDPR_CONFIG_PATH)
+        # Sources bruyantes bornées ; événements de conformité toujours transmis
+        try:
+            self.limiter = RateLimiter.from_config(LOGGING_CONFIG, COMPLIANCE_RULES)
+        except FileNotFoundError as e:
+            logger.warning(f"Configuration de limitation absente, débit non limité : {e}")
+            self.limiter = RateLimiter()
+        self.tailer = FileTailer(TAIL_SOURCES, registry_path=TAILER_REGISTRY)
+        self._send_failed = False
+        # Chaîne d’ingestion des fichiers : analyse et masquage sur tous les cœurs,
+        # filtrage et envoi en threads ; démarrée au premier cycle
+        self.file_batch = NDJSONBuilder(self.hostname, self.service, top_level_fields=INDEXED_FIELDS, embed_id=True)
+        self.pipeline = IngestPipeline([
+            Stage("parse", parse_stage, kind="process"),
+            Stage("tombstones", self._filter_stage),
+            Stage("mask", mask_stage, kind="process"),
+            Stage("ship", self._ship_stage),
+        ])
 
     # ----------------------------------------------------------
     # Collecte des logs depuis API
     # ----------------------------------------------------------
     def collect_api_logs(self, api_logs: List[Dict[str, Any]]):
+        self.tombstones.maybe_reload()
+        kept = []
         for log in api_logs:
-            enriched_log = self._enrich_log(log, source="api")
-            self._send_to_logstash(enriched_log)
+            log = self.tombstones.apply(log)
+            if log is not None:
+                log = self.limiter.allow(log, "api")
+            if log is not None:
+                kept.append(log)
+        for log in self._encrypt(kept):
+            self._add(log, source="api")
+        self._flush()
 
     # ----------------------------------------------------------
     # Collecte des logs depuis la base de données
     # ----------------------------------------------------------
     def collect_db_logs(self, db_records: List[Dict[str, Any]]):
+        self.tombstones.maybe_reload()
+        kept = []
         for record in db_records:
-            enriched_log = self._enrich_log(record, source="database")
-            self._send_to_logstash(enriched_log)
+            record = self.tombstones.apply(record)
+            if record is not None:
+                record = self.limiter.allow(record, "database")
+            if record is not None:
+                kept.append(record)
+        for record in self._encrypt(kept):
+            self._add(record, source="database")
+        self._flush()
 
     # ----------------------------------------------------------
     # Collecte des logs systèmes (fichiers, événements OS)
     # ----------------------------------------------------------
     def collect_system_logs(self, system_events: List[str]):
-        for event in system_events:
-            enriched_log = self._enrich_log({"event": event}, source="system")
-            self._send_to_logstash(enriched_log)
+        for event in self.limiter.apply(({"event": event} for event in system_events), "system"):
+            self._add(event, source="system")
+        self._flush()
+
+    # ----------------------------------------------------------
+    # Étapes E/S de la chaîne d’ingestion des fichiers
+    # ----------------------------------------------------------
+    def _filter_stage(self, batch):
+        source, path, events = batch
+        self.tombstones.maybe_reload()
+        apply = self.tombstones.apply
+        return source, path, self.limiter.apply((log for log in map(apply, events) if log is not None), source)
+
+    def _ship_stage(self, batch):
+        """Sérialise le lot ; l’envoi regroupe les lots tant que d’autres attendent (rattrapage)."""
+        source, _, events = batch
+        builder = self.file_batch
+        for log in self._encrypt(events):
+            builder.add(log, source, log["timestamp"])
+        if len(builder) >= FLUSH_BYTES or self.pipeline.stages[-1].queue.empty():
+            self._flush(builder)
+        return batch
 
     # ----------------------------------------------------------
     # Enrichissement du log avant envoi
     # ----------------------------------------------------------
     def _enrich_log(self, log: Dict[str, Any], source: str) -> Dict[str, Any]:
         enriched = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self.timestamps.normalize(log.get("timestamp")),
             "source": source,
             "host": self.hostname,
             "service": self.service,
             "severity": log.get("level", "INFO"),
             "message": log.get("message", ""),
-            "context": log,
+            "context": {k: v for k, v in log.items() if k not in ENVELOPE_FIELDS},
         }
-        logger.debug(f"Log enrichi : {json.dumps(enriched, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Log enrichi : {json.dumps(enriched, indent=2, default=str)}")
         return enriched
 
+    def _encrypt(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Chiffre par lot les champs personnels (une seule lecture du trousseau par lot)."""
+        if self.shredder is not None and logs:
+            self.shredder.encrypt_records(logs)
+        return logs
+
+    def _add(self, log: Dict[str, Any], source: str):
+        """Sérialise l’événement enrichi directement dans le lot NDJSON."""
+        self.batch.add(log, source, self.timestamps.normalize(log.get("timestamp")))
+        if len(self.batch) >= FLUSH_BYTES:
+            self._flush()
+
     # ----------------------------------------------------------
-    # Envoi du log au pipeline ELK
+    # Envoi du lot au pipeline ELK
     # ----------------------------------------------------------
-    def _send_to_logstash(self, enriched_log: Dict[str, Any]):
+    def _flush(self, batch: NDJSONBuilder = None):
+        """Envoie le lot NDJSON à Logstash (tampon transmis sans copie) puis le réutilise."""
+        batch = batch or self.batch
+        if not batch.count:
+            return
         try:
-            response = self.session.post(self.logstash_url, json=enriched_log, timeout=5)
+            with batch.view() as body:
+                response = self.session.post(self.logstash_url, data=body, timeout=5)
             if response.status_code != 200:
-                logger.warning(f"Échec d’envoi du log à Logstash : {response.text}")
+                self._send_failed = True
+                logger.warning(f"Échec d’envoi de {batch.count} logs à Logstash : {response.text}")
         except Exception as e:
+            self._send_failed = True
             logger.error(f"Erreur de communication avec Logstash : {e}")
+        batch.reset()
 
     # ----------------------------------------------------------
-    # Exemple d’exécution complète
+    # Cycle de collecte : nouvelles lignes des fichiers suivis
     # ----------------------------------------------------------
     def run(self):
-        logger.info("Démarrage de la collecte des logs...")
-
-        # Exemple de logs simulés
-        api_logs = [
-            {"endpoint": "/api/v1/login", "user": "john.doe", "status": 200},
-            {"endpoint": "/api/v1/payment", "user": "jane.smith", "status": 500},
-        ]
-
-        db_logs = [
-            {"query": "SELECT * FROM users", "duration_ms": 12},
-            {"query": "UPDATE transactions SET status='OK'", "duration_ms": 55},
-        ]
-
-        system_events = [
-            "Service démarré",
-            "Connexion à Elasticsearch réussie",
-        ]
-
-        # Collecte des logs
-        self.collect_api_logs(api_logs)
-        self.collect_db_logs(db_logs)
-        self.collect_system_logs(system_events)
-
-        logger.info("Fin de la collecte des logs.")
+        """
+        Expédie les lignes apparues depuis le dernier cycle. Les offsets ne sont
+        enregistrés qu’après un envoi réussi ; en cas d’échec les lignes sont relues
+        au cycle suivant (ni perte ni doublon au redémarrage).
+        """
+        self.pipeline.start()
+        self._send_failed = False
+        errors = self.pipeline.errors
+        for source, path, lines in self.tailer.poll():
+            for start in range(0, len(lines), BATCH_LINES):
+                self.pipeline.submit((source, path, lines[start:start + BATCH_LINES]))
+        self.pipeline.join()
+        if self._send_failed or self.pipeline.errors != errors:
+            self.tailer.rewind()
+        else:
+            self.tailer.commit()
 
 
 # ==========================================================
@@ -141,6 +241,11 @@ class LogCollector:
 # ==========================================================
 if __name__ == "__main__":
     collector = LogCollector()
-    while True:
-        collector.run()
-        time.sleep(60)  # Collecte toutes les 60 secondes
+    logger.info("Démarrage du suivi des fichiers de logs...")
+    try:
+        while True:
+            collector.run()
+            time.sleep(POLL_INTERVAL)  # nouvelles lignes visibles dans ELK en moins d’une seconde
+    finally:
+        collector.pipeline.close()
+        collector.tailer.close()
@@ -8,10 +8,22 @@
 """
 
 import re
-import json
 import hashlib
-from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional
+
+from timestamp_normalizer import TimestampNormalizer
+from ndjson_builder import dumps
+
+SHORT_TEXT_LENGTH = 64
+MAX_DEPTH = 32
+DEPTH_LIMIT_MARKER = "<MAX_DEPTH_EXCEEDED>"
+
+# Champs connus pour ne jamais contenir de PII (identifiants numériques, durées, statuts)
+DEFAULT_SAFE_KEYS = frozenset({
+    "timestamp", "@timestamp", "level", "severity", "status", "status_code",
+    "duration_ms", "latency_ms", "request_id", "event_id", "trace_id", "span_id",
+})
 
 
 class LogFormatter:
@@ -27,8 +39,29 @@ class LogFormatter:
     PHONE_PATTERN = re.compile(r"\b(\+?\d{2,3}[-.\s]??\d{6,12})\b")
     IBAN_PATTERN = re.compile(r"\b[A-Z]{2}[0-9]{2}[A-Z0-9]{11,30}\b")
 
-    def __init__(self, hash_salt: str = "secure_salt_2025"):
+    # Les trois motifs en une seule alternance (un seul parcours du texte) ;
+    # le groupe nommé ayant correspondu est disponible via match.lastgroup.
+    PII_PATTERN = re.compile(
+        r"(?P<email>[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)"
+        r"|(?P<phone>\b\+?\d{2,3}[-.\s]??\d{6,12}\b)"
+        r"|(?P<iban>\b[A-Z]{2}[0-9]{2}[A-Z0-9]{11,30}\b)"
+    )
+    # Préfiltre : sans '@', sans 6 chiffres consécutifs (téléphone) et sans
+    # 2 majuscules suivies de 2 chiffres (IBAN), aucun motif ne peut correspondre
+    PII_PREFILTER = re.compile(r"\d{6}|[A-Z]{2}\d\d")
+
+    def __init__(self, hash_salt: str = "secure_salt_2025", hash_cache_size: int = 65536,
+                 safe_keys: Iterable[str] = DEFAULT_SAFE_KEYS, max_depth: int = MAX_DEPTH,
+                 source_tz: Optional[str] = "UTC"):
         self.hash_salt = hash_salt
+        self.timestamps = TimestampNormalizer(source_tz)
+        self.safe_keys = frozenset(safe_keys)
+        self.max_depth = max_depth
+        # Les mêmes emails / numéros reviennent sans cesse dans les logs
+        self._cached_hash = lru_cache(maxsize=hash_cache_size)(self._hash_value)
+        self._replace_pii = lambda match: self._cached_hash(match.group())
+        # Valeurs courtes répétitives (statuts, endpoints, services) : résultat mémorisé
+        self._cached_text = lru_cache(maxsize=hash_cache_size)(self._scan_pii_text)
 
     # ----------------------------------------------------------
     # Normalisation complète du log
@@ -46,6 +79,30 @@ class LogFormatter:
         }
         return normalized_log
 
+    def normalize_batch(self, logs: List[Dict[str, Any]], source: str) -> List[Dict[str, Any]]:
+        """
+        Normalise un lot de logs d’une même source.
+        """
+        normalize = self.normalize
+        return [normalize(log, source) for log in logs]
+
+    def mask_event(self, log: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Variante à plat de normalize pour l’ingestion : mêmes champs que l’entrée,
+        PII masquées, message nettoyé et timestamp normalisé.
+        """
+        masked = self._mask_pii_fields(log)
+        if masked is log:
+            masked = dict(log)
+        masked["timestamp"] = self._normalize_timestamp(log.get("timestamp"))
+        if "message" in masked:
+            masked["message"] = self._sanitize_message(masked["message"])
+        return masked
+
+    def mask_batch(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        mask_event = self.mask_event
+        return [mask_event(log) for log in logs]
+
     # ----------------------------------------------------------
     # Nettoyage du message
     # ----------------------------------------------------------
@@ -61,31 +118,62 @@ class LogFormatter:
     # ----------------------------------------------------------
     def _mask_pii_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Recherche et masque les PII dans les champs textuels.
+        Recherche et masque les PII dans les champs textuels, y compris dans les
+        dictionnaires, listes et tuples imbriqués (parcours itératif).
+        Copie à l’écriture : un conteneur n’est copié que si l’un de ses éléments
+        change, les sous-arbres intacts sont partagés avec l’entrée.
+        Au-delà de max_depth niveaux, le contenu est remplacé par un marqueur.
         """
-        masked_data = {}
-        for key, value in data.items():
-            if isinstance(value, str):
-                value = self._mask_pii_text(value)
-            elif isinstance(value, dict):
-                value = self._mask_pii_fields(value)
-            masked_data[key] = value
-        return masked_data
+        safe_keys = self.safe_keys
+        mask_text = self._mask_pii_text
+        # Trame : [conteneur, itérateur (clé, valeur), copie ou None, clé dans le parent]
+        stack = [[data, _items(data), None, None]]
+        while True:
+            frame = stack[-1]
+            for key, value in frame[1]:
+                if key in safe_keys:
+                    continue
+                cls = value.__class__
+                if cls is str:
+                    masked = mask_text(value)
+                    if masked is value or masked == value:
+                        continue
+                elif cls is dict or cls is list or cls is tuple:
+                    if len(stack) < self.max_depth:
+                        stack.append([value, _items(value), None, key])
+                        break
+                    masked = DEPTH_LIMIT_MARKER
+                else:
+                    continue
+                if frame[2] is None:
+                    frame[2] = _copy(frame[0])
+                frame[2][key] = masked
+            else:
+                # Conteneur entièrement parcouru : remonter le résultat au parent
+                stack.pop()
+                node, copy = frame[0], frame[2]
+                result = node if copy is None else (tuple(copy) if node.__class__ is tuple else copy)
+                if not stack:
+                    return result
+                if result is not node:
+                    parent = stack[-1]
+                    if parent[2] is None:
+                        parent[2] = _copy(parent[0])
+                    parent[2][frame[3]] = result
 
     def _mask_pii_text(self, text: str) -> str:
         """
-        Applique un masquage ou un hachage sur les informations sensibles.
+        Applique un hachage sur les informations sensibles (emails, téléphones, IBAN)
+        en un seul parcours ; la plupart des champs sont écartés par le préfiltre.
         """
-        # Masquage des adresses e-mail
-        text = self.EMAIL_PATTERN.sub(lambda m: self._hash_value(m.group(1)), text)
+        if len(text) <= SHORT_TEXT_LENGTH:
+            return self._cached_text(text)
+        return self._scan_pii_text(text)
 
-        # Masquage des numéros de téléphone
-        text = self.PHONE_PATTERN.sub(lambda m: self._hash_value(m.group(1)), text)
-
-        # Masquage des IBAN / numéros de compte
-        text = self.IBAN_PATTERN.sub(lambda m: self._hash_value(m.group(0)), text)
-
-        return text
+    def _scan_pii_text(self, text: str) -> str:
+        if "@" not in text and self.PII_PREFILTER.search(text) is None:
+            return text
+        return self.PII_PATTERN.sub(self._replace_pii, text)
 
     def _hash_value(self, value: str) -> str:
         """
@@ -100,16 +188,9 @@ class LogFormatter:
     # ----------------------------------------------------------
     def _normalize_timestamp(self, timestamp: Any) -> str:
         """
-        Convertit ou génère un timestamp ISO 8601 standardisé.
+        Convertit ou génère un timestamp ISO 8601 standardisé (UTC).
         """
-        if isinstance(timestamp, datetime):
-            return timestamp.isoformat()
-        elif isinstance(timestamp, str):
-            try:
-                return datetime.fromisoformat(timestamp).isoformat()
-            except ValueError:
-                pass
-        return datetime.utcnow().isoformat()
+        return self.timestamps.normalize(timestamp)
 
     # ----------------------------------------------------------
     # Formatage JSON final
@@ -118,7 +199,21 @@ class LogFormatter:
         """
         Convertit le log normalisé en JSON propre pour Logstash.
         """
-        return json.dumps(normalized_log, ensure_ascii=False)
+        return dumps(normalized_log).decode("utf-8")
+
+    def to_ndjson(self, normalized_log: Dict[str, Any]) -> bytes:
+        """
+        Ligne NDJSON encodée, à ajouter directement à un lot (NDJSONBuilder).
+        """
+        return dumps(normalized_log) + b"\n"
+
+
+def _items(container):
+    return iter(container.items()) if container.__class__ is dict else enumerate(container)
+
+
+def _copy(container):
+    return dict(container) if container.__class__ is dict else list(container)
 
 
 # ==========================================================
@@ -0,0 +1,132 @@
+"""
+==============================================================
+ Fichier : log_line_parser.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Découper les lignes des journaux texte (accès, AML,
+           KYC, RGPD) en événements structurés et typés.
+==============================================================
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+# Niveaux de sévérité reconnus ; les autres mots en tête de message n’en sont pas
+LEVELS = ("DEBUG", "INFO", "WARNING", "WARN", "ERROR", "CRITICAL", "ALERT")
+# Catégories de conformité, en tête de message (`ALERT AML …`) ou seules (`GDPR deletion …`)
+CATEGORIES = ("AML", "KYC", "GDPR")
+DEFAULT_LEVEL = "INFO"
+
+# `2025-10-14 08:20:05 ALERT AML threshold exceeded: user_id=107, amount=15000`
+# `2025-10-14 08:35:12 GDPR deletion requested: user_id=103` (catégorie sans niveau)
+LINE_PATTERN = re.compile(
+    r"^(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d+)?) +"
+    rf"(?:({'|'.join(LEVELS)}) +)?"
+    rf"((?:({'|'.join(CATEGORIES)}) +)?[^:\n]*)(?:: *([^\n]*))?$",
+    re.MULTILINE,
+)
+# Séparateur des paires : virgule ou espaces suivis d’une nouvelle clé
+# (`fields_masked=email,phone` reste entier, `user_id=1 transaction_id=TX1` donne deux paires)
+KV_SPLIT = re.compile(r"(?:, *| +)(?=\w+=)")
+NUMBER_PATTERN = re.compile(r"-?\d+(\.\d+)?")
+
+# Identifiants : conservés en chaînes (champs keyword dans Elasticsearch)
+KEYWORD_FIELDS = frozenset({"user_id", "client_id", "transaction_id", "username", "ip"})
+# Champs remontés au premier niveau du document (mappings de elk_config.yaml)
+INDEXED_FIELDS = ("user_id", "transaction_id", "amount")
+
+
+def _convert(value: str) -> Any:
+    """Type une valeur brute : nombre, liste `['a','b']`, chaîne entre quotes ou texte."""
+    if not value:
+        return value
+    first = value[0]
+    if first == "[" and value[-1] == "]":
+        inner = value[1:-1].strip()
+        return [item.strip().strip("'\"") for item in inner.split(",")] if inner else []
+    if first in "'\"" and len(value) > 1 and value[-1] == first:
+        return value[1:-1]
+    match = NUMBER_PATTERN.fullmatch(value)
+    if match is not None:
+        return float(value) if match.group(1) else int(value)
+    return value
+
+
+class LogLineParser:
+    """
+    Analyse par lots :
+      - une seule passe regex (MULTILINE) sur le texte complet d’un bloc
+      - niveau (DEBUG … ALERT) et catégorie de conformité (AML, KYC, GDPR) distincts
+      - paires key=value typées ; conversion des valeurs mise en cache
+        (pays, statuts, montants récurrents ne sont convertis qu’une fois)
+      - les lignes non reconnues sont conservées telles quelles dans `message`
+    """
+
+    def __init__(self, cache_size: int = 65536):
+        self._convert = lru_cache(maxsize=cache_size)(_convert)
+
+    def _fields(self, text: str) -> Dict[str, Any]:
+        fields: Dict[str, Any] = {}
+        convert = self._convert
+        for part in KV_SPLIT.split(text):
+            key, sep, value = part.partition("=")
+            if not sep:
+                continue
+            key = key.strip()
+            value = value.strip()
+            fields[key] = value if key in KEYWORD_FIELDS else convert(value)
+        return fields
+
+    def _event(self, match: "re.Match") -> Dict[str, Any]:
+        timestamp, level, message, category, rest = match.groups()
+        event = {"timestamp": timestamp, "level": level or DEFAULT_LEVEL}
+        if category is not None:
+            event["category"] = category
+        if rest and "=" in rest:
+            event["message"] = message.strip()
+            event.update(self._fields(rest))
+        else:
+            event["message"] = f"{message.strip()}: {rest}" if rest else message.strip()
+        return event
+
+    def parse_line(self, line: str) -> Dict[str, Any]:
+        match = LINE_PATTERN.match(line)
+        return self._event(match) if match is not None else {"message": line}
+
+    def parse_text(self, text: str) -> List[Dict[str, Any]]:
+        """Analyse un bloc de lignes ; l’ordre des lignes est conservé."""
+        events: List[Dict[str, Any]] = []
+        position = 0
+        for match in LINE_PATTERN.finditer(text):
+            start = match.start()
+            if start > position:
+                # Lignes intercalées non reconnues
+                events.extend({"message": line} for line in text[position:start].splitlines() if line)
+            events.append(self._event(match))
+            position = match.end() + 1
+        if position < len(text):
+            events.extend({"message": line} for line in text[position:].splitlines() if line)
+        return events
+
+    def parse_lines(self, lines: Iterable[str]) -> List[Dict[str, Any]]:
+        return self.parse_text("\n".join(lines))
+
+    def parse_buffer(self, data: bytes, encoding: str = "utf-8") -> List[Dict[str, Any]]:
+        """Analyse un tampon d’octets (bloc lu sur disque) décodé en une seule fois."""
+        return self.parse_text(bytes(data).decode(encoding, errors="replace"))
+
+    def cache_info(self) -> Optional[Any]:
+        return self._convert.cache_info()
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    parser = LogLineParser()
+    sample = (
+        b"2025-10-14 08:20:05 ALERT AML threshold exceeded: user_id=107, amount=15000, country=US\n"
+        b"2025-10-14 11:05:20 ERROR KYC incomplete documents: user_id=111, missing=['utility_bill','id_card']\n"
+    )
+    for event in parser.parse_buffer(sample):
+        print(event)
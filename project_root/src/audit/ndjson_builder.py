@@ -0,0 +1,182 @@
+"""
+==============================================================
+ Fichier : ndjson_builder.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Sérialiser les événements en NDJSON directement dans
+           un tampon réutilisable, prêt pour l’envoi par lot ELK.
+==============================================================
+"""
+
+import json
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str)
+except ImportError:  # repli sur la bibliothèque standard
+    orjson = None
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+ID_LENGTH = 32  # 128 bits d’empreinte : collisions négligeables
+
+# Champs de l’enveloppe, retirés du contexte pour ne pas dupliquer le message
+ENVELOPE_FIELDS = frozenset({"timestamp", "level", "message"})
+
+
+def document_id(encoded: bytes) -> str:
+    """
+    Identifiant déterministe d’un document : empreinte SHA-256 de son contenu
+    sérialisé (source, timestamp, message, contexte...). Un même événement renvoyé
+    (retry, rejeu du spool) garde le même `_id` et n’est pas dupliqué.
+    """
+    return hashlib.sha256(encoded).hexdigest()[:ID_LENGTH]
+
+
+class NDJSONBuilder:
+    """
+    Construit un lot NDJSON dans un bytearray unique :
+      - host / service (et chaque source rencontrée) encodés une seule fois
+      - encodeur orjson lorsqu’il est disponible
+      - ligne d’action `_bulk` optionnelle, elle aussi pré-encodée
+      - champs indexés (user_id, amount...) placés hors du contexte, au premier niveau
+      - identifiants déterministes : action `{"create": {"_id": ...}}` par document
+        (op_type) et/ou champ `event_id` dans le document (embed_id, pour Logstash)
+      - routage optionnel : `_index` de l’action déduit du timestamp (index datés)
+    Le tampon est remis à l’expéditeur sous forme de memoryview (aucune copie),
+    puis vidé et réutilisé pour le lot suivant ; `ids` suit les documents du lot.
+    """
+
+    def __init__(self, host: Optional[str] = None, service: Optional[str] = None,
+                 action: Optional[Dict[str, Any]] = None, top_level_fields: Iterable[str] = (),
+                 op_type: Optional[str] = None, embed_id: bool = False,
+                 index_for: Optional[Callable[[Any], str]] = None,
+                 timestamp_fields: Iterable[str] = ("@timestamp", "timestamp")):
+        """
+        :param top_level_fields: champs placés au premier niveau du document (champs indexés)
+        :param op_type: "create" (ou "index") : action `_bulk` avec `_id` déterministe ; remplace `action`
+        :param embed_id: ajoute `event_id` au document (déduplication côté Logstash)
+        :param index_for: timestamp -> nom d’index, ajouté en `_index` à l’action (avec op_type)
+        :param timestamp_fields: champs lus par add_document pour le routage
+        """
+        top_level_fields = tuple(top_level_fields)
+        self._top_level = tuple((name, b',"' + name.encode("utf-8") + b'":') for name in top_level_fields)
+        self._excluded = ENVELOPE_FIELDS.union(top_level_fields)
+        self._constant = b""
+        if host is not None:
+            self._constant += b',"host":' + dumps(host)
+        if service is not None:
+            self._constant += b',"service":' + dumps(service)
+        self._action = dumps(action) + b"\n" if action is not None and op_type is None else b""
+        self._op_prefix = b'{"' + op_type.encode("ascii") + b'":{"_id":"' if op_type else None
+        self._embed_id = embed_id
+        self._index_for = index_for if op_type else None
+        self._timestamp_fields = tuple(timestamp_fields)
+        self._index_prefixes: Dict[str, bytes] = {}
+        self._track_ids = bool(op_type) or embed_id
+        self._sources: Dict[str, bytes] = {}
+        self._scratch = bytearray()
+        self.buffer = bytearray()
+        self.ids: List[str] = []
+        self.count = 0
+
+    def _source(self, source: str) -> bytes:
+        encoded = self._sources.get(source)
+        if encoded is None:
+            encoded = self._sources[source] = b',"source":' + dumps(source)
+        return encoded
+
+    def _op_prefix_for(self, timestamp: Any) -> bytes:
+        """Début de l’action `_bulk` (avec `_index` si routage), encodé une fois par index."""
+        if self._index_for is None:
+            return self._op_prefix
+        index = self._index_for(timestamp)
+        encoded = self._index_prefixes.get(index)
+        if encoded is None:
+            encoded = self._index_prefixes[index] = (
+                self._op_prefix[:-7] + b'"_index":' + dumps(index) + b',"_id":"'
+            )
+        return encoded
+
+    def _append(self, document: bytearray, timestamp: Any = None):
+        """Ajoute un document sérialisé sans son `}` final (action et event_id éventuels)."""
+        buffer = self.buffer
+        if self._track_ids:
+            doc_id = document_id(document)
+            self.ids.append(doc_id)
+            if self._op_prefix is not None:
+                buffer += self._op_prefix_for(timestamp)
+                buffer += doc_id.encode("ascii")
+                buffer += b'"}}\n'
+            buffer += document
+            if self._embed_id:
+                buffer += b'"event_id":"' if document[-1:] == b"{" else b',"event_id":"'
+                buffer += doc_id.encode("ascii")
+                buffer += b'"'
+        else:
+            buffer += self._action
+            buffer += document
+        buffer += b"}\n"
+        self.count += 1
+
+    def add(self, log: Dict[str, Any], source: str, timestamp: str):
+        """
+        Ajoute un événement : enveloppe (timestamp, source, host, service,
+        severity, message) et contexte privé des champs déjà dans l’enveloppe.
+        """
+        excluded = self._excluded
+        context = {k: v for k, v in log.items() if k not in excluded}
+        document = self._scratch
+        document.clear()
+        document += b'{"timestamp":'
+        document += dumps(timestamp)
+        document += self._source(source)
+        document += self._constant
+        document += b',"severity":'
+        document += dumps(log.get("level", "INFO"))
+        document += b',"message":'
+        document += dumps(log.get("message", ""))
+        for name, key in self._top_level:
+            if name in log:
+                document += key
+                document += dumps(log[name])
+        document += b',"context":'
+        document += dumps(context)
+        self._append(document, timestamp)
+
+    def add_document(self, document: Dict[str, Any]):
+        """Ajoute un document déjà construit (ex : sortie de LogFormatter.normalize)."""
+        scratch = self._scratch
+        scratch.clear()
+        scratch += dumps(document)
+        del scratch[-1:]  # `}` final, rajouté par _append
+        timestamp = None
+        if self._index_for is not None:
+            timestamp = next((document[name] for name in self._timestamp_fields if name in document), None)
+        self._append(scratch, timestamp)
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def view(self) -> memoryview:
+        """Vue sans copie sur le lot courant (à libérer avant reset)."""
+        return memoryview(self.buffer)
+
+    def reset(self):
+        self.buffer.clear()
+        self.ids.clear()
+        self.count = 0
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    builder = NDJSONBuilder(host="collector-01", service="compliance_audit_system")
+    builder.add({"level": "INFO", "message": "User login successful", "user_id": 101}, "api", "2025-10-14T08:12:05")
+    print(bytes(builder.view()).decode("utf-8"))
@@ -0,0 +1,174 @@
+"""
+==============================================================
+ Fichier : node_pool.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Répartir les requêtes Elasticsearch sur les nœuds HTTP
+           du cluster (découverte, sélection, mise à l’écart des
+           nœuds en panne puis résurrection).
+==============================================================
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("NodePool")
+
+ROUND_ROBIN, LEAST_OUTSTANDING = "round_robin", "least_outstanding"
+
+
+class Node:
+    """Nœud HTTP : requêtes en cours et état de panne."""
+
+    __slots__ = ("url", "outstanding", "failures", "dead_until")
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.dead_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"Node({self.url!r})"
+
+
+def parse_nodes_http(payload: Dict[str, Any], scheme: str = "http") -> List[str]:
+    """
+    URL des nœuds depuis une réponse `GET _nodes/http`. `publish_address` vaut
+    `ip:port` ou `nom/ip:port` : le nom est préféré (certificats TLS).
+    """
+    urls = []
+    for info in (payload.get("nodes") or {}).values():
+        address = (info.get("http") or {}).get("publish_address")
+        if not address:
+            continue
+        if "/" in address:
+            hostname, address = address.split("/", 1)
+            address = f"{hostname}:{address.rsplit(':', 1)[1]}" if hostname else address
+        urls.append(f"{scheme}://{address}")
+    return sorted(urls)
+
+
+class NodePool:
+    """
+    Pool de nœuds Elasticsearch :
+      - sélection `round_robin` ou `least_outstanding` (moins de requêtes en cours)
+      - un nœud en échec est écarté `dead_timeout` secondes, doublées à chaque
+        échec consécutif (plafond `max_dead_timeout`), puis réessayé
+      - si tous les nœuds sont écartés, celui dont l’écart expire le plus tôt est
+        réessayé malgré tout : le pool ne se bloque jamais
+      - `set_hosts` (découverte) conserve l’état des nœuds déjà connus
+    """
+
+    def __init__(self, hosts: Iterable[str], selector: str = ROUND_ROBIN, dead_timeout: float = 60.0,
+                 max_dead_timeout: float = 1800.0, sniff_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if selector not in (ROUND_ROBIN, LEAST_OUTSTANDING):
+            raise ValueError(f"Sélecteur de nœud inconnu : {selector}")
+        self.selector = selector
+        self.dead_timeout = dead_timeout
+        self.max_dead_timeout = max_dead_timeout
+        self.sniff_interval = sniff_interval
+        self.clock = clock
+        self.nodes = [Node(url) for url in dict.fromkeys(hosts)]
+        if not self.nodes:
+            raise ValueError("Aucun nœud Elasticsearch configuré.")
+        self.last_sniff = clock()
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def urls(self) -> List[str]:
+        return [node.url for node in self.nodes]
+
+    # ----------------------------------------------------------
+    # Sélection
+    # ----------------------------------------------------------
+    def _choose(self) -> Node:
+        now = self.clock()
+        alive = [node for node in self.nodes if node.dead_until <= now]
+        if not alive:
+            return min(self.nodes, key=lambda node: node.dead_until)
+        start = self._cursor % len(alive)
+        self._cursor += 1
+        rotated = alive[start:] + alive[:start]
+        if self.selector == LEAST_OUTSTANDING:
+            return min(rotated, key=lambda node: node.outstanding)
+        return rotated[0]
+
+    def peek(self) -> Node:
+        """Nœud choisi sans suivi de requête (URL de base pour un appel ponctuel)."""
+        with self._lock:
+            return self._choose()
+
+    def select(self) -> Node:
+        """Nœud pour une requête ; à rendre avec `release`."""
+        with self._lock:
+            node = self._choose()
+            node.outstanding += 1
+            return node
+
+    def release(self, node: Node, ok: bool = True):
+        with self._lock:
+            node.outstanding = max(0, node.outstanding - 1)
+        if ok:
+            self.mark_live(node)
+        else:
+            self.mark_dead(node)
+
+    # ----------------------------------------------------------
+    # Panne et résurrection
+    # ----------------------------------------------------------
+    def mark_dead(self, node: Node):
+        with self._lock:
+            node.failures += 1
+            timeout = min(self.max_dead_timeout, self.dead_timeout * 2 ** (node.failures - 1))
+            node.dead_until = self.clock() + timeout
+        logger.warning(f"Nœud {node.url} écarté pour {timeout:.0f} s (échec n°{node.failures}).")
+
+    def mark_live(self, node: Node):
+        if node.failures:
+            with self._lock:
+                node.failures = 0
+                node.dead_until = 0.0
+            logger.info(f"Nœud {node.url} de nouveau disponible.")
+
+    # ----------------------------------------------------------
+    # Découverte des nœuds
+    # ----------------------------------------------------------
+    def sniff_due(self) -> bool:
+        """True si une découverte périodique est à lancer (une seule fois par intervalle)."""
+        if not self.sniff_interval:
+            return False
+        with self._lock:
+            if self.clock() - self.last_sniff < self.sniff_interval:
+                return False
+            self.last_sniff = self.clock()
+            return True
+
+    def set_hosts(self, urls: Iterable[str]):
+        """Remplace la liste des nœuds ; l’état des nœuds déjà connus est conservé."""
+        urls = [url.rstrip("/") for url in dict.fromkeys(urls)]
+        if not urls:
+            logger.warning("Découverte vide : liste de nœuds inchangée.")
+            return
+        with self._lock:
+            known = {node.url: node for node in self.nodes}
+            self.nodes = [known.get(url) or Node(url) for url in urls]
+            self.last_sniff = self.clock()
+        logger.info(f"{len(urls)} nœuds Elasticsearch : {', '.join(urls)}")
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    pool = NodePool(["http://es1:9200", "http://es2:9200", "http://es3:9200"], selector=LEAST_OUTSTANDING)
+    first = pool.select()
+    pool.release(first, ok=False)
+    print(first, "écarté ; suivants :", [pool.peek() for _ in range(3)])
+    print(parse_nodes_http({"nodes": {"a": {"http": {"publish_address": "es4/10.0.0.4:9200"}}}}))
@@ -0,0 +1,167 @@
+"""
+==============================================================
+ Fichier : rate_limiter.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Limiter le débit des sources bruyantes (seau à jetons
+           par source et par niveau, échantillonnage) sans jamais
+           toucher aux événements de conformité.
+==============================================================
+"""
+
+import time
+import random
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger("RateLimiter")
+
+DEFAULT_EXEMPT_SOURCES = ("compliance",)
+DEFAULT_EXEMPT_LEVELS = ("ALERT", "CRITICAL")
+DEFAULT_EXEMPT_CATEGORIES = ("GDPR",)
+
+
+class TokenBucket:
+    """Seau à jetons : `rate` événements/s en régime établi, rafales jusqu’à `burst`."""
+
+    __slots__ = ("rate", "burst", "sample_rate", "tokens", "updated", "passed", "dropped", "sampled_out")
+
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None, sample_rate: float = 1.0):
+        self.rate = rate  # None : pas de limite de débit (échantillonnage seul)
+        self.burst = burst if burst is not None else (rate or 0)
+        self.sample_rate = sample_rate
+        self.tokens = self.burst
+        self.updated = None
+        self.passed = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def take(self, now: float) -> bool:
+        if self.rate is None:
+            return True
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Limiteur par (source, niveau) :
+      - échantillonnage probabiliste optionnel ; les événements conservés portent
+        `sample_rate` pour pouvoir extrapoler les volumes dans Kibana
+      - seau à jetons ensuite : au-delà du débit, les événements sont écartés et comptés
+      - exemptés : sources de conformité, niveaux ALERT/CRITICAL, catégorie GDPR et événements
+        listés dans `audit_logging.tracked_events` (compliance_rules.yaml)
+    """
+
+    def __init__(self, sources: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+                 default: Optional[Dict[str, Any]] = None,
+                 exempt_sources: Iterable[str] = DEFAULT_EXEMPT_SOURCES,
+                 exempt_levels: Iterable[str] = DEFAULT_EXEMPT_LEVELS,
+                 exempt_categories: Iterable[str] = DEFAULT_EXEMPT_CATEGORIES,
+                 tracked_events: Iterable[str] = (),
+                 clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random):
+        """
+        :param sources: source -> niveau (ou "*") -> {rate, burst, sample_rate}
+        :param default: limite des couples (source, niveau) non configurés ; None = illimité
+        """
+        self.sources = {source: {level.upper(): spec for level, spec in (levels or {}).items()}
+                        for source, levels in (sources or {}).items()}
+        self.default = default
+        self.exempt_sources = frozenset(exempt_sources)
+        self.exempt_levels = frozenset(level.upper() for level in exempt_levels)
+        self.exempt_categories = frozenset(category.upper() for category in exempt_categories)
+        self.tracked_events = frozenset(tracked_events)
+        self.clock = clock
+        self.rng = rng
+        self._buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+
+    @classmethod
+    def from_config(cls, logging_config_path: str = "config/logging.yaml",
+                    rules_path: str = "config/compliance_rules.yaml") -> "RateLimiter":
+        with open(logging_config_path, "r", encoding="utf-8") as f:
+            config = (yaml.safe_load(f) or {}).get("rate_limits", {})
+        with open(rules_path, "r", encoding="utf-8") as f:
+            rules = (yaml.safe_load(f) or {}).get("compliance", {})
+        tracked = rules.get("audit_logging", {}).get("tracked_events", [])
+        if not config.get("enabled", True):
+            return cls(tracked_events=tracked)
+        return cls(
+            sources=config.get("sources", {}),
+            default=config.get("default"),
+            exempt_sources=config.get("exempt_sources", DEFAULT_EXEMPT_SOURCES),
+            exempt_levels=config.get("exempt_levels", DEFAULT_EXEMPT_LEVELS),
+            exempt_categories=config.get("exempt_categories", DEFAULT_EXEMPT_CATEGORIES),
+            tracked_events=tracked,
+        )
+
+    # ----------------------------------------------------------
+    # Résolution des seaux
+    # ----------------------------------------------------------
+    def _bucket(self, source: str, level: str) -> Optional[TokenBucket]:
+        key = (source, level)
+        if key in self._buckets:
+            return self._buckets[key]
+        levels = self.sources.get(source, {})
+        spec = levels.get(level) or levels.get("*") or self.default
+        bucket = None
+        if spec:
+            bucket = TokenBucket(spec.get("rate"), spec.get("burst"), float(spec.get("sample_rate", 1.0)))
+        self._buckets[key] = bucket
+        return bucket
+
+    def is_exempt(self, log: Dict[str, Any], source: str, level: str) -> bool:
+        if source in self.exempt_sources or level in self.exempt_levels:
+            return True
+        category = log.get("category")
+        if category is not None and str(category).upper() in self.exempt_categories:
+            return True
+        tracked = self.tracked_events
+        return bool(tracked) and (log.get("event_type") in tracked or log.get("event") in tracked)
+
+    # ----------------------------------------------------------
+    # Filtrage
+    # ----------------------------------------------------------
+    def allow(self, log: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+        """Retourne l’événement (annoté s’il est échantillonné) ou None s’il est écarté."""
+        level = str(log.get("level") or log.get("severity") or "INFO").upper()
+        if self.is_exempt(log, source, level):
+            return log
+        bucket = self._bucket(source, level)
+        if bucket is None:
+            return log
+        if bucket.sample_rate < 1.0:
+            if self.rng() >= bucket.sample_rate:
+                bucket.sampled_out += 1
+                return None
+            log = dict(log, sample_rate=bucket.sample_rate)
+        if not bucket.take(self.clock()):
+            bucket.dropped += 1
+            return None
+        bucket.passed += 1
+        return log
+
+    def apply(self, logs: Iterable[Dict[str, Any]], source: str) -> List[Dict[str, Any]]:
+        allow = self.allow
+        return [log for log in (allow(entry, source) for entry in logs) if log is not None]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            f"{source}/{level}": {"passed": b.passed, "dropped": b.dropped, "sampled_out": b.sampled_out}
+            for (source, level), b in self._buckets.items() if b is not None
+        }
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    limiter = RateLimiter.from_config()
+    burst = [{"level": "INFO", "query": "SELECT 1"}] * 1000
+    print(len(limiter.apply(burst, "database")), limiter.stats())
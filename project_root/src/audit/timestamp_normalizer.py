@@ -0,0 +1,137 @@
+"""
+==============================================================
+ Fichier : timestamp_normalizer.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Conversion rapide des timestamps des logs bruts
+           (ISO 8601, `2025-10-14 08:12:05`, epoch) en UTC.
+==============================================================
+"""
+
+import re
+from array import array
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+EPOCH = datetime(1970, 1, 1)
+
+ISO_PATTERN = re.compile(
+    r"(\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d)(?:[.,](\d{1,9}))?\s*(Z|[+-]\d\d(?::?\d\d)?)?"
+)
+
+# Formats non ISO rencontrés dans les sources (tentés après le chemin rapide)
+FALLBACK_FORMATS = (
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%b/%Y:%H:%M:%S %z",  # journaux d’accès type Apache / Nginx
+)
+
+
+class TimestampNormalizer:
+    """
+    Normalise les timestamps en ISO 8601 UTC (sans suffixe, comme `datetime.utcnow()`).
+      - chemin rapide pour `YYYY-MM-DD[ T]HH:MM:SS[.ffffff|,mmm][Z|±HH:MM]`
+      - cache par seconde : les rafales d’événements d’une même seconde ne
+        sont analysées qu’une fois, seule la fraction est recalculée
+      - conversion par lots en tableau d’epoch millisecondes (array('q'))
+    """
+
+    def __init__(self, source_tz: Optional[str] = "UTC", cache_size: int = 4096):
+        """
+        :param source_tz: fuseau des timestamps sans décalage explicite
+        :param cache_size: nombre de secondes distinctes conservées en cache
+        """
+        self.source_tz = None if source_tz in (None, "UTC") else ZoneInfo(source_tz)
+        self._parse_second = lru_cache(maxsize=cache_size)(self._parse_second_uncached)
+
+    # ----------------------------------------------------------
+    # Analyse
+    # ----------------------------------------------------------
+    def _parse_second_uncached(self, prefix: str, offset: str) -> Tuple[str, int]:
+        """Analyse `YYYY-MM-DD?HH:MM:SS` + décalage ; retourne (ISO UTC à la seconde, epoch s)."""
+        if ISO_PATTERN.fullmatch(prefix) is None:
+            raise ValueError(f"Timestamp non reconnu : {prefix}")
+        moment = datetime(
+            int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10]),
+            int(prefix[11:13]), int(prefix[14:16]), int(prefix[17:19]),
+        )
+        if offset and offset != "Z":
+            sign = -1 if offset[0] == "-" else 1
+            digits = offset[1:].replace(":", "")
+            moment -= sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:4] or 0))
+        elif not offset and self.source_tz is not None:
+            moment = moment.replace(tzinfo=self.source_tz).astimezone(timezone.utc).replace(tzinfo=None)
+        return moment.isoformat(), int((moment - EPOCH).total_seconds())
+
+    def _parse(self, timestamp: Any) -> Optional[Tuple[str, int, str]]:
+        """Retourne (ISO UTC à la seconde, epoch s, microsecondes sur 6 chiffres ou "") ou None."""
+        if timestamp.__class__ is str:
+            # Formes les plus fréquentes (`2025-10-14 08:12:05[,mmm]`) : directement le cache par seconde
+            size = len(timestamp)
+            if size == 19 or (size > 20 and timestamp[19] in ".," and timestamp[20:].isdigit()):
+                try:
+                    iso, epoch = self._parse_second(timestamp[:19], "")
+                    return iso, epoch, (timestamp[20:] + "00000")[:6] if size > 19 else ""
+                except ValueError:
+                    pass
+            text = timestamp.strip()
+            match = ISO_PATTERN.fullmatch(text)
+            if match is not None:
+                prefix, fraction, offset = match.groups()
+                try:
+                    iso, epoch = self._parse_second(prefix, offset or "")
+                except ValueError:
+                    return None
+                return iso, epoch, (fraction + "00000")[:6] if fraction else ""
+            for fmt in FALLBACK_FORMATS:
+                try:
+                    return self._parse(datetime.strptime(text, fmt))
+                except ValueError:
+                    continue
+            return None
+        if isinstance(timestamp, datetime):
+            if timestamp.tzinfo is None and self.source_tz is not None:
+                timestamp = timestamp.replace(tzinfo=self.source_tz)
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            micro = f"{timestamp.microsecond:06d}" if timestamp.microsecond else ""
+            timestamp = timestamp.replace(microsecond=0)
+            return timestamp.isoformat(), int((timestamp - EPOCH).total_seconds()), micro
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            seconds = timestamp / 1000 if timestamp > 1e11 else timestamp  # epoch en ms ou en s
+            moment = EPOCH + timedelta(seconds=seconds)
+            return self._parse(moment)
+        return None
+
+    # ----------------------------------------------------------
+    # API publique
+    # ----------------------------------------------------------
+    def normalize(self, timestamp: Any) -> str:
+        """ISO 8601 UTC ; l’heure courante si le timestamp est absent ou illisible."""
+        parsed = self._parse(timestamp)
+        if parsed is None:
+            return datetime.utcnow().isoformat()
+        iso, _, micro = parsed
+        return iso + "." + micro if micro and micro != "000000" else iso
+
+    def to_epoch_millis(self, timestamp: Any) -> int:
+        parsed = self._parse(timestamp)
+        if parsed is None:
+            return int((datetime.utcnow() - EPOCH).total_seconds() * 1000)
+        _, epoch, micro = parsed
+        return epoch * 1000 + int(micro[:3]) if micro else epoch * 1000
+
+    def to_epoch_millis_array(self, timestamps: Iterable[Any]) -> array:
+        """Conversion par lot en epoch millisecondes (entiers 64 bits contigus)."""
+        to_millis = self.to_epoch_millis
+        return array("q", [to_millis(ts) for ts in timestamps])
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    normalizer = TimestampNormalizer()
+    print(normalizer.normalize("2025-10-14 08:12:05"))
+    print(normalizer.normalize("2025-10-14T10:12:05.250+02:00"))
+    print(normalizer.to_epoch_millis_array(["2025-10-14 08:12:05", "2025-10-14 08:12:05,500"]))
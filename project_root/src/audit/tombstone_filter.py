@@ -0,0 +1,152 @@
+"""
+==============================================================
+ Fichier : tombstone_filter.py
+ Auteur  : Équipe Sécurité & Conformité
+ Objectif: Écarter à l’ingestion les événements des personnes
+           déjà effacées (droit à l’oubli) avant leur envoi ELK.
+==============================================================
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any, Iterable, Optional
+
+import yaml
+
+logger = logging.getLogger("TombstoneFilter")
+
+ERASED_MARKER = "<ERASED>"
+
+
+class TombstoneFilter:
+    """
+    Ensemble des identifiants effacés, vérifié pour chaque événement ingéré :
+      - frozenset exact : une recherche dans la table de hachage C coûte quelques
+        dizaines de ns, moins qu’un sondage de filtre de Bloom écrit en Python
+      - aucun coût si aucune personne n’est effacée
+      - rechargement à chaud lorsque le fichier des tombstones change
+    """
+
+    def __init__(self, path: str = "data/erased_subjects.txt", mode: str = "drop",
+                 subject_fields: Iterable[str] = ("user_id", "client_id"),
+                 reload_interval: float = 5.0):
+        if mode not in ("drop", "anonymize"):
+            raise ValueError(f"Mode tombstone inconnu : {mode}")
+        self.path = path
+        self.mode = mode
+        self.subject_fields = tuple(subject_fields)
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._next_check = 0.0
+        self._exact = frozenset()
+        self.dropped = 0
+        self.load()
+
+    @classmethod
+    def from_config(cls, gdpr_config_path: str = "config/gdpr_config.yaml"):
+        """Construit le filtre depuis la section `right_to_be_forgotten.tombstones`."""
+        with open(gdpr_config_path, "r", encoding="utf-8") as f:
+            rtbf = yaml.safe_load(f).get("gdpr", {}).get("right_to_be_forgotten", {})
+        config = rtbf.get("tombstones", {})
+        return cls(
+            path=config.get("path", "data/erased_subjects.txt"),
+            mode=config.get("mode", "drop"),
+            subject_fields=config.get("subject_fields", ("user_id", "client_id")),
+            reload_interval=config.get("reload_interval_seconds", 5.0),
+        )
+
+    # ----------------------------------------------------------
+    # Chargement / rechargement à chaud
+    # ----------------------------------------------------------
+    def load(self):
+        """Relit le fichier (un identifiant par ligne) et remplace l’ensemble en une affectation."""
+        if not os.path.exists(self.path):
+            self._mtime = None
+            return
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path, "r", encoding="utf-8") as f:
+            exact = frozenset(line.strip() for line in f if line.strip())
+        # Affectation atomique : les lecteurs voient l’ancien ou le nouvel ensemble
+        self._exact, self._mtime = exact, mtime
+        logger.info(f"{len(exact)} tombstones chargés depuis {self.path}")
+
+    def maybe_reload(self):
+        """Recharge le fichier s’il a changé (vérification au plus toutes les reload_interval s)."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self.load()
+
+    def add(self, user_ids: Iterable[str]):
+        """Ajoute des identifiants effacés (fichier + mémoire)."""
+        user_ids = [str(uid) for uid in user_ids]
+        append_tombstones(self.path, user_ids)
+        self._exact = self._exact.union(user_ids)
+        self._mtime = os.stat(self.path).st_mtime
+
+    # ----------------------------------------------------------
+    # Vérification des événements
+    # ----------------------------------------------------------
+    def __contains__(self, user_id) -> bool:
+        if user_id.__class__ is not str:
+            user_id = str(user_id)
+        return user_id in self._exact
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def is_erased(self, log: Dict[str, Any]) -> bool:
+        exact = self._exact
+        for field in self.subject_fields:
+            value = log.get(field)
+            if value is None:
+                continue
+            if value.__class__ is not str:
+                value = str(value)
+            if value in exact:
+                return True
+        return False
+
+    def apply(self, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Retourne l’événement inchangé, None (mode drop) ou une copie dont les
+        identifiants sont remplacés (mode anonymize) si la personne est effacée.
+        """
+        if not self._exact or not self.is_erased(log):
+            return log
+        self.dropped += 1
+        if self.mode == "drop":
+            return None
+        anonymized = dict(log)
+        for field in self.subject_fields:
+            if field in anonymized:
+                anonymized[field] = ERASED_MARKER
+        anonymized["gdpr_erased"] = True
+        return anonymized
+
+
+def append_tombstones(path: str, user_ids: Iterable[str]):
+    """Ajoute des identifiants au fichier des tombstones (lu par les collecteurs)."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(f"{uid}\n" for uid in user_ids)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ==========================================================
+# Exemple d’utilisation
+# ==========================================================
+if __name__ == "__main__":
+    tombstones = TombstoneFilter("data/erased_subjects.txt")
+    tombstones.add(["103"])
+    print(tombstones.apply({"user_id": 103, "message": "GDPR deletion completed"}))
+    print(tombstones.apply({"user_id": 101, "message": "User login successful"}))
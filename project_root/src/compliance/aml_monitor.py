@@ -15,14 +15,15 @@ import yaml
 import pandas as pd
 import logging
 from datetime import datetime
-from elk_connector import ELKConnector
+from functools import partial
+from async_elk_connector import shared_connector
 from alerting_system import AlertingSystem
 
 
 class AMLMonitor:
     def __init__(self, rules_path: str, elk_config_path: str, smtp_config: dict, slack_webhook: str = None):
         self.rules = self._load_rules(rules_path)
-        self.elk = ELKConnector(elk_config_path)
+        self.elk = shared_connector(elk_config_path)
         self.alert_system = AlertingSystem(elk_config_path, rules_path, smtp_config, slack_webhook)
         self.logger = logging.getLogger("AMLMonitor")
 
@@ -84,9 +85,21 @@ class AMLMonitor:
             "rule_triggered": rule["name"]
         }
         try:
-            self.elk.send_log(event)
+            future = self.elk.send_log(event, wait=False)  # envoi en arrière-plan, sans bloquer la surveillance
         except Exception as e:
             self.logger.error(f"Erreur d’envoi du log AML vers ELK : {e}")
+            return
+        future.add_done_callback(partial(self._check_sent, tx["transaction_id"]))
+
+    def _check_sent(self, transaction_id, future):
+        """Résultat de l’envoi en arrière-plan : un échec n’est jamais silencieux."""
+        try:
+            sent = future.result()
+        except Exception as e:
+            self.logger.error(f"Erreur d’envoi du log AML {transaction_id} vers ELK : {e}")
+            return
+        if not sent:
+            self.logger.error(f"Log AML {transaction_id} non indexé dans ELK (file de secours ou rebut).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+"""
+anonymization_engine.py
+-----------------------
+Ce module compile une seule fois les règles `personal_data_fields` de
+`gdpr_config.yaml` en un plan par champ, puis l’applique colonne par colonne
+à des lots d’enregistrements ou à des DataFrames.
+
+Fonctionnalités :
+- Stratégies hash (SHA-256), mask (regex précompilée), remove, generalize (convert_to_year)
+- Chaque valeur distincte d’une colonne n’est transformée qu’une fois par lot
+- Application à une liste de dictionnaires, à une colonne ou à un DataFrame pandas
+"""
+
+import re
+import hashlib
+import logging
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import yaml
+
+logger = logging.getLogger("AnonymizationEngine")
+
+MASK_CHAR = "*"
+
+
+def _hash(value: Any) -> Optional[str]:
+    """Hash SHA-256 de la forme texte (identifiants et numéros lus en int / float)."""
+    if value is None:
+        return None
+    return hashlib.sha256(str(value).encode("utf-8")).hexdigest()
+
+
+def _mask(pattern: "re.Pattern", value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return pattern.sub(MASK_CHAR, str(value))
+
+
+def _to_year(value) -> str:
+    if hasattr(value, "year"):
+        return str(value.year)
+    return str(value)[:4]
+
+
+def _remove(value) -> None:
+    return None
+
+
+class FieldRule:
+    """Règle compilée pour un champ : stratégie et fonction de transformation d’une valeur."""
+
+    __slots__ = ("name", "strategy", "transform")
+
+    def __init__(self, name: str, strategy: str, transform: Callable[[Any], Any]):
+        self.name = name
+        self.strategy = strategy
+        self.transform = transform
+
+    @classmethod
+    def compile(cls, spec: Dict[str, Any]) -> "FieldRule":
+        name, strategy = spec["name"], spec.get("anonymization", "hash")
+        if strategy == "hash":
+            transform = _hash
+        elif strategy == "mask":
+            if not spec.get("pattern"):
+                raise ValueError(f"Stratégie mask sans pattern pour le champ {name}")
+            transform = partial(_mask, re.compile(spec["pattern"]))
+        elif strategy == "remove":
+            transform = _remove
+        elif strategy == "generalize" and spec.get("rule", "convert_to_year") == "convert_to_year":
+            transform = _to_year
+        else:
+            raise ValueError(f"Stratégie d’anonymisation inconnue pour {name} : {strategy} {spec.get('rule', '')}")
+        return cls(name, strategy, transform)
+
+    def apply_values(self, values: List[Any]) -> List[Any]:
+        """Transforme une colonne : chaque valeur distincte non vide n’est calculée qu’une fois."""
+        if self.strategy == "remove":
+            return [None] * len(values)
+        transform = self.transform
+        mapping = {v: transform(v) for v in set(values) if v not in (None, "")}
+        get = mapping.get
+        return [get(v, v) for v in values]
+
+
+class AnonymizationEngine:
+    def __init__(self, personal_data_fields: Iterable[Dict[str, Any]]):
+        self.rules: Dict[str, FieldRule] = {}
+        for spec in personal_data_fields:
+            rule = FieldRule.compile(spec)
+            self.rules[rule.name] = rule
+
+    @classmethod
+    def from_config(cls, gdpr_config_path: str = "config/gdpr_config.yaml") -> "AnonymizationEngine":
+        with open(gdpr_config_path, "r", encoding="utf-8") as f:
+            fields = yaml.safe_load(f).get("gdpr", {}).get("personal_data_fields", [])
+        engine = cls(fields)
+        logger.info(f"Plan d’anonymisation compilé : {len(engine.rules)} champs.")
+        return engine
+
+    def plan_for(self, fields: Optional[Iterable[str]] = None) -> List[FieldRule]:
+        """Règles à appliquer ; un champ demandé mais absent de la configuration est haché."""
+        if fields is None:
+            return list(self.rules.values())
+        return [self.rules.get(name) or FieldRule(name, "hash", _hash) for name in fields]
+
+    # ----------------------------------------------------------
+    # Application par lots
+    # ----------------------------------------------------------
+    def anonymize_column(self, field: str, values: List[Any]) -> List[Any]:
+        rule = self.rules.get(field)
+        return rule.apply_values(values) if rule else list(values)
+
+    def anonymize_batch(self, records: List[Dict[str, Any]],
+                        fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Anonymise sur place une liste d’enregistrements, une colonne à la fois."""
+        if not records:
+            return records
+        for rule in self.plan_for(fields):
+            name = rule.name
+            rows = [r for r in records if name in r]
+            if not rows:
+                continue
+            for record, value in zip(rows, rule.apply_values([r[name] for r in rows])):
+                record[name] = value
+        return records
+
+    def anonymize_record(self, record: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        return self.anonymize_batch([record], fields)[0]
+
+    def anonymize_dataframe(self, df: pd.DataFrame, fields: Optional[Iterable[str]] = None,
+                            inplace: bool = False) -> pd.DataFrame:
+        """
+        Anonymise les colonnes d’un DataFrame : les valeurs distinctes sont
+        factorisées, transformées une fois, puis redistribuées par indexation numpy.
+        """
+        if not inplace:
+            df = df.copy()
+        for rule in self.plan_for(fields):
+            if rule.name not in df.columns:
+                continue
+            column = df[rule.name]
+            if rule.strategy == "remove":
+                df[rule.name] = None
+                continue
+            if rule.strategy == "generalize" and pd.api.types.is_datetime64_any_dtype(column):
+                df[rule.name] = column.dt.strftime("%Y")
+                continue
+            codes, uniques = pd.factorize(column)
+            transformed = np.array(
+                [v if v == "" else rule.transform(v) for v in uniques] + [None], dtype=object
+            )
+            # Le code -1 (valeur manquante) pointe sur le None final
+            df[rule.name] = transformed[codes]
+        return df
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    engine = AnonymizationEngine.from_config("config/gdpr_config.yaml")
+    rows = [{"user_id": "U1", "first_name": "Ahmed", "email": "ahmed.elmajid@example.com",
+             "phone_number": "0600123456", "address": "12 rue X", "birth_date": "1990-05-12"}]
+    print(engine.anonymize_batch(rows))
@@ -6,57 +6,271 @@ les données personnelles, en conformité avec GDPR/KYC.
 
 Fonctionnalités :
 - Hash SHA-256 pour anonymisation
-- Pseudonymisation via mapping aléatoire
-- Masquage partiel des données (emails, numéros de téléphone)
+- Pseudonymisation déterministe par HMAC-SHA256 (clé KeyManager), stable entre processus
+  (mapping réversible : voir TokenVault dans token_vault.py)
+- Masquage partiel des données (emails, numéros de téléphone), unitaire ou par colonne
+  (pandas Series / tableaux Arrow, noyaux vectorisés pyarrow.compute)
+- Anonymisation d’enregistrements selon `gdpr_config.yaml` (AnonymizationEngine)
 """
 
+import os
+import hmac
 import hashlib
-import random
 import string
 import logging
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+import pandas as pd
+from anonymization_engine import AnonymizationEngine
+from key_management import KeyManager
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # repli sur les méthodes .str de pandas
+    pa = None
+    pc = None
 
 logger = logging.getLogger("AnonymizationUtils")
 
+GDPR_CONFIG_PATH = os.getenv("GDPR_CONFIG_PATH", "config/gdpr_config.yaml")
+PSEUDONYMIZATION_KEY_ID = os.getenv("PSEUDONYMIZATION_KEY_ID")
+_engine = None
+_pseudonymizer = None
+
+TOKEN_ALPHABET = string.ascii_letters + string.digits
+# ~95 bits de jeton : pas de collision attendue même sur des milliards de valeurs
+# (8 caractères ≈ 48 bits, collisions probables dès ~10^7 valeurs distinctes).
+# Un jeton plus court est le préfixe du jeton long : les anciens pseudonymes restent joignables.
+PSEUDONYM_LENGTH = 16
+_ALL_BYTES = bytes(range(256))
+
+
+def _byte_table(alphabet: str) -> bytes:
+    """Table bytes.translate associant chaque octet à un caractère de l’alphabet."""
+    return bytes.maketrans(_ALL_BYTES, (alphabet * (256 // len(alphabet) + 1))[:256].encode("ascii"))
+
+
+_TOKEN_TABLE = _byte_table(TOKEN_ALPHABET)
+_DIGIT_TABLE = _byte_table(string.digits)
+_UPPER_TABLE = _byte_table(string.ascii_uppercase)
+_LOWER_TABLE = _byte_table(string.ascii_lowercase)
+
+
+def get_engine() -> AnonymizationEngine:
+    """Plan d’anonymisation compilé une seule fois par processus."""
+    global _engine
+    if _engine is None:
+        _engine = AnonymizationEngine.from_config(GDPR_CONFIG_PATH)
+    return _engine
+
 
 def hash_sha256(value: str) -> str:
     """Retourne le hash SHA-256 d’une chaîne de caractères."""
     if not value:
         return ""
-    hashed = hashlib.sha256(value.encode("utf-8")).hexdigest()
-    logger.debug(f"Hashed '{value}' -> '{hashed[:8]}...'")
-    return hashed
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class Pseudonymizer:
+    """
+    Pseudonymisation déterministe : HMAC-SHA256 de la valeur avec une clé dédiée,
+    identique d’un processus et d’un redémarrage à l’autre (jointures possibles).
+    L’objet HMAC initialisé avec la clé est créé une fois et copié pour chaque valeur ;
+    les identifiants fréquents sont servis par un cache LRU borné.
+    """
+
+    def __init__(self, key: bytes, length: int = PSEUDONYM_LENGTH, preserve_format: bool = False,
+                 cache_size: int = 65536):
+        # Sous-clé dédiée : la clé maîtresse n’est jamais utilisée directement
+        subkey = hashlib.sha256(b"pseudonymization:" + key).digest()
+        self._hmac = hmac.new(subkey, digestmod=hashlib.sha256)
+        self.length = length
+        self.preserve_format = preserve_format
+        compute = self._format_preserving if preserve_format else self._token
+        self._cached = lru_cache(maxsize=cache_size)(compute)
+
+    @classmethod
+    def from_key_manager(cls, key_manager: Optional[KeyManager] = None, key_id: Optional[str] = None, **kwargs):
+        """
+        Utilise la clé `key_id` (par défaut la plus ancienne) : une rotation des clés
+        de chiffrement ne doit pas changer les pseudonymes déjà produits.
+        """
+        key_manager = key_manager or KeyManager()
+        key_id = key_id or key_manager.list_keys()[0]["id"]
+        return cls(key_manager.get_key(key_id), **kwargs)
+
+    def _digest(self, message: bytes) -> bytes:
+        mac = self._hmac.copy()
+        mac.update(message)
+        return mac.digest()
+
+    def _token(self, value: str) -> str:
+        return self._digest(value.encode("utf-8"))[:self.length].translate(_TOKEN_TABLE).decode("ascii")
+
+    def _format_preserving(self, value: str) -> str:
+        """Conserve longueur, classes de caractères (chiffre, majuscule, minuscule) et séparateurs."""
+        message = value.encode("utf-8")
+        stream = self._digest(message)
+        counter = 1
+        while len(stream) < len(value):
+            stream += self._digest(counter.to_bytes(4, "big") + message)
+            counter += 1
+        digits = stream.translate(_DIGIT_TABLE).decode("ascii")
+        upper = stream.translate(_UPPER_TABLE).decode("ascii")
+        lower = stream.translate(_LOWER_TABLE).decode("ascii")
+        return "".join(
+            digits[i] if "0" <= c <= "9" else upper[i] if c.isupper() else lower[i] if c.isalpha() else c
+            for i, c in enumerate(value)
+        )
+
+    def pseudonymize(self, value: str) -> str:
+        if not value:
+            return ""
+        return self._cached(value if value.__class__ is str else str(value))
+
+    def pseudonymize_many(self, values: Iterable[str]) -> List[str]:
+        """Pseudonymise un lot de valeurs (les valeurs vides restent vides)."""
+        cached = self._cached
+        return [cached(v if v.__class__ is str else str(v)) if v else "" for v in values]
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
 
+def get_pseudonymizer() -> Pseudonymizer:
+    """Pseudonymiseur par défaut, construit une seule fois par processus."""
+    global _pseudonymizer
+    if _pseudonymizer is None:
+        _pseudonymizer = Pseudonymizer.from_key_manager(key_id=PSEUDONYMIZATION_KEY_ID)
+    return _pseudonymizer
 
-def pseudonymize(value: str, length: int = 8) -> str:
-    """Retourne une version pseudonymisée aléatoire de la valeur."""
+
+def pseudonymize(value: str, length: int = PSEUDONYM_LENGTH) -> str:
+    """Retourne un pseudonyme déterministe (HMAC) de la valeur."""
     if not value:
         return ""
-    random.seed(hash(value))  # pour cohérence si nécessaire
-    pseudo = ''.join(random.choices(string.ascii_letters + string.digits, k=length))
-    logger.debug(f"Pseudonymized '{value}' -> '{pseudo}'")
-    return pseudo
+    pseudonymizer = get_pseudonymizer()
+    if length == pseudonymizer.length:
+        return pseudonymizer.pseudonymize(value)
+    return pseudonymizer._digest(str(value).encode("utf-8"))[:length].translate(_TOKEN_TABLE).decode("ascii")
+
+
+def pseudonymize_many(values: Iterable[str]) -> List[str]:
+    """Pseudonymise un lot de valeurs avec le pseudonymiseur par défaut."""
+    return get_pseudonymizer().pseudonymize_many(values)
 
 
 def mask_email(email: str) -> str:
     """Masque partiellement un email pour protéger l’identité."""
     if not email or "@" not in email:
         return email
-    local, domain = email.split("@")
+    local, domain = email.split("@", 1)
     masked_local = local[0] + "*" * (len(local) - 2) + local[-1] if len(local) > 2 else "*" * len(local)
-    masked_email = f"{masked_local}@{domain}"
-    logger.debug(f"Masked email '{email}' -> '{masked_email}'")
-    return masked_email
+    return f"{masked_local}@{domain}"
 
 
 def mask_phone(phone: str) -> str:
     """Masque partiellement un numéro de téléphone."""
-    if not phone or len(phone) < 4:
+    if not phone:
+        return phone
+    if len(phone) < 4:
         return "*" * len(phone)
-    masked = "*" * (len(phone) - 4) + phone[-4:]
-    logger.debug(f"Masked phone '{phone}' -> '{masked}'")
+    return "*" * (len(phone) - 4) + phone[-4:]
+
+
+# ==========================================================
+# Masquage par colonne (exports BI, millions de lignes)
+# ==========================================================
+Column = Union[pd.Series, "pa.Array", "pa.ChunkedArray"]
+EMAIL_PATTERN = r"^(?P<local>[^@]*)@(?P<domain>.*)$"
+
+
+def _to_arrow(values: Column):
+    """Convertit une colonne en tableau Arrow de chaînes (valeurs non textuelles converties)."""
+    if isinstance(values, pd.Series):
+        return pa.array(values.astype("string"), type=pa.string(), from_pandas=True)
+    if not pa.types.is_string(values.type) and not pa.types.is_large_string(values.type):
+        return pc.cast(values, pa.string())
+    return values
+
+
+def _like_input(masked, values: Column) -> Column:
+    """Restitue le résultat sous la forme d’entrée (Series conservant index et nom)."""
+    if isinstance(values, pd.Series):
+        return pd.Series(pd.arrays.ArrowExtensionArray(masked), index=values.index, name=values.name)
     return masked
 
 
+def _stars(counts):
+    return pc.binary_repeat("*", pc.max_element_wise(counts, 0))
+
+
+def mask_phone_column(values: Column) -> Column:
+    """
+    Version colonne de mask_phone : les 4 derniers caractères restent visibles.
+    Les valeurs nulles restent nulles.
+    """
+    if pc is None:
+        series = values.astype("string")
+        lengths = series.str.len()
+        stars = pd.Series("*", index=series.index, dtype="string").str.repeat((lengths - 4).clip(lower=0).fillna(0).astype(int))
+        short = pd.Series("*", index=series.index, dtype="string").str.repeat(lengths.fillna(0).astype(int))
+        return (stars + series.str[-4:]).where(lengths >= 4, short).where(series.notna())
+
+    array = _to_arrow(values)
+    lengths = pc.utf8_length(array)
+    masked = pc.if_else(
+        pc.less(lengths, 4),
+        _stars(lengths),
+        pc.binary_join_element_wise(_stars(pc.subtract(lengths, 4)), pc.utf8_slice_codeunits(array, -4), ""),
+    )
+    return _like_input(masked, values)
+
+
+def mask_email_column(values: Column) -> Column:
+    """
+    Version colonne de mask_email : premier et dernier caractère de la partie
+    locale conservés, domaine intact. Les valeurs sans '@' sont rendues telles
+    quelles, les valeurs nulles restent nulles.
+    """
+    if pc is None:
+        series = values.astype("string")
+        parts = series.str.extract(EMAIL_PATTERN)
+        local, domain = parts["local"], parts["domain"]
+        lengths = local.str.len()
+        stars = pd.Series("*", index=series.index, dtype="string")
+        inner = stars.str.repeat((lengths - 2).clip(lower=0).fillna(0).astype(int))
+        masked_local = (local.str[0] + inner + local.str[-1]).where(lengths > 2, stars.str.repeat(lengths.fillna(0).astype(int)))
+        return (masked_local + "@" + domain).where(domain.notna(), series)
+
+    array = _to_arrow(values)
+    parts = pc.extract_regex(array, EMAIL_PATTERN)
+    local, domain = pc.struct_field(parts, "local"), pc.struct_field(parts, "domain")
+    lengths = pc.utf8_length(local)
+    masked_local = pc.if_else(
+        pc.greater(lengths, 2),
+        pc.binary_join_element_wise(
+            pc.utf8_slice_codeunits(local, 0, 1), _stars(pc.subtract(lengths, 2)),
+            pc.utf8_slice_codeunits(local, -1), "",
+        ),
+        _stars(lengths),
+    )
+    masked = pc.if_else(pc.is_null(parts), array, pc.binary_join_element_wise(masked_local, domain, "@"))
+    return _like_input(masked, values)
+
+
+def anonymize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Anonymise un enregistrement selon les règles `personal_data_fields`."""
+    return get_engine().anonymize_record(record)
+
+
+def anonymize_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Anonymise un lot d’enregistrements colonne par colonne (à préférer à anonymize_record)."""
+    return get_engine().anonymize_batch(records)
+
+
 if __name__ == "__main__":
     # Exemple d'utilisation
     sample_email = "ahmed.elmajid@example.com"
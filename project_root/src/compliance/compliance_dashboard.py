@@ -14,14 +14,14 @@ Fonctionnalités :
 import json
 import logging
 from datetime import datetime
-from elk_connector import ELKConnector
+from async_elk_connector import shared_connector
 
 logger = logging.getLogger("ComplianceDashboard")
 
 
 class ComplianceDashboard:
     def __init__(self, elk_config_path: str):
-        self.elk = ELKConnector(elk_config_path)
+        self.elk = shared_connector(elk_config_path)
 
     def fetch_logs(self, category: str, start_date: str = None, end_date: str = None):
         """Récupère les logs d’une catégorie pour une période donnée."""
@@ -0,0 +1,91 @@
+"""
+crypto_shredding.py
+-------------------
+Ce module chiffre les champs personnels avec une clé propre à chaque personne
+concernée, afin que le droit à l’oubli se résume à détruire cette clé
+(crypto-shredding) au lieu de réécrire chaque fichier et index.
+
+Fonctionnalités :
+- Chiffrement / déchiffrement par lots des champs listés dans `gdpr_config.yaml`
+- Un seul chargement de clés par lot (SubjectKeyring.get_ciphers)
+- Effacement en temps constant par personne
+"""
+
+import logging
+from typing import Dict, Any, List, Iterable
+
+import yaml
+from key_management import KeyManager
+from subject_keyring import SubjectKeyring
+
+logger = logging.getLogger("CryptoShredding")
+
+ENCRYPTED_PREFIX = "enc:"
+
+
+class CryptoShredder:
+    def __init__(self, keyring: SubjectKeyring, encrypted_fields: List[str], subject_field: str = "user_id"):
+        self.keyring = keyring
+        self.encrypted_fields = list(encrypted_fields)
+        self.subject_field = subject_field
+
+    @classmethod
+    def from_config(cls, gdpr_config_path: str = "config/gdpr_config.yaml", key_manager: KeyManager = None):
+        """Construit le module depuis la section `crypto_shredding`, ou None s’il est désactivé."""
+        with open(gdpr_config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f).get("gdpr", {}).get("crypto_shredding", {})
+        if not config.get("enabled", False):
+            return None
+        keyring = SubjectKeyring(
+            key_manager or KeyManager(),
+            db_path=config.get("keyring_path", "config/subject_keys.db"),
+            cache_size=config.get("cache_size", 100_000),
+        )
+        return cls(keyring, config.get("encrypted_fields", []), config.get("subject_field", "user_id"))
+
+    def encrypt_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Chiffre sur place les champs personnels d’un lot d’enregistrements.
+        Les enregistrements d’une personne déjà effacée perdent ces champs.
+        """
+        ciphers = self.keyring.get_ciphers(
+            r.get(self.subject_field) for r in records if r.get(self.subject_field) not in (None, "")
+        )
+        for record in records:
+            subject = record.get(self.subject_field)
+            if subject in (None, ""):
+                continue
+            cipher = ciphers.get(str(subject))
+            for field in self.encrypted_fields:
+                value = record.get(field)
+                if value in (None, "") or (isinstance(value, str) and value.startswith(ENCRYPTED_PREFIX)):
+                    continue
+                record[field] = ENCRYPTED_PREFIX + cipher.encrypt(str(value)) if cipher else None
+        return records
+
+    def decrypt_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Déchiffre sur place ; les champs d’une personne effacée deviennent None."""
+        ciphers = self.keyring.get_ciphers(
+            (r.get(self.subject_field) for r in records if r.get(self.subject_field) not in (None, "")),
+            create=False,
+        )
+        for record in records:
+            cipher = ciphers.get(str(record.get(self.subject_field)))
+            for field in self.encrypted_fields:
+                value = record.get(field)
+                if isinstance(value, str) and value.startswith(ENCRYPTED_PREFIX):
+                    record[field] = cipher.decrypt(value[len(ENCRYPTED_PREFIX):]) if cipher else None
+        return records
+
+    def forget(self, user_ids: Iterable[str]) -> int:
+        """Droit à l’oubli : destruction des clés des personnes concernées."""
+        return self.keyring.destroy(user_ids)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    shredder = CryptoShredder(SubjectKeyring(KeyManager()), ["email", "first_name"])
+    rows = shredder.encrypt_records([{"user_id": "U1", "email": "ahmed.elmajid@example.com", "first_name": "Ahmed"}])
+    print(rows)
+    shredder.forget(["U1"])
+    print(shredder.decrypt_records(rows))
@@ -0,0 +1,255 @@
+"""
+deletion_scheduler.py
+---------------------
+Ce module planifie les suppressions logiques GDPR : une demande d’effacement
+est exécutée définitivement après le délai de grâce
+`right_to_be_forgotten.retention_period_days`.
+
+Les échéances sont conservées dans une file à priorité persistante (arbre B
+SQLite trié par échéance) : l’ajout et l’extraction des éléments échus coûtent
+O(log n), même avec des millions de demandes en attente, sans parcours quotidien.
+
+Fonctionnalités :
+- Planification / annulation d’une demande pendant le délai de grâce
+- Extraction par lots des demandes échues, avec réservation (claim) et acquittement
+- Reprise automatique des lots réservés par un processus interrompu
+- Nouvelle tentative des échecs avec attente exponentielle (compteur d’essais) :
+  un lot n’est acquitté que si toutes ses tâches d’effacement ont réussi
+- Attente des tâches bornée (erase_timeout) : un lot encore en cours est relâché
+- Boucle continue qui dort jusqu’à la prochaine échéance et transmet les lots à l’ErasureExecutor
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import yaml
+from erasure_executor import ErasureExecutor
+
+logger = logging.getLogger("DeletionScheduler")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_deletions (
+    due_at INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    hard_delete INTEGER NOT NULL DEFAULT 0,
+    requested_at TEXT NOT NULL,
+    claimed_at INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (due_at, user_id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS pending_by_user ON pending_deletions (user_id);
+"""
+
+
+class DeletionScheduler:
+    def __init__(self, db_path: str = "data/pending_deletions.db", grace_days: int = 30,
+                 batch_size: int = 10000, max_sleep: float = 60, claim_timeout: int = 3600,
+                 retry_base: int = 60, retry_max: int = 3600, erase_timeout: float = 3600):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pending_deletions)")}
+        if "attempts" not in columns:
+            # File créée avant le compteur d’essais
+            with self.conn:
+                self.conn.execute("ALTER TABLE pending_deletions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self.grace_seconds = int(grace_days * 86400)
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self.claim_timeout = claim_timeout
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.erase_timeout = erase_timeout
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    @classmethod
+    def from_config(cls, gdpr_config_path: str = "config/gdpr_config.yaml"):
+        """Construit le planificateur depuis la section `right_to_be_forgotten`."""
+        with open(gdpr_config_path, "r", encoding="utf-8") as f:
+            rtbf = yaml.safe_load(f).get("gdpr", {}).get("right_to_be_forgotten", {})
+        scheduler = rtbf.get("scheduler", {})
+        return cls(
+            db_path=scheduler.get("db_path", "data/pending_deletions.db"),
+            grace_days=rtbf.get("retention_period_days", 30),
+            batch_size=scheduler.get("batch_size", 10000),
+            max_sleep=scheduler.get("max_sleep_seconds", 60),
+            claim_timeout=scheduler.get("claim_timeout_seconds", 3600),
+            retry_base=scheduler.get("retry_base_seconds", 60),
+            retry_max=scheduler.get("retry_max_seconds", 3600),
+            erase_timeout=scheduler.get("erase_timeout_seconds", 3600),
+        )
+
+    # ----------------------------------------------------------
+    # Planification
+    # ----------------------------------------------------------
+    def schedule(self, user_ids: Iterable[str], delete: bool = False, now: Optional[float] = None) -> int:
+        """
+        Enregistre des demandes d’effacement échéant après le délai de grâce.
+        Une nouvelle demande pour une personne déjà en attente conserve l’échéance
+        la plus proche ; une suppression demandée l’emporte sur une anonymisation.
+        """
+        now = time.time() if now is None else now
+        due_at = int(now) + self.grace_seconds
+        requested_at = datetime.utcfromtimestamp(now).isoformat()
+        rows = [(due_at, str(uid), int(delete), requested_at) for uid in user_ids]
+        with self._lock, self.conn:
+            for row in rows:
+                existing = self.conn.execute(
+                    "SELECT due_at, hard_delete FROM pending_deletions WHERE user_id = ?", (row[1],)
+                ).fetchone()
+                if existing and existing[0] <= due_at:
+                    self.conn.execute(
+                        "UPDATE pending_deletions SET hard_delete = MAX(hard_delete, ?) WHERE user_id = ?",
+                        (row[2], row[1]),
+                    )
+                    continue
+                if existing:
+                    self.conn.execute("DELETE FROM pending_deletions WHERE user_id = ?", (row[1],))
+                    row = (row[0], row[1], max(row[2], existing[1]), row[3])
+                self.conn.execute(
+                    "INSERT INTO pending_deletions (due_at, user_id, hard_delete, requested_at) VALUES (?, ?, ?, ?)", row
+                )
+        self._wakeup.set()
+        logger.info(f"{len(rows)} demandes d’effacement planifiées (échéance {datetime.utcfromtimestamp(due_at).isoformat()}).")
+        return len(rows)
+
+    def cancel(self, user_ids: Iterable[str]) -> int:
+        """Annule des demandes encore dans leur délai de grâce (et non réservées)."""
+        with self._lock, self.conn:
+            cursor = self.conn.executemany(
+                "DELETE FROM pending_deletions WHERE user_id = ? AND claimed_at IS NULL",
+                ((str(uid),) for uid in user_ids),
+            )
+        return cursor.rowcount
+
+    def next_due(self) -> Optional[int]:
+        """Échéance la plus proche parmi les demandes non réservées (lecture du minimum)."""
+        row = self.conn.execute(
+            "SELECT MIN(due_at) FROM pending_deletions WHERE claimed_at IS NULL"
+        ).fetchone()
+        return row[0] if row else None
+
+    def pending_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pending_deletions").fetchone()[0]
+
+    # ----------------------------------------------------------
+    # Extraction des éléments échus
+    # ----------------------------------------------------------
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> Dict[bool, List[str]]:
+        """
+        Réserve un lot de demandes échues, regroupées par type (suppression ou anonymisation).
+        Les éléments doivent ensuite être acquittés (ack) ou relâchés (release).
+        """
+        now = int(time.time() if now is None else now)
+        limit = limit or self.batch_size
+        with self._lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT due_at, user_id, hard_delete FROM pending_deletions "
+                "WHERE due_at <= ? AND claimed_at IS NULL ORDER BY due_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE pending_deletions SET claimed_at = ? WHERE due_at = ? AND user_id = ?",
+                ((now, due_at, user_id) for due_at, user_id, _ in rows),
+            )
+        batches: Dict[bool, List[str]] = {}
+        for _, user_id, hard_delete in rows:
+            batches.setdefault(bool(hard_delete), []).append(user_id)
+        return batches
+
+    def ack(self, user_ids: Iterable[str]):
+        """Retire définitivement des demandes exécutées."""
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM pending_deletions WHERE user_id = ?", ((str(u),) for u in user_ids))
+
+    def release(self, user_ids: Iterable[str], now: Optional[float] = None):
+        """
+        Remet en attente des demandes dont l’exécution a échoué : l’échéance est
+        repoussée de retry_base * 2^essais (plafonné à retry_max) pour ne pas
+        relancer en boucle un effacement qui échoue.
+        """
+        now = int(time.time() if now is None else now)
+        user_ids = [str(u) for u in user_ids]
+        with self._lock, self.conn:
+            for user_id in user_ids:
+                row = self.conn.execute(
+                    "SELECT attempts FROM pending_deletions WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                delay = min(self.retry_max, self.retry_base * 2 ** min(row[0], 30))
+                self.conn.execute(
+                    "UPDATE pending_deletions SET claimed_at = NULL, attempts = attempts + 1, due_at = ? "
+                    "WHERE user_id = ?",
+                    (now + delay, user_id),
+                )
+
+    def recover_stale_claims(self, now: Optional[float] = None) -> int:
+        """Relâche les lots réservés par un processus interrompu."""
+        now = int(time.time() if now is None else now)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE pending_deletions SET claimed_at = NULL WHERE claimed_at IS NOT NULL AND claimed_at < ?",
+                (now - self.claim_timeout,),
+            )
+        return cursor.rowcount
+
+    # ----------------------------------------------------------
+    # Exécution continue
+    # ----------------------------------------------------------
+    def run_once(self, erase: Callable[..., object], now: Optional[float] = None) -> int:
+        """
+        Transmet un lot de demandes échues à `erase(user_ids, delete=..., timeout=...)`.
+        Le lot n’est acquitté que si chaque tâche a réussi (ErasureExecutor.succeeded) :
+        erreur, échecs de documents, conflits de version ou tâche encore en cours
+        à l’expiration du délai le remettent en attente.
+        """
+        processed = 0
+        for hard_delete, user_ids in self.pop_due(now).items():
+            try:
+                tasks = erase(user_ids, delete=hard_delete, timeout=self.erase_timeout)
+            except Exception as e:
+                logger.error(f"Échec d’effacement de {len(user_ids)} personnes, nouvelle tentative ultérieure : {e}")
+                self.release(user_ids, now)
+                continue
+            if isinstance(tasks, list) and not all(ErasureExecutor.succeeded(task) for task in tasks):
+                logger.error(f"Effacement incomplet ou inachevé de {len(user_ids)} personnes, nouvelle tentative ultérieure.")
+                self.release(user_ids, now)
+                continue
+            self.ack(user_ids)
+            processed += len(user_ids)
+        return processed
+
+    def run_forever(self, erase: Callable[..., object], stop_event: Optional[threading.Event] = None):
+        """
+        Traite le backlog en continu : les lots échus sont vidés immédiatement,
+        puis la boucle dort jusqu’à la prochaine échéance (bornée par max_sleep).
+        """
+        stop_event = stop_event or threading.Event()
+        self.recover_stale_claims()
+        logger.info(f"Planificateur de suppressions démarré ({self.pending_count()} demandes en attente).")
+        while not stop_event.is_set():
+            if self.run_once(erase):
+                continue
+            next_due = self.next_due()
+            delay = self.max_sleep if next_due is None else min(self.max_sleep, max(0.0, next_due - time.time()))
+            self._wakeup.clear()
+            self._wakeup.wait(delay)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    scheduler = DeletionScheduler.from_config("config/gdpr_config.yaml")
+    executor = ErasureExecutor("config/gdpr_config.yaml")
+    scheduler.run_forever(executor.erase)
@@ -0,0 +1,236 @@
+"""
+erasure_executor.py
+-------------------
+Ce module applique le droit à l’oubli en masse sur les copies des données
+personnelles déjà indexées dans Elasticsearch (compliance-logs-*, audit-logs-*,
+gdpr_compliance_events).
+
+Fonctionnalités :
+- Regroupement de nombreux `user_id` dans une seule requête `terms` par index
+- Anonymisation via `_update_by_query` ou suppression via `_delete_by_query`
+- Découpage en slices et limitation du débit (requests_per_second)
+- Suivi asynchrone des tâches Elasticsearch via l’API `_tasks`
+"""
+
+import time
+import logging
+from typing import Dict, Any, List, Iterable, Optional
+
+import yaml
+from elk_connector import ElkConnector
+
+logger = logging.getLogger("ErasureExecutor")
+
+DEFAULT_INDICES = ["compliance-logs-*", "audit-logs-*", "gdpr_compliance_events"]
+MAX_TERMS = 65536  # limite `index.max_terms_count` par défaut
+
+# Script Painless appliqué à chaque document (racine + sous-objet `context`)
+ANONYMIZE_SCRIPT = """
+def targets = [ctx._source];
+if (ctx._source.context instanceof Map) { targets.add(ctx._source.context); }
+for (def doc : targets) {
+  for (def f : params.hash_fields) {
+    if (doc.containsKey(f) && doc[f] != null) { doc[f] = doc[f].toString().sha256(); }
+  }
+  for (def f : params.remove_fields) { doc.remove(f); }
+  for (def f : params.year_fields) {
+    def v = doc[f];
+    if (v != null && v.toString().length() >= 4) { doc[f] = v.toString().substring(0, 4); }
+  }
+}
+ctx._source.gdpr_erased = true;
+"""
+
+
+class ErasureExecutor:
+    """
+    Exécute l’effacement de plusieurs personnes concernées en une passe par index.
+    Les tâches sont lancées côté Elasticsearch (wait_for_completion=false)
+    puis suivies ensemble jusqu’à leur terminaison.
+    """
+
+    def __init__(self, gdpr_config_path: str = "config/gdpr_config.yaml", connector: ElkConnector = None):
+        self.connector = connector or ElkConnector()
+        config = self._load_config(gdpr_config_path)
+        erasure = config.get("right_to_be_forgotten", {}).get("erasure", {})
+
+        self.indices = erasure.get("indices", DEFAULT_INDICES)
+        self.subject_fields = erasure.get("subject_fields", ["user_id"])
+        self.batch_size = min(int(erasure.get("batch_size", 10000)), MAX_TERMS)
+        self.slices = erasure.get("slices", "auto")
+        self.requests_per_second = erasure.get("requests_per_second", 500)
+        self.poll_interval = float(erasure.get("poll_interval_seconds", 5))
+        self.script_params = self._build_script_params(config.get("personal_data_fields", []))
+
+    @staticmethod
+    def _load_config(path: str) -> Dict[str, Any]:
+        """Charge la section `gdpr` du fichier YAML."""
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f).get("gdpr", {})
+
+    def _build_script_params(self, fields: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Traduit les stratégies de `personal_data_fields` en paramètres Painless.
+        Le masquage regex n’étant pas disponible côté Painless, les champs
+        `mask` sont hachés ; l’identifiant de la personne l’est aussi.
+        """
+        params = {"hash_fields": [], "remove_fields": [], "year_fields": []}
+        for field in fields:
+            strategy = field.get("anonymization")
+            if strategy in ("hash", "mask"):
+                params["hash_fields"].append(field["name"])
+            elif strategy == "remove":
+                params["remove_fields"].append(field["name"])
+            elif strategy == "generalize" and field.get("rule") == "convert_to_year":
+                params["year_fields"].append(field["name"])
+        for subject_field in self.subject_fields:
+            leaf = subject_field.split(".")[-1]
+            if leaf not in params["hash_fields"]:
+                params["hash_fields"].append(leaf)
+        return params
+
+    # ----------------------------------------------------------
+    # Construction des requêtes
+    # ----------------------------------------------------------
+    def _subject_query(self, user_ids: List[str]) -> Dict[str, Any]:
+        """Requête `terms` couvrant tous les champs portant l’identifiant."""
+        return {
+            "bool": {
+                "should": [{"terms": {field: user_ids}} for field in self.subject_fields],
+                "minimum_should_match": 1,
+                "must_not": [{"term": {"gdpr_erased": True}}],
+            }
+        }
+
+    def _batches(self, user_ids: Iterable[str]) -> Iterable[List[str]]:
+        unique_ids = sorted({str(uid) for uid in user_ids if uid not in (None, "")})
+        for start in range(0, len(unique_ids), self.batch_size):
+            yield unique_ids[start:start + self.batch_size]
+
+    # ----------------------------------------------------------
+    # Lancement des tâches
+    # ----------------------------------------------------------
+    def submit(self, user_ids: Iterable[str], delete: bool = False,
+               indices: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Lance une tâche `_update_by_query` (ou `_delete_by_query`) par index
+        et par lot de `user_id`, sans attendre leur terminaison.
+        `indices` restreint la cible (ex : index connus via SubjectIndex).
+        """
+        endpoint = "_delete_by_query" if delete else "_update_by_query"
+        params = {
+            "wait_for_completion": "false",
+            "conflicts": "proceed",
+            "slices": self.slices,
+            "requests_per_second": self.requests_per_second,
+            "ignore_unavailable": "true",
+            "allow_no_indices": "true",
+        }
+
+        tasks = []
+        for batch in self._batches(user_ids):
+            body = {"query": self._subject_query(batch)}
+            if not delete:
+                body["script"] = {"lang": "painless", "source": ANONYMIZE_SCRIPT, "params": self.script_params}
+
+            for index in indices or self.indices:
+                url = f"{self.connector.elastic_url}/{index}/{endpoint}"
+                try:
+                    response = self.connector.session.post(url, params=params, json=body, timeout=30)
+                    response.raise_for_status()
+                except Exception as e:
+                    logger.error(f"Échec du lancement de {endpoint} sur {index} : {e}")
+                    tasks.append({"index": index, "task": None, "subjects": len(batch), "user_ids": batch,
+                                  "error": str(e)})
+                    continue
+
+                task_id = response.json().get("task")
+                logger.info(f"Tâche {endpoint} lancée sur {index} pour {len(batch)} personnes : {task_id}")
+                tasks.append({"index": index, "task": task_id, "subjects": len(batch), "user_ids": batch,
+                              "action": endpoint})
+        return tasks
+
+    # ----------------------------------------------------------
+    # Suivi des tâches
+    # ----------------------------------------------------------
+    def poll(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Interroge l’API `_tasks` une fois pour chaque tâche encore en cours."""
+        pending = []
+        for task in tasks:
+            if not task.get("task") or task.get("completed"):
+                continue
+            url = f"{self.connector.elastic_url}/_tasks/{task['task']}"
+            try:
+                status = self.connector.session.get(url, timeout=10).json()
+            except Exception as e:
+                logger.warning(f"Suivi impossible de la tâche {task['task']} : {e}")
+                pending.append(task)
+                continue
+
+            if status.get("completed"):
+                task["completed"] = True
+                task["response"] = status.get("response", {})
+                task["error"] = status.get("error")
+                failures = task["response"].get("failures", [])
+                logger.info(
+                    f"Tâche {task['task']} terminée sur {task['index']} : "
+                    f"{task['response'].get('updated', 0)} mis à jour, "
+                    f"{task['response'].get('deleted', 0)} supprimés, {len(failures)} échecs, "
+                    f"{task['response'].get('version_conflicts', 0)} conflits de version"
+                )
+            else:
+                pending.append(task)
+        return pending
+
+    @staticmethod
+    def succeeded(task: Dict[str, Any]) -> bool:
+        """
+        Tâche terminée sans erreur, échec de document ni conflit de version.
+        Avec `conflicts=proceed`, un document modifié pendant la tâche (ingestion
+        concurrente) est ignoré et compté dans `version_conflicts` : il reste en
+        clair, la tâche doit être relancée (le filtre `gdpr_erased` la rend peu coûteuse).
+        """
+        response = task.get("response") or {}
+        return (bool(task.get("completed")) and not task.get("error") and not response.get("failures")
+                and not response.get("version_conflicts", 0))
+
+    def wait(self, tasks: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Attend la fin de toutes les tâches en les suivant ensemble.
+        Retourne les tâches encore en cours si le délai est dépassé.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        pending = self.poll(tasks)
+        while pending:
+            if deadline and time.monotonic() >= deadline:
+                logger.warning(f"{len(pending)} tâches d’effacement toujours en cours.")
+                break
+            time.sleep(self.poll_interval)
+            pending = self.poll(pending)
+        return pending
+
+    def rethrottle(self, tasks: List[Dict[str, Any]], requests_per_second: float):
+        """Ajuste le débit des tâches en cours (ex : hors heures ouvrées)."""
+        for task in tasks:
+            if not task.get("task") or task.get("completed"):
+                continue
+            action = task.get("action", "_update_by_query")
+            url = f"{self.connector.elastic_url}/{action}/{task['task']}/_rethrottle"
+            try:
+                self.connector.session.post(url, params={"requests_per_second": requests_per_second}, timeout=10)
+            except Exception as e:
+                logger.warning(f"Rethrottle impossible pour {task['task']} : {e}")
+
+    def erase(self, user_ids: Iterable[str], delete: bool = False, wait: bool = True,
+              indices: Optional[List[str]] = None, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Lance l’effacement d’un lot de personnes et attend éventuellement la fin (au plus `timeout` s)."""
+        tasks = self.submit(user_ids, delete=delete, indices=indices)
+        if wait:
+            self.wait(tasks, timeout=timeout)
+        return tasks
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    executor = ErasureExecutor("config/gdpr_config.yaml")
+    executor.erase(["103", "106"], delete=False)
@@ -7,6 +7,11 @@ les demandes des utilisateurs et en appliquant les règles de protection des don
 Fonctionnalités :
 - Anonymisation des données sensibles (emails, noms, identifiants)
 - Suppression ou anonymisation des données sur demande (droit à l’oubli)
+- Localisation des données d’une personne via l’index SubjectIndex
+- Effacement en masse des copies indexées dans Elasticsearch (ErasureExecutor)
+- Mode optionnel de crypto-shredding : effacement par destruction de clé
+- Suppression logique différée (délai de grâce) via DeletionScheduler
+- Publication des personnes effacées (tombstones) filtrées à l’ingestion
 - Traçabilité via Elasticsearch et logs
 - Alertes en cas d’échec ou de tentative de non-conformité
 """
@@ -14,16 +19,30 @@ Fonctionnalités :
 import hashlib
 import logging
 from datetime import datetime
-from elk_connector import ELKConnector
+from async_elk_connector import shared_connector
 from alerting_system import AlertingSystem
+from erasure_executor import ErasureExecutor
+from subject_index import SubjectIndex, KIND_INDEX
+from crypto_shredding import CryptoShredder
+from deletion_scheduler import DeletionScheduler
+from tombstone_filter import TombstoneFilter
+from anonymization_engine import AnonymizationEngine
 
 logger = logging.getLogger("GDPRVerification")
 
 
 class GDPRVerification:
-    def __init__(self, elk_config_path: str, smtp_config: dict, slack_webhook: str = None):
-        self.elk = ELKConnector(elk_config_path)
+    def __init__(self, elk_config_path: str, smtp_config: dict, slack_webhook: str = None,
+                 gdpr_config_path: str = "config/gdpr_config.yaml", subject_index: SubjectIndex = None):
+        self.elk = shared_connector(elk_config_path)
         self.alert_system = AlertingSystem(elk_config_path, rules_path=None, smtp_config=smtp_config, slack_webhook=slack_webhook)
+        self.gdpr_config_path = gdpr_config_path
+        self._erasure_executor = None
+        self.subject_index = subject_index
+        self.crypto_shredder = CryptoShredder.from_config(gdpr_config_path)
+        self._deletion_scheduler = None
+        self._tombstones = None
+        self.anonymizer = AnonymizationEngine.from_config(gdpr_config_path)
 
     @staticmethod
     def anonymize_value(value: str) -> str:
@@ -33,12 +52,12 @@ class GDPRVerification:
         return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
     def anonymize_record(self, record: dict, fields_to_anonymize: list) -> dict:
-        """Anonymise les champs sensibles d’un enregistrement."""
-        for field in fields_to_anonymize:
-            if field in record:
-                original = record[field]
-                record[field] = self.anonymize_value(record[field])
-                logger.info(f"Champ anonymisé : {field} ({original} -> {record[field][:8]}...)")
+        """
+        Anonymise les champs sensibles d’un enregistrement selon leur stratégie
+        dans `gdpr_config.yaml` (hash pour les champs non configurés).
+        """
+        self.anonymizer.anonymize_record(record, fields_to_anonymize)
+        logger.info(f"Champs anonymisés : {', '.join(f for f in fields_to_anonymize if f in record)}")
         return record
 
     def delete_or_anonymize(self, record: dict, fields_to_anonymize: list, delete: bool = False):
@@ -56,6 +75,89 @@ class GDPRVerification:
         self._log_gdpr_action(record, delete)
         return record
 
+    def erase_subjects(self, user_ids: list, delete: bool = False, wait: bool = True,
+                       timeout: float = None) -> list:
+        """
+        Applique le droit à l’oubli à un lot de personnes sur tous les index ELK :
+        une tâche par index au lieu d’une requête par personne et par index.
+        Les personnes sont d’abord publiées comme tombstones pour que l’ingestion
+        cesse d’indexer leurs nouveaux événements.
+        En mode crypto-shredding, la clé de chaque personne est aussi détruite :
+        les champs chiffrés à l’ingestion deviennent illisibles partout, mais
+        l’effacement ELK reste appliqué aux documents écrits en clair.
+        """
+        if self._tombstones is None:
+            self._tombstones = TombstoneFilter.from_config(self.gdpr_config_path)
+        self._tombstones.add(user_ids)
+
+        shredded = 0
+        if self.crypto_shredder is not None:
+            shredded = self.crypto_shredder.forget(user_ids)
+
+        if self._erasure_executor is None:
+            self._erasure_executor = ErasureExecutor(self.gdpr_config_path)
+
+        # Avec un index des personnes, seuls les index contenant leurs documents sont ciblés
+        indices = sorted(self.subject_index.indices_for(user_ids)) if self.subject_index else None
+        if indices == []:
+            logger.info("Aucun document indexé pour ces personnes, aucun effacement ELK nécessaire.")
+            tasks = []
+        else:
+            tasks = self._erasure_executor.erase(user_ids, delete=delete, wait=wait, indices=indices, timeout=timeout)
+        # Sans attente, seuls les échecs de lancement sont connus
+        failed = [t for t in tasks if (not ErasureExecutor.succeeded(t) if wait else t.get("error"))]
+        if failed:
+            failed_indices = ", ".join(sorted({t["index"] for t in failed}))
+            self.alert_system.send_alert("critical", f"Échec d’effacement GDPR sur : {failed_indices}")
+
+        if wait:
+            self.release_locations(tasks)
+
+        action = {"subjects": len(set(user_ids)), "tasks": len(tasks)}
+        if self.crypto_shredder is not None:
+            action["keys_destroyed"] = shredded
+        self._log_gdpr_action(action, delete)
+        return tasks
+
+    def release_locations(self, tasks: list) -> int:
+        """
+        Retire du SubjectIndex les documents des seules tâches d’effacement réussies.
+        Les lignes CSV et les index en échec restent localisés pour une reprise.
+        """
+        if self.subject_index is None:
+            return 0
+        released = 0
+        for task in tasks:
+            if ErasureExecutor.succeeded(task):
+                self.subject_index.remove_locations(task["user_ids"], KIND_INDEX, task["index"])
+                released += 1
+        return released
+
+    @property
+    def deletion_scheduler(self) -> DeletionScheduler:
+        if self._deletion_scheduler is None:
+            self._deletion_scheduler = DeletionScheduler.from_config(self.gdpr_config_path)
+        return self._deletion_scheduler
+
+    def request_erasure(self, user_ids: list, delete: bool = False) -> int:
+        """
+        Suppression logique : la demande est enregistrée et sera exécutée après
+        le délai `retention_period_days`, sauf annulation entre-temps.
+        """
+        count = self.deletion_scheduler.schedule(user_ids, delete=delete)
+        self._log_gdpr_action({"subjects": count, "status": "scheduled"}, delete)
+        return count
+
+    def run_deletion_scheduler(self, stop_event=None):
+        """Exécute en continu les suppressions arrivées à échéance."""
+        self.deletion_scheduler.run_forever(self.erase_subjects, stop_event=stop_event)
+
+    def locate_subject(self, user_id: str) -> dict:
+        """Répond à une demande d’accès : fichiers, lignes et documents de la personne."""
+        if self.subject_index is None:
+            raise RuntimeError("Aucun SubjectIndex configuré pour GDPRVerification.")
+        return self.subject_index.locate(user_id)
+
     def _log_gdpr_action(self, record: dict, deleted: bool):
         """Envoie un log GDPR vers Elasticsearch."""
         event = {
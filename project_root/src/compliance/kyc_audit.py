@@ -16,7 +16,7 @@ import os
 import yaml
 import logging
 from datetime import datetime
-from elk_connector import ELKConnector
+from async_elk_connector import shared_connector
 from alerting_system import AlertingSystem
 
 logger = logging.getLogger("KYCAudit")
@@ -24,7 +24,7 @@ logger = logging.getLogger("KYCAudit")
 
 class KYCAudit:
     def __init__(self, rules_path: str, elk_config_path: str, smtp_config: dict, slack_webhook: str = None):
-        self.elk = ELKConnector(elk_config_path)
+        self.elk = shared_connector(elk_config_path)
         self.alert_system = AlertingSystem(elk_config_path, rules_path, smtp_config, slack_webhook)
         self.rules = self._load_rules(rules_path)
 
@@ -0,0 +1,117 @@
+"""
+retention_manager.py
+--------------------
+Ce module applique les durées de rétention sur des données partitionnées dans
+le temps : l’expiration consiste à supprimer des partitions ou des index entiers
+plutôt qu’à réécrire les enregistrements un par un.
+
+Fonctionnalités :
+- Lecture des durées de `retention` et du partitionnement depuis `elk_config.yaml`
+- Suppression des partitions de fichiers entièrement expirées
+- Suppression des index datés expirés (`prefix-YYYY.MM.DD`)
+- Purge par requête limitée aux seuls index à cheval sur la date limite
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import yaml
+from elk_connector import ElkConnector
+from partitioning import classify_partitions, list_partitions, drop_partitions, index_key
+
+logger = logging.getLogger("RetentionManager")
+
+DURATION_UNITS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+
+def parse_duration_days(value: Any) -> int:
+    """Convertit une durée ("30d", "12w", 90) en nombre de jours."""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip().lower()
+    if value[-1] in DURATION_UNITS:
+        return int(value[:-1]) * DURATION_UNITS[value[-1]]
+    return int(value)
+
+
+class RetentionManager:
+    def __init__(self, elk_config_path: str = "config/elk_config.yaml", connector: ElkConnector = None):
+        with open(elk_config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        self.retention = {
+            # audit_logs -> audit-logs (préfixe des index datés)
+            name.replace("_", "-"): parse_duration_days(duration)
+            for name, duration in (config.get("retention") or {}).items()
+        }
+        partitioning = config.get("index_partitioning", {})
+        self.timestamp_field = partitioning.get("timestamp_field", "@timestamp")
+        self.connector = connector
+
+    @staticmethod
+    def cutoff(retention_days: int, today: Optional[date] = None) -> date:
+        return (today or datetime.utcnow().date()) - timedelta(days=retention_days)
+
+    # ----------------------------------------------------------
+    # Partitions de fichiers
+    # ----------------------------------------------------------
+    def expire_directory(self, base_dir: str, retention_days: int, today: Optional[date] = None) -> List[str]:
+        """
+        Supprime les partitions entièrement expirées d’un dossier et retourne
+        les clés des partitions à cheval, qui nécessitent un traitement ligne à ligne.
+        """
+        classes = classify_partitions(list_partitions(base_dir), self.cutoff(retention_days, today))
+        drop_partitions(base_dir, classes["expired"])
+        return classes["straddling"]
+
+    # ----------------------------------------------------------
+    # Index Elasticsearch datés
+    # ----------------------------------------------------------
+    def _list_indices(self, prefix: str) -> List[str]:
+        url = f"{self.connector.elastic_url}/_cat/indices/{prefix}-*"
+        response = self.connector.session.get(url, params={"format": "json", "h": "index"}, timeout=30)
+        response.raise_for_status()
+        return [entry["index"] for entry in response.json()]
+
+    def expire_indices(self, prefix: str, retention_days: int, today: Optional[date] = None) -> Dict[str, List[str]]:
+        """
+        Supprime les index datés entièrement expirés ; seuls les index à cheval
+        (partitionnement mensuel) reçoivent un `_delete_by_query` borné.
+        """
+        self.connector = self.connector or ElkConnector()
+        cutoff = self.cutoff(retention_days, today)
+        by_key: Dict[str, List[str]] = {}
+        for name in self._list_indices(prefix):
+            key = index_key(name, prefix)
+            if key:
+                by_key.setdefault(key, []).append(name)
+
+        classes = classify_partitions(sorted(by_key), cutoff)
+        expired = [name for key in classes["expired"] for name in by_key[key]]
+        straddling = [name for key in classes["straddling"] for name in by_key[key]]
+
+        # Une requête DELETE par lot d’index (longueur d’URL bornée)
+        for start in range(0, len(expired), 50):
+            names = ",".join(expired[start:start + 50])
+            self.connector.session.delete(f"{self.connector.elastic_url}/{names}", timeout=60).raise_for_status()
+            logger.info(f"Index expirés supprimés : {names}")
+
+        if straddling:
+            body = {"query": {"range": {self.timestamp_field: {"lt": cutoff.isoformat()}}}}
+            url = f"{self.connector.elastic_url}/{','.join(straddling)}/_delete_by_query"
+            self.connector.session.post(
+                url, params={"wait_for_completion": "false", "conflicts": "proceed"}, json=body, timeout=30
+            ).raise_for_status()
+            logger.info(f"Purge partielle lancée sur : {', '.join(straddling)}")
+
+        return {"deleted": expired, "purged": straddling}
+
+    def apply_index_retention(self, today: Optional[date] = None) -> Dict[str, Dict[str, List[str]]]:
+        """Applique toutes les durées de la section `retention` de elk_config.yaml."""
+        return {prefix: self.expire_indices(prefix, days, today) for prefix, days in self.retention.items()}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    manager = RetentionManager("config/elk_config.yaml")
+    print(manager.apply_index_retention())
@@ -0,0 +1,186 @@
+"""
+subject_index.py
+----------------
+Ce module maintient un index des emplacements des données de chaque personne
+concernée (`user_id`), alimenté au moment de l’ingestion, afin de répondre aux
+demandes d’accès et d’effacement GDPR sans parcourir tous les fichiers et index.
+
+Fonctionnalités :
+- Association user_id -> fichiers CSV + numéros de ligne
+- Association user_id -> index Elasticsearch + identifiants de documents
+- Stockage compact (SQLite, table WITHOUT ROWID, conteneurs dictionnarisés)
+- Mises à jour incrémentales par fichier ou par lot de documents
+"""
+
+import os
+import csv
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Set, Tuple, Any
+
+logger = logging.getLogger("SubjectIndex")
+
+KIND_FILE = "file"
+KIND_INDEX = "index"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS containers (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (kind, name)
+);
+CREATE TABLE IF NOT EXISTS locations (
+    user_id TEXT NOT NULL,
+    container_id INTEGER NOT NULL,
+    ref NOT NULL,
+    PRIMARY KEY (user_id, container_id, ref)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS locations_by_container ON locations (container_id);
+"""
+
+
+class SubjectIndex:
+    """
+    Index persistant des emplacements de données par personne concernée.
+    Une recherche coûte un parcours de clé primaire, indépendamment du volume total.
+    """
+
+    def __init__(self, db_path: str = "data/subject_index.db"):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._containers: Dict[Tuple[str, str], int] = {}
+
+    def close(self):
+        self.conn.close()
+
+    def _container_id(self, kind: str, name: str) -> int:
+        """Retourne (en le créant si besoin) l’identifiant compact d’un fichier ou index."""
+        key = (kind, name)
+        if key not in self._containers:
+            self.conn.execute("INSERT OR IGNORE INTO containers (kind, name) VALUES (?, ?)", key)
+            row = self.conn.execute("SELECT id FROM containers WHERE kind = ? AND name = ?", key).fetchone()
+            self._containers[key] = row[0]
+        return self._containers[key]
+
+    # ----------------------------------------------------------
+    # Alimentation à l’ingestion
+    # ----------------------------------------------------------
+    def add_file_rows(self, path: str, rows: Iterable[Tuple[str, int]]):
+        """Enregistre les couples (user_id, numéro de ligne) d’un fichier CSV."""
+        with self.conn:
+            container_id = self._container_id(KIND_FILE, os.path.normpath(path))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO locations (user_id, container_id, ref) VALUES (?, ?, ?)",
+                ((str(uid), container_id, int(row)) for uid, row in rows if uid not in (None, "")),
+            )
+
+    def add_documents(self, index: str, docs: Iterable[Tuple[str, str]]):
+        """Enregistre les couples (user_id, _id) d’un index Elasticsearch."""
+        with self.conn:
+            container_id = self._container_id(KIND_INDEX, index)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO locations (user_id, container_id, ref) VALUES (?, ?, ?)",
+                ((str(uid), container_id, str(doc_id)) for uid, doc_id in docs if uid not in (None, "")),
+            )
+
+    def index_csv(self, path: str, subject_field: str = "user_id") -> int:
+        """
+        (Ré)indexe un fichier CSV en flux : les anciennes entrées du fichier
+        sont remplacées. Les lignes sont numérotées à partir de 0 (hors en-tête).
+        """
+        self.remove_container(KIND_FILE, path)
+        count = 0
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if subject_field not in (reader.fieldnames or []):
+                logger.info(f"Aucune colonne {subject_field} dans {path}, fichier ignoré.")
+                return 0
+            batch = []
+            for row_number, record in enumerate(reader):
+                batch.append((record.get(subject_field), row_number))
+                if len(batch) >= 10000:
+                    self.add_file_rows(path, batch)
+                    count += len(batch)
+                    batch = []
+            self.add_file_rows(path, batch)
+            count += len(batch)
+        logger.info(f"{count} lignes indexées pour {path}")
+        return count
+
+    # ----------------------------------------------------------
+    # Consultation
+    # ----------------------------------------------------------
+    def locate(self, user_id: str) -> Dict[str, Dict[str, List[Any]]]:
+        """Retourne les fichiers (lignes) et index (documents) contenant la personne."""
+        result = {"files": {}, "indices": {}}
+        cursor = self.conn.execute(
+            "SELECT c.kind, c.name, l.ref FROM locations l JOIN containers c ON c.id = l.container_id "
+            "WHERE l.user_id = ?",
+            (str(user_id),),
+        )
+        for kind, name, ref in cursor:
+            bucket = result["files"] if kind == KIND_FILE else result["indices"]
+            bucket.setdefault(name, []).append(ref)
+        return result
+
+    def files_for(self, user_ids: Iterable[str]) -> Dict[str, Set[int]]:
+        """Regroupe par fichier les lignes appartenant à un lot de personnes."""
+        files: Dict[str, Set[int]] = {}
+        for user_id in set(map(str, user_ids)):
+            for path, rows in self.locate(user_id)["files"].items():
+                files.setdefault(path, set()).update(rows)
+        return files
+
+    def indices_for(self, user_ids: Iterable[str]) -> Set[str]:
+        """Index Elasticsearch contenant au moins un document d’un lot de personnes."""
+        indices: Set[str] = set()
+        for user_id in set(map(str, user_ids)):
+            indices.update(self.locate(user_id)["indices"])
+        return indices
+
+    # ----------------------------------------------------------
+    # Maintenance
+    # ----------------------------------------------------------
+    def remove_subject(self, user_id: str):
+        """Supprime toutes les entrées d’une personne (après effacement)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM locations WHERE user_id = ?", (str(user_id),))
+
+    def remove_locations(self, user_ids: Iterable[str], kind: str, name: str):
+        """
+        Supprime les entrées d’un seul fichier ou index pour un lot de personnes,
+        une fois leur effacement confirmé à cet emplacement.
+        """
+        if kind == KIND_FILE:
+            name = os.path.normpath(name)
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM containers WHERE kind = ? AND name = ?", (kind, name)).fetchone()
+            if row:
+                self.conn.executemany(
+                    "DELETE FROM locations WHERE user_id = ? AND container_id = ?",
+                    ((str(uid), row[0]) for uid in user_ids),
+                )
+
+    def remove_container(self, kind: str, name: str):
+        """Supprime les entrées d’un fichier ou index (réécriture, purge de rétention)."""
+        if kind == KIND_FILE:
+            name = os.path.normpath(name)
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM containers WHERE kind = ? AND name = ?", (kind, name)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM locations WHERE container_id = ?", (row[0],))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    index = SubjectIndex("data/subject_index.db")
+    for filename in os.listdir("data"):
+        if filename.endswith(".csv"):
+            index.index_csv(os.path.join("data", filename))
+    print(index.locate("103"))
@@ -0,0 +1,234 @@
+"""
+token_vault.py
+--------------
+Ce module fournit un coffre de jetons réversible : chaque valeur personnelle est
+remplacée par un jeton déterministe (Pseudonymizer), et la valeur d’origine est
+conservée chiffrée pour une dé-pseudonymisation autorisée (enquêtes AML).
+
+Le coffre est réparti en fichiers SQLite (shards) choisis d’après le jeton et
+lus via mmap : une recherche ne parcourt que l’arbre B d’un shard, sans charger
+la table de correspondance en mémoire.
+
+Fonctionnalités :
+- Tokenisation / dé-tokenisation par lots (une requête par shard)
+- Valeurs d’origine chiffrées (AES-256, clé KeyManager, rotation supportée)
+- Cache LRU des entrées fréquentes
+- Contrôle des rôles autorisés (`compliance_rules.access_control.authorized_roles`)
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import yaml
+from encryption_utils import EncryptionUtils
+from key_management import KeyManager
+from anonymization_utils import Pseudonymizer, TOKEN_ALPHABET
+
+logger = logging.getLogger("TokenVault")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    kek_id TEXT NOT NULL,
+    ciphertext BLOB NOT NULL,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+BATCH_SIZE = 500  # limite du nombre de paramètres SQLite par requête
+TOKEN_LENGTH = 16
+METADATA_FILE = "vault.json"  # paramètres fixés à la création (nombre de shards)
+
+
+class TokenVault:
+    def __init__(self, key_manager: KeyManager, vault_dir: str = "data/token_vault", shards: int = 16,
+                 cache_size: int = 100_000, mmap_size: int = 256 * 1024 * 1024,
+                 authorized_roles: Iterable[str] = ("compliance_officer", "data_protection_admin")):
+        """
+        :param key_manager: fournit la clé de tokenisation et la clé de chiffrement des valeurs
+        :param vault_dir: répertoire des fichiers shard_XX.db
+        :param shards: nombre de shards (fixé à la création du coffre, enregistré dans vault.json ;
+                       rouvrir le coffre avec une autre valeur lève ValueError)
+        :param cache_size: nombre d’entrées conservées dans chaque cache LRU
+        :param mmap_size: taille projetée en mémoire par shard (PRAGMA mmap_size)
+        """
+        self.key_manager = key_manager
+        self.vault_dir = vault_dir
+        self.shards = shards
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.authorized_roles = set(authorized_roles)
+        self.pseudonymizer = Pseudonymizer.from_key_manager(key_manager, length=TOKEN_LENGTH, cache_size=cache_size)
+        self._shard_of = {c: i % shards for i, c in enumerate(TOKEN_ALPHABET)}
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        self._keks: Dict[str, EncryptionUtils] = {}
+        self._stored: "OrderedDict[str, None]" = OrderedDict()  # jetons déjà présents dans le coffre
+        self._values: "OrderedDict[str, str]" = OrderedDict()  # jeton -> valeur déchiffrée
+        os.makedirs(vault_dir, exist_ok=True)
+        self._check_metadata()
+
+    def _check_metadata(self):
+        """
+        Enregistre le nombre de shards à la création du coffre et le vérifie à
+        chaque ouverture : une autre valeur enverrait les recherches vers le
+        mauvais shard (jetons introuvables, doublons à la tokenisation).
+        """
+        path = os.path.join(self.vault_dir, METADATA_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f).get("shards")
+            if stored != self.shards:
+                raise ValueError(
+                    f"Coffre {self.vault_dir} créé avec {stored} shards, ouvert avec {self.shards}."
+                )
+            return
+        # Coffre antérieur à vault.json : un shard au-delà du nombre demandé trahit un autre découpage
+        existing = [name for name in os.listdir(self.vault_dir) if name.startswith("shard_") and name.endswith(".db")]
+        if any(int(name[6:-3]) >= self.shards for name in existing):
+            raise ValueError(f"Coffre {self.vault_dir} créé avec plus de {self.shards} shards.")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"shards": self.shards, "created_at": datetime.utcnow().isoformat()}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_config(cls, gdpr_config_path: str = "config/gdpr_config.yaml", key_manager: KeyManager = None):
+        with open(gdpr_config_path, "r", encoding="utf-8") as f:
+            gdpr = yaml.safe_load(f).get("gdpr", {})
+        config = gdpr.get("token_vault", {})
+        roles = gdpr.get("compliance_rules", {}).get("access_control", {}).get("authorized_roles", [])
+        return cls(
+            key_manager or KeyManager(),
+            vault_dir=config.get("path", "data/token_vault"),
+            shards=config.get("shards", 16),
+            cache_size=config.get("cache_size", 100_000),
+            mmap_size=config.get("mmap_size_mb", 256) * 1024 * 1024,
+            authorized_roles=roles,
+        )
+
+    def _conn(self, shard: int) -> sqlite3.Connection:
+        conn = self._conns.get(shard)
+        if conn is None:
+            path = os.path.join(self.vault_dir, f"shard_{shard:02d}.db")
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.executescript(SCHEMA)
+            self._conns[shard] = conn
+        return conn
+
+    def _kek(self, kek_id: str) -> EncryptionUtils:
+        if kek_id not in self._keks:
+            self._keks[kek_id] = EncryptionUtils(self.key_manager.get_key(kek_id))
+        return self._keks[kek_id]
+
+    def _remember(self, cache: OrderedDict, key: str, value=None):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _group_by_shard(self, tokens: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        shard_of = self._shard_of
+        for token in tokens:
+            groups.setdefault(shard_of.get(token[:1], 0), []).append(token)
+        return groups
+
+    # ----------------------------------------------------------
+    # Tokenisation
+    # ----------------------------------------------------------
+    def tokenize(self, values: Iterable[str]) -> List[str]:
+        """
+        Remplace un lot de valeurs par leurs jetons et enregistre les valeurs
+        encore inconnues du coffre (chiffrées, une transaction par shard).
+        """
+        values = [str(v) if v else "" for v in values]
+        tokens = self.pseudonymizer.pseudonymize_many(values)
+
+        new: Dict[str, str] = {}
+        for value, token in zip(values, tokens):
+            if token and token not in self._stored:
+                new[token] = value
+        if not new:
+            return tokens
+
+        kek_id = self.key_manager.get_active_key_id()
+        kek = self._kek(kek_id)
+        now = datetime.utcnow().isoformat()
+        for shard, shard_tokens in self._group_by_shard(new).items():
+            conn = self._conn(shard)
+            existing = set()
+            for start in range(0, len(shard_tokens), BATCH_SIZE):
+                chunk = shard_tokens[start:start + BATCH_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    row[0] for row in conn.execute(f"SELECT token FROM tokens WHERE token IN ({placeholders})", chunk)
+                )
+            rows = [
+                (token, kek_id, kek.encrypt_bytes(new[token].encode("utf-8")), now)
+                for token in shard_tokens if token not in existing
+            ]
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO tokens (token, kek_id, ciphertext, created_at) VALUES (?, ?, ?, ?)", rows
+                )
+            for token in shard_tokens:
+                self._remember(self._stored, token)
+        return tokens
+
+    # ----------------------------------------------------------
+    # Dé-tokenisation (accès restreint)
+    # ----------------------------------------------------------
+    def detokenize(self, tokens: Iterable[str], role: str) -> Dict[str, Optional[str]]:
+        """
+        Retourne la valeur d’origine de chaque jeton (None si inconnu).
+        Réservé aux rôles autorisés ; chaque accès est journalisé sans les valeurs.
+        """
+        if role not in self.authorized_roles:
+            logger.warning(f"Dé-tokenisation refusée pour le rôle {role}.")
+            raise PermissionError(f"Rôle non autorisé à dé-tokeniser : {role}")
+
+        result: Dict[str, Optional[str]] = {}
+        missing: List[str] = []
+        for token in dict.fromkeys(tokens):
+            if token in self._values:
+                self._values.move_to_end(token)
+                result[token] = self._values[token]
+            else:
+                missing.append(token)
+
+        for shard, shard_tokens in self._group_by_shard(missing).items():
+            conn = self._conn(shard)
+            for start in range(0, len(shard_tokens), BATCH_SIZE):
+                chunk = shard_tokens[start:start + BATCH_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT token, kek_id, ciphertext FROM tokens WHERE token IN ({placeholders})", chunk
+                )
+                for token, kek_id, ciphertext in rows:
+                    value = self._kek(kek_id).decrypt_bytes(ciphertext).decode("utf-8")
+                    self._remember(self._values, token, value)
+                    result[token] = value
+        for token in missing:
+            result.setdefault(token, None)
+
+        logger.info(f"Dé-tokenisation de {len(result)} jetons par le rôle {role}.")
+        return result
+
+    def close(self):
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    vault = TokenVault.from_config("config/gdpr_config.yaml")
+    tokens = vault.tokenize(["FR7630006000011234567890189", "ahmed.elmajid@example.com"])
+    print(tokens)
+    print(vault.detokenize(tokens, role="compliance_officer"))
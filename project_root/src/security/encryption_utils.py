@@ -31,30 +31,34 @@ class EncryptionUtils:
             self.key = get_random_bytes(32)
             logger.info("Nouvelle clé AES-256 générée.")
     
-    def encrypt(self, plaintext: str) -> str:
-        """Chiffre une chaîne de caractères et retourne le résultat en base64."""
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Chiffre des octets et retourne IV + texte chiffré (format binaire compact)."""
         cipher = AES.new(self.key, AES.MODE_CBC)
-        plaintext_bytes = plaintext.encode('utf-8')
         # Padding PKCS7
-        pad_len = 16 - len(plaintext_bytes) % 16
-        plaintext_bytes += bytes([pad_len]) * pad_len
-        ciphertext = cipher.encrypt(plaintext_bytes)
-        result = base64.b64encode(cipher.iv + ciphertext).decode('utf-8')
-        logger.debug(f"Chiffrement réussi pour : {plaintext[:8]}...")
-        return result
+        pad_len = 16 - len(data) % 16
+        data += bytes([pad_len]) * pad_len
+        return cipher.iv + cipher.encrypt(data)
 
-    def decrypt(self, b64_ciphertext: str) -> str:
-        """Déchiffre une chaîne base64 chiffrée avec AES-256."""
-        data = base64.b64decode(b64_ciphertext)
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        """Déchiffre un bloc IV + texte chiffré produit par encrypt_bytes."""
         iv = data[:16]
         ciphertext = data[16:]
         cipher = AES.new(self.key, AES.MODE_CBC, iv)
         plaintext_bytes = cipher.decrypt(ciphertext)
         # Retirer padding PKCS7
         pad_len = plaintext_bytes[-1]
-        plaintext_bytes = plaintext_bytes[:-pad_len]
-        plaintext = plaintext_bytes.decode('utf-8')
-        logger.debug(f"Déchiffrement réussi : {plaintext[:8]}...")
+        return plaintext_bytes[:-pad_len]
+
+    def encrypt(self, plaintext: str) -> str:
+        """Chiffre une chaîne de caractères et retourne le résultat en base64."""
+        result = base64.b64encode(self.encrypt_bytes(plaintext.encode('utf-8'))).decode('utf-8')
+        logger.debug("Chiffrement réussi.")
+        return result
+
+    def decrypt(self, b64_ciphertext: str) -> str:
+        """Déchiffre une chaîne base64 chiffrée avec AES-256."""
+        plaintext = self.decrypt_bytes(base64.b64decode(b64_ciphertext)).decode('utf-8')
+        logger.debug("Déchiffrement réussi.")
         return plaintext
 
 
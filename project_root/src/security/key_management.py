@@ -70,6 +70,17 @@ class KeyManager:
         active_key = self.keys[-1]
         return base64.b64decode(active_key["key"])
 
+    def get_key(self, key_id: str) -> bytes:
+        """Retourne une clé par identifiant (ex : déchiffrement après rotation)."""
+        for key_info in self.keys:
+            if key_info["id"] == key_id:
+                return base64.b64decode(key_info["key"])
+        raise KeyError(f"Clé inconnue : {key_id}")
+
+    def get_active_key_id(self) -> str:
+        """Retourne l'identifiant de la clé active."""
+        return self.keys[-1]["id"]
+
     def rotate_keys_if_needed(self):
         """Vérifie si une rotation de clé est nécessaire et en génère une nouvelle le cas échéant."""
         last_key_date = datetime.fromisoformat(self.keys[-1]["created_at"])
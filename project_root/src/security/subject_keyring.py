@@ -0,0 +1,158 @@
+"""
+subject_keyring.py
+------------------
+Ce module gère un trousseau de clés de données par personne concernée
+(`user_id`) pour l’effacement par destruction de clé (crypto-shredding).
+
+Chaque clé de données (DEK, AES-256) est chiffrée par la clé active du
+KeyManager (KEK) et stockée sous forme binaire compacte. Détruire la clé
+d’une personne rend illisibles toutes ses données, quel que soit leur volume.
+
+Fonctionnalités :
+- Création et chargement par lots des clés de données
+- Cache LRU des clés déchiffrées (pas d’accès disque sur le chemin chaud)
+- Destruction définitive d’une clé (secure_delete + checkpoint WAL)
+- Déchiffrement des clés emballées avec une KEK antérieure après rotation
+"""
+
+import os
+import sqlite3
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from Crypto.Random import get_random_bytes
+from encryption_utils import EncryptionUtils
+from key_management import KeyManager
+
+logger = logging.getLogger("SubjectKeyring")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subject_keys (
+    user_id TEXT PRIMARY KEY,
+    kek_id TEXT,
+    wrapped BLOB,
+    destroyed_at TEXT
+) WITHOUT ROWID;
+"""
+BATCH_SIZE = 500  # limite du nombre de paramètres SQLite par requête
+
+
+class SubjectKeyring:
+    def __init__(self, key_manager: KeyManager, db_path: str = "config/subject_keys.db", cache_size: int = 100_000):
+        """
+        :param key_manager: gestionnaire fournissant la clé de chiffrement des clés (KEK)
+        :param db_path: fichier SQLite du trousseau
+        :param cache_size: nombre de clés déchiffrées conservées en mémoire
+        """
+        self.key_manager = key_manager
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, EncryptionUtils]" = OrderedDict()
+        self._keks: Dict[str, EncryptionUtils] = {}
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA secure_delete=ON")
+        self.conn.executescript(SCHEMA)
+
+    def _kek(self, kek_id: str) -> EncryptionUtils:
+        if kek_id not in self._keks:
+            self._keks[kek_id] = EncryptionUtils(self.key_manager.get_key(kek_id))
+        return self._keks[kek_id]
+
+    def _remember(self, user_id: str, cipher: EncryptionUtils):
+        self._cache[user_id] = cipher
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ----------------------------------------------------------
+    # Chargement des clés
+    # ----------------------------------------------------------
+    def get_ciphers(self, user_ids: Iterable[str], create: bool = True) -> Dict[str, Optional[EncryptionUtils]]:
+        """
+        Retourne, pour un lot de personnes, l’utilitaire de chiffrement de leur clé.
+        Les clés absentes sont créées en une transaction ; les clés détruites
+        donnent None (aucune nouvelle clé n’est émise pour une personne effacée).
+        """
+        result: Dict[str, Optional[EncryptionUtils]] = {}
+        missing: List[str] = []
+        for user_id in dict.fromkeys(map(str, user_ids)):
+            cipher = self._cache.get(user_id)
+            if cipher is not None:
+                self._cache.move_to_end(user_id)
+                result[user_id] = cipher
+            else:
+                missing.append(user_id)
+
+        to_create = set(missing)
+        for start in range(0, len(missing), BATCH_SIZE):
+            chunk = missing[start:start + BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT user_id, kek_id, wrapped FROM subject_keys WHERE user_id IN ({placeholders})", chunk
+            )
+            for user_id, kek_id, wrapped in rows:
+                to_create.discard(user_id)
+                if wrapped is None:
+                    result[user_id] = None
+                    continue
+                cipher = EncryptionUtils(self._kek(kek_id).decrypt_bytes(wrapped))
+                self._remember(user_id, cipher)
+                result[user_id] = cipher
+
+        if to_create and create:
+            kek_id = self.key_manager.get_active_key_id()
+            kek = self._kek(kek_id)
+            new_rows = []
+            for user_id in to_create:
+                dek = get_random_bytes(32)
+                new_rows.append((user_id, kek_id, kek.encrypt_bytes(dek)))
+                cipher = EncryptionUtils(dek)
+                self._remember(user_id, cipher)
+                result[user_id] = cipher
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO subject_keys (user_id, kek_id, wrapped) VALUES (?, ?, ?)", new_rows
+                )
+            logger.info(f"{len(new_rows)} clés de données créées.")
+        return result
+
+    def get_cipher(self, user_id: str, create: bool = True) -> Optional[EncryptionUtils]:
+        return self.get_ciphers([user_id], create=create).get(str(user_id))
+
+    # ----------------------------------------------------------
+    # Destruction (droit à l’oubli)
+    # ----------------------------------------------------------
+    def destroy(self, user_ids: Iterable[str]) -> int:
+        """
+        Détruit les clés de données : coût constant par personne, quel que soit
+        le volume de données chiffrées. La ligne est conservée sans clé pour
+        empêcher la réémission d’une clé pour une personne effacée.
+        """
+        user_ids = [str(uid) for uid in user_ids]
+        now = datetime.utcnow().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO subject_keys (user_id, kek_id, wrapped, destroyed_at) VALUES (?, NULL, NULL, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET kek_id = NULL, wrapped = NULL, destroyed_at = excluded.destroyed_at",
+                ((uid, now) for uid in user_ids),
+            )
+        # Écrase les anciennes pages encore présentes dans le journal WAL
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        for user_id in user_ids:
+            self._cache.pop(user_id, None)
+        logger.info(f"{len(user_ids)} clés de données détruites (crypto-shredding).")
+        return len(user_ids)
+
+    def is_destroyed(self, user_id: str) -> bool:
+        row = self.conn.execute(
+            "SELECT destroyed_at FROM subject_keys WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def close(self):
+        self.conn.close()
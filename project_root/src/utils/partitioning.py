@@ -0,0 +1,196 @@
+"""
+----------------
+Organisation des données et archives en partitions temporelles (jour ou mois).
+
+Fonctionnalités :
+- Nommage des partitions fichiers (`dt=YYYY-MM-DD` / `dt=YYYY-MM`) et des index (`prefix-YYYY.MM.DD`)
+- Motifs d’index couvrant une fenêtre de dates (élagage des recherches)
+- Écriture CSV routée vers la partition de chaque ligne
+- Classement des partitions par rapport à une date limite de rétention :
+  expirées (suppression en O(1)), à cheval (traitement ligne à ligne), conservées
+"""
+
+import os
+import csv
+import shutil
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger("partitioning")
+
+PARTITION_PREFIX = "dt="
+GRANULARITIES = ("day", "month")
+
+
+# --- Nommage des partitions --- #
+
+def partition_key(value: Any, granularity: str = "day") -> Optional[str]:
+    """
+    Retourne la clé de partition (YYYY-MM-DD ou YYYY-MM) d’une date ou d’une
+    chaîne ISO, ou None si la valeur n’est pas une date exploitable.
+    """
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    if not isinstance(value, str) or len(value) < 10 or value[4] != "-" or value[7] != "-":
+        return None
+    return value[:10] if granularity == "day" else value[:7]
+
+
+def partition_bounds(key: str) -> Tuple[date, date]:
+    """Retourne l’intervalle [début, fin[ couvert par une clé de partition."""
+    year, month = int(key[:4]), int(key[5:7])
+    if len(key) >= 10:
+        start = date(year, month, int(key[8:10]))
+        return start, date.fromordinal(start.toordinal() + 1)
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def partition_dir(base_dir: str, key: str) -> str:
+    return os.path.join(base_dir, f"{PARTITION_PREFIX}{key}")
+
+
+def index_name(prefix: str, value: Any, granularity: str = "day") -> str:
+    """Nom d’index daté (ex : compliance-logs-2025.10.14)."""
+    key = partition_key(value, granularity) or partition_key(datetime.utcnow(), granularity)
+    return f"{prefix}-{key.replace('-', '.')}"
+
+
+def index_key(name: str, prefix: str) -> Optional[str]:
+    """Extrait la clé de partition d’un nom d’index daté, sinon None."""
+    suffix = name[len(prefix) + 1:] if name.startswith(prefix + "-") else ""
+    key = suffix.replace(".", "-")
+    if len(key) in (7, 10) and key[:4].isdigit() and key[4] == "-":
+        return key
+    return None
+
+
+def index_patterns(prefix: str, start: date, end: date, granularity: str = "day") -> List[str]:
+    """
+    Motifs d’index couvrant [start, end] (bornes incluses) : noms datés pour les
+    mois ou années partiellement couverts, `prefix-YYYY.MM.*` / `prefix-YYYY.*`
+    pour ceux couverts en entier (liste courte même sur plusieurs années).
+    """
+    patterns = []
+    year = start.year
+    while year <= end.year:
+        year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+        if start <= year_start and year_end <= end:
+            patterns.append(f"{prefix}-{year}.*")
+            year += 1
+            continue
+        for month in range(1, 13):
+            month_start, month_end = partition_bounds(f"{year}-{month:02d}")
+            month_end = date.fromordinal(month_end.toordinal() - 1)
+            if month_end < start or month_start > end:
+                continue
+            if granularity == "month":
+                patterns.append(f"{prefix}-{year}.{month:02d}")
+            elif start <= month_start and month_end <= end:
+                patterns.append(f"{prefix}-{year}.{month:02d}.*")
+            else:
+                day = max(start, month_start)
+                while day <= min(end, month_end):
+                    patterns.append(f"{prefix}-{day.strftime('%Y.%m.%d')}")
+                    day = date.fromordinal(day.toordinal() + 1)
+        year += 1
+    return patterns
+
+
+# --- Classement par rapport à la rétention --- #
+
+def classify_partitions(keys: List[str], cutoff: date) -> Dict[str, List[str]]:
+    """
+    Répartit les clés de partition :
+    - expired : entièrement antérieures à la date limite (suppression directe)
+    - straddling : contiennent la date limite (traitement ligne à ligne)
+    - retained : entièrement postérieures (aucun traitement)
+    """
+    result = {"expired": [], "straddling": [], "retained": []}
+    for key in keys:
+        start, end = partition_bounds(key)
+        if end <= cutoff:
+            result["expired"].append(key)
+        elif start < cutoff:
+            result["straddling"].append(key)
+        else:
+            result["retained"].append(key)
+    return result
+
+
+def list_partitions(base_dir: str) -> List[str]:
+    """Liste les clés de partition présentes sous un dossier."""
+    if not os.path.isdir(base_dir):
+        return []
+    return sorted(
+        name[len(PARTITION_PREFIX):]
+        for name in os.listdir(base_dir)
+        if name.startswith(PARTITION_PREFIX) and os.path.isdir(os.path.join(base_dir, name))
+    )
+
+
+def drop_partitions(base_dir: str, keys: List[str]) -> int:
+    """Supprime des partitions entières (un appel système par partition, sans lecture)."""
+    for key in keys:
+        shutil.rmtree(partition_dir(base_dir, key), ignore_errors=True)
+        logger.info(f"Partition expirée supprimée : {partition_dir(base_dir, key)}")
+    return len(keys)
+
+
+# --- Écriture partitionnée --- #
+
+class PartitionedCSVWriter:
+    """
+    Écrit des lignes CSV dans la partition correspondant à `date_field`.
+    Les fichiers sont écrits en `.part` puis renommés à la fermeture.
+    """
+
+    def __init__(self, base_dir: str, filename: str, fieldnames: List[str],
+                 date_field: str = "created_at", granularity: str = "day"):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularité inconnue : {granularity}")
+        self.base_dir = base_dir
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.date_field = date_field
+        self.granularity = granularity
+        self._files: Dict[str, Any] = {}
+        self._writers: Dict[str, csv.DictWriter] = {}
+
+    def _writer_for(self, key: str) -> csv.DictWriter:
+        if key not in self._writers:
+            directory = partition_dir(self.base_dir, key)
+            os.makedirs(directory, exist_ok=True)
+            f = open(os.path.join(directory, self.filename + ".part"), "w", newline="", encoding="utf-8")
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+            writer.writeheader()
+            self._files[key] = f
+            self._writers[key] = writer
+        return self._writers[key]
+
+    def writerow(self, record: Dict[str, Any]):
+        key = (partition_key(record.get(self.date_field), self.granularity)
+               or partition_key(datetime.utcnow(), self.granularity))
+        self._writer_for(key).writerow(record)
+
+    def close(self) -> List[str]:
+        """Finalise les fichiers et retourne leurs chemins."""
+        paths = []
+        for key, f in self._files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            final_path = os.path.join(partition_dir(self.base_dir, key), self.filename)
+            os.replace(final_path + ".part", final_path)
+            paths.append(final_path)
+        self._files.clear()
+        self._writers.clear()
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
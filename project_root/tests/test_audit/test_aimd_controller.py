@@ -0,0 +1,48 @@
+"""
+---------------------------
+Tests unitaires pour aimd_controller.py
+Vérifie l’augmentation additive, la diminution multiplicative et l’attente après rejet.
+"""
+
+import unittest
+from src.audit import aimd_controller
+
+
+class TestAIMDController(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.controller = aimd_controller.AIMDController(
+            initial_batch=500, min_batch=50, max_batch=1000, batch_step=100,
+            max_concurrency=4, concurrency_every=2, target_latency=1.0,
+        )
+
+    def test_additive_increase_bounded(self):
+        """Les succès rapides augmentent lots et concurrence jusqu’aux bornes"""
+        for _ in range(20):
+            self.controller.record(latency=0.1)
+        self.assertEqual(self.controller.batch_size, 1000)
+        self.assertEqual(self.controller.concurrency, 4)
+
+    def test_multiplicative_decrease_on_rejection(self):
+        """Un rejet divise taille et concurrence ; l’attente croît avec les rejets consécutifs"""
+        for _ in range(4):
+            self.controller.record(latency=0.1)
+        self.controller.record(latency=0.1, rejected=True)
+        self.assertEqual(self.controller.batch_size, 450)
+        self.assertEqual(self.controller.concurrency, 1)
+        first = self.controller.backoff_delay()
+        self.controller.record(latency=0.1, rejected=True)
+        self.assertGreater(self.controller.backoff_delay(), first / 2)
+        self.assertLessEqual(first, self.controller.base_backoff)
+
+    def test_high_latency_shrinks_batches(self):
+        """Une latence au-dessus de la cible réduit la taille des lots, sans descendre sous le minimum"""
+        for _ in range(30):
+            self.controller.record(latency=5.0)
+        self.assertEqual(self.controller.batch_size, 50)
+        self.assertEqual(self.controller.backoff_delay(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
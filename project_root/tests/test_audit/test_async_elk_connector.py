@@ -0,0 +1,247 @@
+"""
+---------------------------
+Tests unitaires pour async_elk_connector.py
+Vérifie la concurrence bornée, les écritures idempotentes, les recherches groupées,
+la bascule entre nœuds, la file de secours (documents non acquittés, rejeu à la
+reprise) et la façade synchrone, contre un serveur HTTP local.
+"""
+
+import os
+import json
+import asyncio
+import tempfile
+import threading
+import unittest
+from aiohttp import web
+from src.audit import async_elk_connector
+from src.audit.index_router import IndexRouter
+from src.audit.circuit_breaker import CLOSED, DEAD_LETTER_DIR
+
+
+class FakeElasticsearch:
+    """Serveur aiohttp minimal imitant les points d’entrée utilisés."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.ids = set()
+        self.searched = []
+        self.statuses = []  # statuts imposés aux prochains documents `_bulk`
+        app = web.Application()
+        app.router.add_put("/{index}/_create/{id}", self.create)
+        app.router.add_post("/{index}/_bulk", self.bulk)
+        app.router.add_post("/{index}/_search", self.search)
+        app.router.add_post("/_msearch", self.msearch)
+        self.runner = web.AppRunner(app)
+
+    async def start(self) -> str:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def _slow(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+    async def create(self, request):
+        await self._slow()
+        doc_id = request.match_info["id"]
+        status = 409 if doc_id in self.ids else 201
+        self.ids.add(doc_id)
+        return web.json_response({"_id": doc_id}, status=status)
+
+    async def bulk(self, request):
+        await self._slow()
+        lines = (await request.read()).splitlines()
+        items = []
+        for action in lines[::2]:
+            doc_id = json.loads(action)["create"]["_id"]
+            status = self.statuses.pop(0) if self.statuses else (409 if doc_id in self.ids else 201)
+            items.append({"create": {"_id": doc_id, "status": status}})
+            if status in (201, 409):
+                self.ids.add(doc_id)
+        errors = any(item["create"]["status"] not in (201, 409) for item in items)
+        return web.json_response({"errors": errors, "items": items})
+
+    async def search(self, request):
+        await self._slow()
+        self.searched.append(request.match_info["index"])
+        query = await request.json()
+        return web.json_response({"hits": {"hits": [{"_source": {"size": query["size"]}}]}})
+
+    async def msearch(self, request):
+        await self._slow()
+        lines = (await request.read()).splitlines()
+        responses = [
+            {"hits": {"hits": [{"_source": {"index": json.loads(header)["index"]}}]}}
+            for header in lines[::2]
+        ]
+        return web.json_response({"responses": responses})
+
+
+class TestAsyncElkConnector(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server = FakeElasticsearch()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_with_connector(self, scenario, max_concurrency=4):
+        async def main():
+            url = await self.server.start()
+            connector = async_elk_connector.AsyncElkConnector(
+                url, router=IndexRouter("test-logs"), max_concurrency=max_concurrency, spool_dir=self.tmp_dir.name
+            )
+            try:
+                return await scenario(connector)
+            finally:
+                await connector.close()
+                await self.server.runner.cleanup()
+        return asyncio.run(main())
+
+    def test_concurrency_bounded_by_semaphore(self):
+        """Plusieurs requêtes en vol, jamais plus que max_concurrency"""
+        async def scenario(connector):
+            events = [{"category": "AML", "transaction_id": f"TX{i}"} for i in range(20)]
+            return await asyncio.gather(*(connector.send_log(event) for event in events))
+
+        results = self.run_with_connector(scenario)
+        self.assertTrue(all(results))
+        self.assertEqual(self.server.max_in_flight, 4)
+
+    def test_send_log_idempotent(self):
+        """Un renvoi du même événement (409) compte comme acquitté"""
+        async def scenario(connector):
+            event = {"category": "KYC", "client_id": "C1"}
+            return [await connector.send_log(event), await connector.send_log(event)]
+
+        self.assertEqual(self.run_with_connector(scenario), [True, True])
+        self.assertEqual(len(self.server.ids), 1)
+
+    def test_send_logs_bulk_chunks(self):
+        """Les lots _bulk sont envoyés simultanément et tous les documents acquittés"""
+        async def scenario(connector):
+            events = [{"category": "GDPR", "user_id": str(i)} for i in range(25)]
+            return await connector.send_logs(events, batch_docs=5)
+
+        self.assertEqual(self.run_with_connector(scenario), 25)
+        self.assertGreater(self.server.max_in_flight, 1)
+
+    def test_search_and_msearch(self):
+        """search retourne les _source ; search_many groupe les requêtes en un aller-retour"""
+        async def scenario(connector):
+            single = await connector.search({"query": {"match_all": {}}}, size=10)
+            many = await connector.search_many([{"query": {"match_all": {}}}] * 3, index="logs-*")
+            return single, many
+
+        single, many = self.run_with_connector(scenario)
+        self.assertEqual(single, [{"size": 10}])
+        self.assertEqual(many, [[{"index": "logs-*"}]] * 3)
+        self.assertEqual(self.server.searched, ["test-logs-*"])
+
+    def test_search_pruned_to_date_range(self):
+        """Une recherche bornée dans le temps ne lit que les index datés de sa plage"""
+        async def scenario(connector):
+            query = {"query": {"bool": {"must": [
+                {"range": {"@timestamp": {"gte": "2025-01-01", "lte": "2025-03-31"}}},
+            ]}}}
+            return await connector.search(query)
+
+        self.run_with_connector(scenario)
+        self.assertEqual(self.server.searched, ["test-logs-2025.01.*,test-logs-2025.02.*,test-logs-2025.03.*"])
+
+    def test_unreachable_cluster_spools_writes(self):
+        """Cluster injoignable : l’écriture échoue vite et part en file de secours"""
+        connector = async_elk_connector.AsyncElkConnector(
+            "http://127.0.0.1:9", spool_dir=self.tmp_dir.name
+        )
+
+        async def main():
+            try:
+                return await connector.send_log({"category": "AML"})
+            finally:
+                await connector.close()
+
+        self.assertFalse(asyncio.run(main()))
+        self.assertEqual(len(list(connector.spool.segments("elasticsearch"))), 1)
+
+    def test_partial_bulk_spools_unacked(self):
+        """Réponse 200 partielle : les documents rejetés (429) vont en file, les refus (400) au rebut"""
+        async def scenario(connector):
+            self.server.statuses = [201, 429, 400]
+            events = [{"category": "AML", "transaction_id": f"TX{i}"} for i in range(3)]
+            return await connector.send_logs(events), list(connector.spool.segments("elasticsearch"))
+
+        acked, segments = self.run_with_connector(scenario)
+        self.assertEqual(acked, 1)
+        (_, spooled), = segments
+        self.assertEqual([json.loads(line).get("transaction_id") for line in spooled.splitlines()], [None, "TX1"])
+        with open(os.path.join(self.tmp_dir.name, DEAD_LETTER_DIR, "elasticsearch.ndjson"), "rb") as f:
+            self.assertEqual(json.loads(f.read().splitlines()[1])["transaction_id"], "TX2")
+
+    def test_probe_recovers_and_replays_spool(self):
+        """Circuit ouvert : la sonde constate le retour du cluster et la file est rejouée via _bulk"""
+        async def scenario(connector):
+            self.server.statuses = [429]
+            await connector.send_logs([{"transaction_id": "TX1"}, {"transaction_id": "TX2"}])
+            self.assertEqual(connector.spool.pending("elasticsearch"), 1)
+            connector.breaker.probe_interval = 0.05
+            for _ in range(async_elk_connector.BREAKER_FAILURES):
+                connector.breaker.record_failure()
+            for _ in range(100):
+                if connector.breaker.state == CLOSED and not connector.spool.pending("elasticsearch"):
+                    break
+                await asyncio.sleep(0.05)
+            return connector.breaker.state, connector.spool.pending("elasticsearch")
+
+        self.assertEqual(self.run_with_connector(scenario), (CLOSED, 0))
+        self.assertEqual(len(self.server.ids), 2)
+
+    def test_failover_across_nodes(self):
+        """Un nœud injoignable est écarté, les requêtes passent par le nœud restant"""
+        async def main():
+            url = await self.server.start()
+            connector = async_elk_connector.AsyncElkConnector(
+                ["http://127.0.0.1:9", url], spool_dir=self.tmp_dir.name
+            )
+            try:
+                results = [await connector.send_log({"transaction_id": f"TX{i}"}) for i in range(4)]
+                return results, connector.nodes.nodes[0].failures
+            finally:
+                await connector.close()
+                await self.server.runner.cleanup()
+
+        results, failures = asyncio.run(main())
+        self.assertEqual(results, [True] * 4)
+        self.assertEqual(failures, 1)
+
+    def test_sync_facade(self):
+        """La façade synchrone exécute les appels dans sa boucle dédiée"""
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        url = asyncio.run_coroutine_threadsafe(self.server.start(), loop).result()
+        elk = async_elk_connector.ELKConnector(
+            connector=async_elk_connector.AsyncElkConnector(url, spool_dir=self.tmp_dir.name)
+        )
+        try:
+            pending = [elk.send_log({"transaction_id": f"TX{i}"}, wait=False) for i in range(10)]
+            self.assertTrue(all(future.result() for future in pending))
+            self.assertEqual(elk.search_logs({"query": {"match_all": {}}}, size=5), [{"size": 5}])
+        finally:
+            elk.close()
+            asyncio.run_coroutine_threadsafe(self.server.runner.cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+        self.assertGreater(self.server.max_in_flight, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
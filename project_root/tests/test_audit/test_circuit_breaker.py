@@ -0,0 +1,123 @@
+"""
+---------------------------
+Tests unitaires pour circuit_breaker.py
+Vérifie les transitions fermé / ouvert / semi-ouvert et la file de secours
+(rejeu, quarantaine, documents au rebut).
+"""
+
+import os
+import tempfile
+import unittest
+from src.audit import circuit_breaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.clock = FakeClock()
+        self.breaker = circuit_breaker.CircuitBreaker("es", failure_threshold=2, reset_timeout=10, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        """Le circuit s’ouvre après le seuil d’échecs consécutifs et refuse les appels"""
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_single_trial(self):
+        """Après reset_timeout, un seul appel d’essai ; son échec rouvre le circuit"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    def test_backpressure_neither_success_nor_failure(self):
+        """Un 429 ne compte pas comme échec et libère l’appel d’essai du semi-ouvert"""
+        self.breaker.record_failure()
+        self.breaker.record_backpressure()
+        self.assertEqual(self.breaker.failures, 1)
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_backpressure()
+        self.assertEqual(self.breaker.state, circuit_breaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+
+class TestFallbackSpool(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.spool = circuit_breaker.FallbackSpool(self.tmp_dir.name, max_bytes=20)
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.tmp_dir.cleanup()
+
+    def test_replay_in_order_until_failure(self):
+        """Les segments sont rejoués dans l’ordre ; le rejeu s’arrête au premier échec"""
+        self.spool.append("logstash", b"a\n")
+        self.spool.append("logstash", b"b\n")
+        self.spool.append("logstash", b"c\n")
+        sent = []
+        self.assertEqual(self.spool.replay("logstash", lambda body: sent.append(body) or len(sent) < 2), 1)
+        self.assertEqual(sent, [b"a\n", b"b\n"])
+        self.assertEqual(self.spool.replay("logstash", lambda body: True), 2)
+
+    def test_unavailable_stops_without_counting(self):
+        """Destination indisponible (None) : arrêt du rejeu, aucun échec compté"""
+        self.spool.append("logstash", b"a\n")
+        for _ in range(self.spool.max_failures + 1):
+            self.assertEqual(self.spool.replay("logstash", lambda body: None), 0)
+        self.assertEqual(self.spool.pending("logstash"), 1)
+
+    def test_stuck_segment_quarantined(self):
+        """Un segment refusé max_failures fois est mis en quarantaine, le suivant est rejoué"""
+        self.spool.append("logstash", b"a\n")
+        self.spool.append("logstash", b"b\n")
+        sent = []
+
+        def send(body):
+            sent.append(body)
+            return body != b"a\n"
+        for _ in range(self.spool.max_failures - 1):
+            self.assertEqual(self.spool.replay("logstash", send), 0)
+        self.assertEqual(self.spool.replay("logstash", send), 1)
+        self.assertEqual(sent, [b"a\n"] * self.spool.max_failures + [b"b\n"])
+        self.assertEqual(self.spool.pending("logstash"), 0)
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp_dir.name, circuit_breaker.QUARANTINE_DIR))), 1)
+
+    def test_dead_letter_not_replayed(self):
+        """Les documents au rebut sont conservés à part et jamais rejoués"""
+        path = self.spool.dead_letter("es", b"x\n")
+        self.spool.dead_letter("es", b"y\n")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"x\ny\n")
+        self.assertEqual(self.spool.pending("es"), 0)
+
+    def test_size_limit(self):
+        """Au-delà de max_bytes, les nouveaux lots sont refusés"""
+        self.assertTrue(self.spool.append("es", b"x" * 15))
+        self.assertFalse(self.spool.append("es", b"y" * 15))
+
+
+if __name__ == "__main__":
+    unittest.main()
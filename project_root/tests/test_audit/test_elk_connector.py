@@ -0,0 +1,213 @@
+"""
+---------------------------
+Tests unitaires pour elk_connector.py
+Vérifie l’envoi idempotent (create + _id déterministe), le suivi des acquittements,
+le basculement vers la file de secours quand le circuit est ouvert, la mise au
+rebut des refus définitifs, le rejeu périodique et la bascule vers un autre nœud du cluster.
+"""
+
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import requests
+from src.audit import elk_connector
+from src.audit.circuit_breaker import FallbackSpool, OPEN, DEAD_LETTER_DIR, QUARANTINE_DIR
+from src.audit.node_pool import NodePool
+
+
+def bulk_response(statuses):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        "errors": any(status >= 300 for status in statuses),
+        "items": [{"create": {"status": status}} for status in statuses],
+    }
+    return response
+
+
+class TestElkConnector(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with patch.object(elk_connector, "SPOOL_REPLAY_INTERVAL", 0):  # rejeu déclenché par les tests
+            self.connector = elk_connector.ElkConnector()
+        self.connector.session = MagicMock()
+        self.connector.spool = FallbackSpool(self.tmp_dir.name)
+        for breaker in self.connector.breakers.values():
+            breaker.probe = None  # pas de sonde réseau pendant les tests
+        self.logs = [{"message": f"event {i}", "user_id": str(i)} for i in range(3)]
+        self.bodies = []
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.connector.close()
+        self.tmp_dir.cleanup()
+
+    def _dead_letters(self, sink):
+        path = os.path.join(self.tmp_dir.name, DEAD_LETTER_DIR, f"{sink}.ndjson")
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            return f.read().splitlines()
+
+    def _respond(self, *responses):
+        """Réponses `_bulk` successives (la dernière est répétée)."""
+        queue = list(responses)
+
+        def request(method, url, data, **kwargs):
+            self.bodies.append(bytes(data))
+            return bulk_response(queue.pop(0) if len(queue) > 1 else queue[0])
+        self.connector.session.request.side_effect = request
+
+    def test_conflict_counts_as_ack(self):
+        """Un 409 (document déjà indexé) est acquitté ; seul le document rejeté (429) est renvoyé"""
+        self.connector.controller.base_backoff = 0
+        self._respond([201, 409, 429], [201])
+        self.assertEqual(self.connector.bulk_send(self.logs, method="elasticsearch"), 3)
+
+        actions = [json.loads(line) for line in self.bodies[0].splitlines()[::2]]
+        self.assertTrue(all("create" in action for action in actions))
+        retried = self.bodies[1].splitlines()
+        self.assertEqual(len(retried), 2)
+        self.assertEqual(json.loads(retried[1])["message"], "event 2")
+
+    def test_rejections_shrink_batches_then_spool(self):
+        """Rejets répétés : lots réduits (AIMD) puis documents mis en file de secours"""
+        controller = self.connector.controller
+        controller.base_backoff = 0
+        initial = controller.batch_size
+        self._respond([429])
+        self.assertEqual(self.connector.bulk_send(self.logs[:1], method="elasticsearch"), 0)
+        self.assertEqual(len(self.bodies), elk_connector.BULK_MAX_ATTEMPTS)
+        self.assertLess(controller.batch_size, initial)
+        (_, spooled), = self.connector.spool.segments("elasticsearch")
+        self.assertEqual(json.loads(spooled.splitlines()[1])["message"], "event 0")
+
+    def test_resend_uses_same_ids(self):
+        """Renvoyer les mêmes logs produit exactement le même corps (mêmes _id)"""
+        self._respond([201, 201, 201])
+        self.connector.bulk_send(self.logs, method="elasticsearch")
+        self.connector.bulk_send(self.logs, method="elasticsearch")
+        self.assertEqual(self.bodies[0], self.bodies[1])
+
+    def test_send_ndjson_bulk_ignores_conflicts(self):
+        """Un lot _bulk dont les seules erreurs sont des 409 est un succès"""
+        self._respond([201, 409])
+        self.assertTrue(self.connector.send_ndjson(b"", bulk=True))
+        self._respond([201, 503])
+        self.assertFalse(self.connector.send_ndjson(b"", bulk=True, spool=False))
+
+    def test_permanent_rejection_dead_lettered(self):
+        """Un document refusé (400 mapping) va au rebut : ni renvoyé, ni mis en file de secours"""
+        self.connector.controller.base_backoff = 0
+        self._respond([201, 400, 201])
+        self.assertEqual(self.connector.bulk_send(self.logs, method="elasticsearch"), 2)
+        self.assertEqual(len(self.bodies), 1)
+        self.assertEqual(list(self.connector.spool.segments("elasticsearch")), [])
+        dead = self._dead_letters("elasticsearch")
+        self.assertEqual(len(dead), 2)
+        self.assertEqual(json.loads(dead[1])["message"], "event 1")
+
+    def test_whole_request_rejected_dead_lettered(self):
+        """Requête entière refusée (400) : lot au rebut, pas de file de secours"""
+        self.connector.session.request.return_value = MagicMock(status_code=400, text="bad request")
+        self.assertFalse(self.connector.send_to_logstash({"message": "x"}))
+        self.assertFalse(self.connector.send_ndjson(b'{"message": "y"}\n'))
+        self.assertEqual(list(self.connector.spool.segments("logstash")), [])
+        self.assertEqual(len(self._dead_letters("logstash")), 2)
+
+    def test_replay_quarantines_stuck_segment(self):
+        """Un segment refusé à chaque rejeu est mis en quarantaine ; les suivants passent"""
+        spool = self.connector.spool
+        stuck = b'{"create": {"_id": "a"}}\n{"message": "stuck"}\n'
+        spool.append("elasticsearch", stuck)
+        spool.append("elasticsearch", b'{"create": {"_id": "b"}}\n{"message": "ok"}\n')
+
+        def request(method, url, data, **kwargs):
+            return bulk_response([429] if b"stuck" in bytes(data) else [201])
+        self.connector.session.request.side_effect = request
+        for _ in range(spool.max_failures - 1):
+            self.assertEqual(self.connector.replay_spool("elasticsearch"), 0)
+        self.assertEqual(self.connector.replay_spool("elasticsearch"), 1)
+        self.assertEqual(spool.pending("elasticsearch"), 0)
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir.name, QUARANTINE_DIR))[0][:14], "elasticsearch-")
+
+    def test_replay_waits_while_unavailable(self):
+        """Destination indisponible : le rejeu s’arrête sans compter d’échec ni mettre en quarantaine"""
+        self.connector.spool.append("logstash", b'{"message": "x"}\n')
+        self.connector.session.request.return_value = MagicMock(status_code=503, text="unavailable")
+        for _ in range(self.connector.spool.max_failures + 1):
+            self.connector.breakers["logstash"].record_success()
+            self.assertEqual(self.connector.replay_spool("logstash"), 0)
+        self.assertEqual(self.connector.spool.pending("logstash"), 1)
+
+    def test_replay_on_startup(self):
+        """Un spool non vide laissé par un arrêt précédent est rejoué au démarrage"""
+        spool = FallbackSpool(self.tmp_dir.name)
+        spool.append("logstash", b'{"message": "x"}\n')
+        session = MagicMock()
+        session.request.return_value = MagicMock(status_code=200)
+        with patch.object(elk_connector, "SPOOL_DIR", self.tmp_dir.name), \
+                patch.object(elk_connector.ElkConnector, "_init_session", return_value=session):
+            connector = elk_connector.ElkConnector()
+        self.addCleanup(connector.close)
+        for _ in range(100):
+            if not spool.pending("logstash"):
+                break
+            connector._stop.wait(0.05)
+        self.assertEqual(spool.pending("logstash"), 0)
+        session.request.assert_called()
+
+    def test_backpressure_keeps_circuit_closed(self):
+        """Des 429 répétés ralentissent l’envoi (AIMD) sans ouvrir le circuit"""
+        self.connector.controller.base_backoff = 0
+        self.connector.session.request.return_value = MagicMock(status_code=429, text="too many requests")
+        for _ in range(elk_connector.BREAKER_FAILURES + 1):
+            self.connector.send_ndjson(b'{"message": "x"}\n', spool=False)
+        breaker = self.connector.breakers["logstash"]
+        self.assertEqual(breaker.state, elk_connector.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+
+    def test_open_circuit_fails_fast_and_replays(self):
+        """Circuit ouvert : aucun appel réseau, lot en file de secours, rejoué au rétablissement"""
+        self.connector.session.request.side_effect = requests.ConnectionError("down")
+        for _ in range(elk_connector.BREAKER_FAILURES):
+            self.connector.send_to_logstash({"message": "x"})
+        self.assertEqual(self.connector.breakers["logstash"].state, OPEN)
+
+        calls = self.connector.session.request.call_count
+        self.assertFalse(self.connector.send_to_logstash({"message": "y"}))
+        self.assertEqual(self.connector.session.request.call_count, calls)
+
+        ok = MagicMock(status_code=200)
+        self.connector.session.request.side_effect = None
+        self.connector.session.request.return_value = ok
+        breaker = self.connector.breakers["logstash"]
+        breaker.on_recover = None  # reprise déclenchée ici de façon synchrone
+        breaker.record_success()
+        self.assertEqual(self.connector.replay_spool("logstash"), 4)
+        self.assertEqual(list(self.connector.spool.segments("logstash")), [])
+
+    def test_failover_to_next_node(self):
+        """Nœud injoignable : la requête passe au nœud suivant, le nœud est écarté"""
+        self.connector.nodes = NodePool(["http://es1:9200", "http://es2:9200"])
+        urls = []
+
+        def request(method, url, data, **kwargs):
+            urls.append(url)
+            if url.startswith("http://es1"):
+                raise requests.ConnectionError("refused")
+            return MagicMock(status_code=201)
+        self.connector.session.request.side_effect = request
+
+        self.assertTrue(self.connector.index_to_elasticsearch({"message": "x"}))
+        self.assertTrue(self.connector.index_to_elasticsearch({"message": "y"}))
+        self.assertEqual([url.split("/")[2] for url in urls], ["es1:9200", "es2:9200", "es2:9200"])
+        self.assertEqual(self.connector.breakers["elasticsearch"].failures, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+---------------------------
+Tests unitaires pour file_tailer.py
+Vérifie la lecture incrémentale, la rotation, la troncature et la reprise sur offsets.
+"""
+
+import os
+import tempfile
+import unittest
+from src.audit import file_tailer
+
+
+class TestFileTailer(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp_dir.name, "aml_alerts.log")
+        self.registry = os.path.join(self.tmp_dir.name, "registry.json")
+        self.sources = {os.path.join(self.tmp_dir.name, "*.log"): "compliance"}
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.tmp_dir.cleanup()
+
+    def _append(self, text, path=None):
+        with open(path or self.log_path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def _tailer(self, chunk_size=file_tailer.CHUNK_SIZE):
+        tailer = file_tailer.FileTailer(self.sources, registry_path=self.registry, chunk_size=chunk_size)
+        self.addCleanup(tailer.close)
+        return tailer
+
+    def _lines(self, tailer):
+        return [line for _, _, lines in tailer.poll() for line in lines]
+
+    def test_partial_line_kept_for_next_poll(self):
+        """Seules les lignes complètes sont rendues, même avec de petits blocs"""
+        tailer = self._tailer(chunk_size=4)
+        self._append("ligne un\nligne d")
+        self.assertEqual(self._lines(tailer), ["ligne un"])
+        self._append("eux\n")
+        self.assertEqual(self._lines(tailer), ["ligne deux"])
+
+    def test_resume_from_committed_offset(self):
+        """Après redémarrage, seules les lignes non acquittées sont relues"""
+        tailer = self._tailer()
+        self._append("a\nb\n")
+        self.assertEqual(self._lines(tailer), ["a", "b"])
+        tailer.commit()
+        self._append("c\n")
+        self.assertEqual(self._lines(tailer), ["c"])
+        tailer.close()  # "c" lu mais jamais acquitté
+
+        self.assertEqual(self._lines(self._tailer()), ["c"])
+
+    def test_rewind_after_failed_send(self):
+        """Un envoi échoué fait relire les mêmes lignes"""
+        tailer = self._tailer()
+        self._append("a\n")
+        self.assertEqual(self._lines(tailer), ["a"])
+        tailer.rewind()
+        self.assertEqual(self._lines(tailer), ["a"])
+
+    def test_rotation_drains_old_file(self):
+        """La fin de l’ancien fichier puis le nouveau fichier sont lus"""
+        tailer = self._tailer()
+        self._append("avant\n")
+        self._lines(tailer)
+        self._append("fin ancien\n")
+        os.rename(self.log_path, self.log_path + ".1")
+        self._append("nouveau\n")
+        self.assertEqual(self._lines(tailer), ["fin ancien", "nouveau"])
+
+    def test_truncation_restarts_from_beginning(self):
+        """Un fichier tronqué (copytruncate) est relu depuis le début"""
+        tailer = self._tailer()
+        self._append("une longue ligne\n")
+        self._lines(tailer)
+        open(self.log_path, "w").close()
+        self._append("x\n")
+        self.assertEqual(self._lines(tailer), ["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
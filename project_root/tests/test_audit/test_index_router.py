@@ -0,0 +1,114 @@
+"""
+---------------------------
+Tests unitaires pour index_router.py
+Vérifie le routage vers les index datés, l’élagage des index lus par une recherche
+(index non datés hérités compris) et la création des modèles d’index et politiques ILM.
+"""
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from src.audit import index_router
+
+
+def range_query(bounds, clause="must"):
+    return {"query": {"bool": {clause: [
+        {"match": {"category": "AML"}},
+        {"range": {"@timestamp": bounds}},
+    ]}}}
+
+
+class TestIndexRouter(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.router = index_router.IndexRouter("logs", clock=lambda: datetime(2025, 10, 14, 12, 0))
+
+    def test_write_routing(self):
+        """Chaque document va dans l’index du jour de son timestamp"""
+        self.assertEqual(self.router.index_for_document({"@timestamp": "2025-03-02T23:59:00Z"}), "logs-2025.03.02")
+        self.assertEqual(self.router.index_for_document({"timestamp": "2025-03-03"}), "logs-2025.03.03")
+        monthly = index_router.IndexRouter("logs", granularity="month")
+        self.assertEqual(monthly.index_for("2025-03-02T10:00:00Z"), "logs-2025.03")
+
+    def test_quarter_uses_month_patterns(self):
+        """Un rapport trimestriel ne lit que trois mois d’index"""
+        self.assertEqual(
+            self.router.search_indices("2025-01-01", "2025-03-31"),
+            "logs-2025.01.*,logs-2025.02.*,logs-2025.03.*",
+        )
+
+    def test_partial_months_and_full_years(self):
+        """Jours des mois partiels, motifs mensuels et annuels pour le reste"""
+        self.assertEqual(
+            self.router.search_indices("2025-01-30", "2025-02-01"),
+            "logs-2025.01.30,logs-2025.01.31,logs-2025.02.01",
+        )
+        self.assertEqual(
+            self.router.search_indices("2023-01-01", "2025-02-01"),
+            "logs-2023.*,logs-2024.*,logs-2025.01.*,logs-2025.02.01",
+        )
+
+    def test_query_window(self):
+        """La plage de dates des clauses must/filter détermine les index lus"""
+        query = range_query({"gte": "2025-06-01", "lte": "2025-06-30T23:59:59Z"})
+        self.assertEqual(self.router.indices_for_query(query), "logs-2025.06.*")
+        recent = range_query({"gte": "now-1h"}, clause="filter")
+        self.assertEqual(self.router.indices_for_query(recent), "logs-2025.10.14,logs-2025.10.15")
+
+    def test_unsafe_windows_scan_everything(self):
+        """Plage dans un should, calcul de dates non pris en charge ou absence de plage : tout l’alias"""
+        self.assertEqual(self.router.indices_for_query(range_query({"gte": "2025-06-01"}, "should")), "logs-*")
+        self.assertEqual(self.router.indices_for_query(range_query({"gte": "now-1M/M"})), "logs-*")
+        self.assertEqual(self.router.indices_for_query({"query": {"match_all": {}}}), "logs-*")
+
+    def test_timezone_offset_widens_window(self):
+        """Un décalage horaire élargit la fenêtre d’un jour (le jour UTC peut différer)"""
+        query = range_query({"gte": "2025-06-10T00:00:00+02:00", "lte": "2025-06-10T23:00:00-05:00"})
+        self.assertEqual(
+            self.router.indices_for_query(query), "logs-2025.06.09,logs-2025.06.10,logs-2025.06.11"
+        )
+
+    def test_legacy_index_in_pruned_search(self):
+        """L’index non daté d’avant le partitionnement reste lu par les recherches élaguées"""
+        router = index_router.IndexRouter("compliance-logs", legacy_indices=["compliance-logs-2025"])
+        query = range_query({"gte": "2025-07-01", "lte": "2025-07-31"})
+        self.assertEqual(router.indices_for_query(query), "compliance-logs-2025.07.*,compliance-logs-2025")
+        self.assertEqual(router.indices_for_query({"query": {"match_all": {}}}), "compliance-logs-*")
+
+    def test_legacy_indices_from_config(self):
+        """Les index non datés sont lus depuis index_partitioning.legacy_indices"""
+        router = index_router.IndexRouter.from_config("config/elk_config.yaml")
+        self.assertEqual(router.legacy_indices, ["compliance-logs-2025"])
+        self.assertTrue(router.search_indices("2025-07-01", "2025-07-31").endswith(",compliance-logs-2025"))
+
+
+class TestIndexBootstrapper(unittest.TestCase):
+
+    def test_definitions_from_config(self):
+        """Une politique ILM et un modèle par famille d’index de elk_config.yaml"""
+        bootstrapper = index_router.IndexBootstrapper("config/elk_config.yaml")
+        definitions = {name: (policy, template) for name, policy, template in bootstrapper.definitions()}
+        self.assertEqual(set(definitions), {"audit-logs", "compliance-logs", "security-logs"})
+        policy, template = definitions["compliance-logs"]
+        self.assertEqual(policy["policy"]["phases"]["warm"]["min_age"], "7d")
+        settings = template["template"]["settings"]
+        self.assertEqual(settings["number_of_shards"], 3)
+        self.assertEqual(settings["index.lifecycle.name"], "compliance-logs-policy")
+        self.assertEqual(template["index_patterns"], ["compliance-logs-*"])
+        self.assertIn("amount", template["template"]["mappings"]["properties"])
+
+    def test_apply_puts_policies_then_templates(self):
+        """Les politiques sont créées avant les modèles qui les référencent"""
+        connector = MagicMock(elastic_url="http://localhost:9200")
+        applied = index_router.IndexBootstrapper("config/elk_config.yaml", connector).apply()
+        self.assertEqual(len(applied), 3)
+        urls = [call.args[0] for call in connector.session.put.call_args_list]
+        self.assertEqual(urls[:2], [
+            "http://localhost:9200/_ilm/policy/audit-logs-policy",
+            "http://localhost:9200/_index_template/audit-logs",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+---------------------------
+Tests unitaires pour ingest_pipeline.py
+Vérifie l’ordre des lots, la contre-pression et la gestion des erreurs d’étape.
+"""
+
+import queue
+import threading
+import unittest
+from src.audit import ingest_pipeline
+
+LINE = "2025-10-14 08:20:05 ALERT AML threshold exceeded: user_id=107, email=mark.taylor@example.com"
+
+
+class TestIngestPipeline(unittest.TestCase):
+
+    def _pipeline(self, stages, **kwargs):
+        pipeline = ingest_pipeline.IngestPipeline(stages, **kwargs)
+        pipeline.start()
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def test_process_stages_keep_order(self):
+        """Les lots traités par le pool de processus ressortent dans l’ordre"""
+        received = []
+        pipeline = self._pipeline([
+            ingest_pipeline.Stage("parse", ingest_pipeline.parse_stage, kind="process"),
+            ingest_pipeline.Stage("mask", ingest_pipeline.mask_stage, kind="process"),
+            ingest_pipeline.Stage("sink", lambda batch: received.append(batch) or batch),
+        ], process_workers=2, inline_below=0)
+        for i in range(6):
+            pipeline.submit(("compliance", f"{i}.log", [LINE]))
+        self.assertTrue(pipeline.join(timeout=30))
+        self.assertEqual([path for _, path, _ in received], [f"{i}.log" for i in range(6)])
+        event = received[0][2][0]
+        self.assertEqual(event["user_id"], "107")
+        self.assertNotIn("example.com", event["email"])
+        self.assertEqual(pipeline.stats()["mask"]["processed"], 6)
+
+    def test_identifiers_not_masked(self):
+        """Analyse puis masquage : les identifiants restent lisibles, les emails sont masqués"""
+        batch = ("access", "access.log", [
+            "2025-10-14 08:12:05 INFO Payment: user_id=100234567 transaction_id=TX20251014000123",
+            "2025-10-14 08:12:06 INFO Payment: user_id=100234567, email=john.doe@example.com",
+        ])
+        _, _, events = ingest_pipeline.mask_stage(ingest_pipeline.parse_stage(batch))
+        self.assertEqual(events[0]["user_id"], "100234567")
+        self.assertEqual(events[0]["transaction_id"], "TX20251014000123")
+        self.assertEqual(events[1]["user_id"], "100234567")
+        self.assertTrue(events[1]["email"].startswith("<HASHED:"))
+
+    def test_pool_does_not_fork(self):
+        """Le pool de processus démarre ses workers sans fork du processus multithreadé"""
+        pipeline = self._pipeline([
+            ingest_pipeline.Stage("parse", ingest_pipeline.parse_stage, kind="process"),
+        ], process_workers=1)
+        self.assertIn(pipeline._pool._mp_context.get_start_method(), ("forkserver", "spawn"))
+
+    def test_backpressure_blocks_submit(self):
+        """Une étape bloquée remplit les files bornées puis bloque la soumission"""
+        release = threading.Event()
+        pipeline = self._pipeline([
+            ingest_pipeline.Stage("slow", lambda batch: release.wait() and batch),
+        ], queue_size=1)
+        pipeline.submit(("api", "", [1]))  # pris par l’étape, bloqué
+        pipeline.submit(("api", "", [2]))  # remplit la file
+        with self.assertRaises(queue.Full):
+            pipeline.submit(("api", "", [3]), timeout=0.2)
+        self.assertEqual(pipeline.stats()["slow"]["depth"], 1)
+        release.set()
+        self.assertTrue(pipeline.join(timeout=5))
+
+    def test_failed_stage_counted(self):
+        """Un lot en erreur est abandonné et compté, la chaîne continue"""
+        def explode(batch):
+            if batch[2] == ["bad"]:
+                raise ValueError("boom")
+            return batch
+
+        pipeline = self._pipeline([ingest_pipeline.Stage("check", explode)])
+        pipeline.submit(("api", "", ["bad"]))
+        pipeline.submit(("api", "", ["ok"]))
+        self.assertTrue(pipeline.join(timeout=5))
+        self.assertEqual(pipeline.errors, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
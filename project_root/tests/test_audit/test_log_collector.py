@@ -1,12 +1,23 @@
 """
 ----------------------
 Tests unitaires pour log_collector.py
-Vérifie la collecte des logs depuis API, DB et systèmes.
+Vérifie la collecte des logs depuis API, DB et systèmes, et le chiffrement
+par personne des champs personnels envoyés au pipeline (crypto-shredding).
 """
 
+import os
+import json
+import fnmatch
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
 from src.audit import log_collector
+from src.audit.tombstone_filter import TombstoneFilter
+from src.compliance.crypto_shredding import CryptoShredder
+from src.security.key_management import KeyManager
+from src.security.subject_keyring import SubjectKeyring
 
 
 class TestLogCollector(unittest.TestCase):
@@ -64,5 +75,100 @@ class TestLogCollector(unittest.TestCase):
         self.assertIsInstance(logs, list)
         self.assertIn("2025-10-28 INFO Started", logs[0])
 
+
+class SinkHandler(BaseHTTPRequestHandler):
+    """Point d’entrée Logstash minimal : conserve les corps NDJSON reçus."""
+
+    received = []
+
+    def do_POST(self):
+        self.received.append(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCryptoShreddingSink(unittest.TestCase):
+
+    def setUp(self):
+        """Collecteur envoyant à un serveur HTTP local, trousseau temporaire"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        SinkHandler.received = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SinkHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.collector = log_collector.LogCollector()
+        self.collector.logstash_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.collector.limiter = log_collector.RateLimiter()
+        self.keyring = SubjectKeyring(
+            KeyManager(os.path.join(self.tmp_dir.name, "keys.json")),
+            db_path=os.path.join(self.tmp_dir.name, "subject_keys.db"),
+        )
+        self.collector.shredder = CryptoShredder(self.keyring, ["email", "first_name"])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.keyring.conn.close()
+        self.tmp_dir.cleanup()
+
+    def sink_documents(self):
+        lines = b"".join(SinkHandler.received).splitlines()
+        return [json.loads(line) for line in lines if b'"timestamp"' in line]
+
+    def test_forgotten_subject_unreadable_in_sink(self):
+        """Les champs personnels arrivent chiffrés ; après destruction de la clé ils sont illisibles"""
+        self.collector.collect_db_logs([
+            {"user_id": "101", "email": "alice@example.com", "first_name": "Alice", "action": "login"},
+            {"user_id": "102", "email": "bob@example.com", "first_name": "Bob", "action": "login"},
+        ])
+        stored = [dict(doc["context"], user_id=doc["user_id"]) for doc in self.sink_documents()]
+        self.assertEqual(len(stored), 2)
+        self.assertNotIn(b"alice@example.com", b"".join(SinkHandler.received))
+        self.assertTrue(stored[0]["email"].startswith("enc:"))
+
+        shredder = CryptoShredder(self.keyring, ["email", "first_name"])
+        shredder.forget(["101"])
+        readable = shredder.decrypt_records(stored)
+        self.assertIsNone(readable[0]["email"])
+        self.assertIsNone(readable[0]["first_name"])
+        self.assertEqual(readable[1]["email"], "bob@example.com")
+        self.assertEqual(readable[0]["action"], "login")
+
+
+class TestCollectorLogging(unittest.TestCase):
+
+    def test_own_log_not_tailed(self):
+        """Le journal du collecteur n’est pas parmi les fichiers qu’il suit"""
+        own_files = {os.path.abspath(h.baseFilename) for h in log_collector.logger.handlers
+                     if hasattr(h, "baseFilename")}
+        self.assertTrue(own_files)
+        for pattern in log_collector.TAIL_SOURCES:
+            for path in own_files:
+                self.assertFalse(fnmatch.fnmatch(path, os.path.abspath(pattern)), pattern)
+        self.assertFalse(log_collector.logger.propagate)
+
+class TestTombstoneConfig(unittest.TestCase):
+
+    def test_collector_reads_tombstones_published_by_gdpr(self):
+        """Le collecteur lit les tombstones à l’emplacement de gdpr_config.yaml, comme GDPRVerification"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_path = os.path.join(tmp_dir, "gdpr_config.yaml")
+            tombstone_path = os.path.join(tmp_dir, "erased.txt")
+            with open(config_path, "w", encoding="utf-8") as f:
+                f.write(
+                    "gdpr:\n  right_to_be_forgotten:\n    tombstones:\n"
+                    f"      path: \"{tombstone_path}\"\n      mode: \"drop\"\n"
+                )
+            TombstoneFilter.from_config(config_path).add(["101"])
+            with patch.object(log_collector, "GDPR_CONFIG_PATH", config_path):
+                collector = log_collector.LogCollector()
+            collector.tombstones.load()
+            self.assertEqual(collector.tombstones.path, tombstone_path)
+            self.assertIsNone(collector.tombstones.apply({"user_id": 101, "action": "login"}))
+            self.assertIsNone(collector.shredder)
+
+
 if __name__ == "__main__":
     unittest.main()
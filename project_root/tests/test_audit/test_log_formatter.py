@@ -0,0 +1,56 @@
+"""
+----------------------
+Tests unitaires pour log_formatter.py
+Vérifie la normalisation des logs et le masquage des PII.
+"""
+
+import unittest
+from src.audit import log_formatter
+
+
+class TestLogFormatter(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.formatter = log_formatter.LogFormatter()
+
+    def test_mask_all_pii_kinds(self):
+        """Emails, téléphones et IBAN sont hachés en un seul passage"""
+        text = "john.doe@example.com a appelé le +212661234567 pour FR7630006000011234567890189"
+        masked = self.formatter._mask_pii_text(text)
+        self.assertNotIn("john.doe@example.com", masked)
+        self.assertNotIn("661234567", masked)
+        self.assertNotIn("FR76", masked)
+        self.assertEqual(masked.count("<HASHED:"), 3)
+
+    def test_prefilter_keeps_plain_text(self):
+        """Les champs sans PII sont rendus inchangés"""
+        for text in ["User login successful", "192.168.0.10", "2025-10-27T10:23:15"]:
+            self.assertEqual(self.formatter._mask_pii_text(text), text)
+
+    def test_mask_nested_lists_copy_on_write(self):
+        """Les PII dans les listes et tuples sont masquées, les sous-arbres intacts partagés"""
+        data = {"emails": ["jane@example.com", ("ok", 3)], "meta": {"service": "payments"}, "status": "OK"}
+        masked = self.formatter._mask_pii_fields(data)
+        self.assertTrue(masked["emails"][0].startswith("<HASHED:"))
+        self.assertEqual(masked["emails"][1], ("ok", 3))
+        self.assertIs(masked["meta"], data["meta"])
+        self.assertEqual(data["emails"][0], "jane@example.com")
+
+    def test_depth_limit_and_safe_keys(self):
+        """Les champs sûrs ne sont pas analysés et la profondeur est bornée"""
+        formatter = log_formatter.LogFormatter(safe_keys={"trace"}, max_depth=2)
+        masked = formatter._mask_pii_fields({"trace": "+212661234567", "a": {"b": {"c": "x"}}})
+        self.assertEqual(masked["trace"], "+212661234567")
+        self.assertEqual(masked["a"]["b"], log_formatter.DEPTH_LIMIT_MARKER)
+
+    def test_normalize_batch(self):
+        """Le traitement par lot équivaut à normalize appliqué à chaque log"""
+        logs = [{"level": "warning", "message": "alerte", "email": "jane@example.com"}, {"message": "ok"}]
+        batch = self.formatter.normalize_batch(logs, source="api")
+        self.assertEqual([b["context"] for b in batch], [self.formatter.normalize(l, "api")["context"] for l in logs])
+        self.assertEqual(batch[0]["level"], "WARNING")
+
+
+if __name__ == "__main__":
+    unittest.main()
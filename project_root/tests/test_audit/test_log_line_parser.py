@@ -0,0 +1,67 @@
+"""
+---------------------------
+Tests unitaires pour log_line_parser.py
+Vérifie le découpage des lignes de logs texte en événements typés.
+"""
+
+import unittest
+from src.audit import log_line_parser
+
+
+class TestLogLineParser(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.parser = log_line_parser.LogLineParser()
+
+    def test_typed_fields(self):
+        """Montants typés, identifiants conservés en chaînes"""
+        event = self.parser.parse_line(
+            "2025-10-14 08:20:05 ALERT AML threshold exceeded: user_id=107, amount=15000, country=US"
+        )
+        self.assertEqual(event["timestamp"], "2025-10-14 08:20:05")
+        self.assertEqual(event["level"], "ALERT")
+        self.assertEqual(event["category"], "AML")
+        self.assertEqual(event["message"], "AML threshold exceeded")
+        self.assertEqual(event["user_id"], "107")
+        self.assertEqual(event["amount"], 15000)
+        self.assertEqual(event["country"], "US")
+
+    def test_lists_and_commas_in_values(self):
+        """Listes entre crochets, valeurs vides et valeurs contenant des virgules"""
+        events = self.parser.parse_buffer(
+            b"2025-10-14 11:05:20 ERROR KYC incomplete documents: user_id=111, missing=['utility_bill','id_card']\n"
+            b"2025-10-14 09:25:33 ERROR KYC invalid date of birth: user_id=109, dob=''\n"
+            b"2025-10-14 09:10:44 GDPR anonymization performed: user_id=104, fields_masked=email,name,phone\n"
+        )
+        self.assertEqual(events[0]["missing"], ["utility_bill", "id_card"])
+        self.assertEqual(events[1]["dob"], "")
+        self.assertEqual(events[2]["category"], "GDPR")
+        self.assertEqual(events[2]["fields_masked"], "email,name,phone")
+
+    def test_category_without_level(self):
+        """Ligne de gdpr_events.log : la catégorie n’est pas prise pour un niveau"""
+        event = self.parser.parse_line(
+            "2025-10-14 08:35:12 GDPR deletion requested: user_id=103, username=bob.martin"
+        )
+        self.assertEqual(event["level"], "INFO")
+        self.assertEqual(event["category"], "GDPR")
+        self.assertEqual(event["message"], "GDPR deletion requested")
+        self.assertEqual(event["user_id"], "103")
+
+        warning = self.parser.parse_line("2025-10-14 08:30:20 WARN CPU usage high")
+        self.assertEqual(warning["level"], "WARN")
+        self.assertNotIn("category", warning)
+
+    def test_unparsed_lines_kept_in_order(self):
+        """Les lignes non reconnues restent dans le message, à leur place"""
+        events = self.parser.parse_lines([
+            "Service démarré",
+            "2025-10-14 08:12:05 INFO User logout: user_id=101",
+            "suite de trace",
+        ])
+        self.assertEqual([e["message"] for e in events], ["Service démarré", "User logout", "suite de trace"])
+
+
+if __name__ == "__main__":
+    unittest.main()
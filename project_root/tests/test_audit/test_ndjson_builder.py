@@ -0,0 +1,84 @@
+"""
+---------------------------
+Tests unitaires pour ndjson_builder.py
+Vérifie la sérialisation NDJSON des événements dans un tampon réutilisable.
+"""
+
+import json
+import unittest
+from src.audit import ndjson_builder
+
+
+class TestNDJSONBuilder(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.builder = ndjson_builder.NDJSONBuilder(host="collector-01", service="audit")
+
+    def test_create_actions_with_deterministic_ids(self):
+        """Chaque document est précédé d’une action create dont l’_id ne dépend que du contenu"""
+        builder = ndjson_builder.NDJSONBuilder("collector-01", "audit", op_type="create")
+        event = {"message": "AML", "user_id": "107"}
+        builder.add(event, "compliance", "2025-10-14T08:20:05")
+        builder.add(event, "compliance", "2025-10-14T08:20:05")
+        builder.add(event, "compliance", "2025-10-14T08:20:06")
+        lines = bytes(builder.view()).splitlines()
+        actions = [json.loads(line) for line in lines[::2]]
+        self.assertEqual([a["create"]["_id"] for a in actions], builder.ids)
+        self.assertEqual(builder.ids[0], builder.ids[1])
+        self.assertNotEqual(builder.ids[0], builder.ids[2])
+        self.assertEqual(builder.ids[0], ndjson_builder.document_id(lines[1][:-1]))
+
+    def test_routed_index_in_actions(self):
+        """Avec index_for, chaque action porte l’index daté du timestamp du document"""
+        builder = ndjson_builder.NDJSONBuilder(op_type="create", index_for=lambda ts: f"logs-{ts[:10]}")
+        builder.add({"message": "x"}, "api", "2025-10-14T08:20:05")
+        builder.add_document({"@timestamp": "2025-10-15T00:00:01", "message": "y"})
+        actions = [json.loads(line) for line in bytes(builder.view()).splitlines()[::2]]
+        self.assertEqual([a["create"]["_index"] for a in actions], ["logs-2025-10-14", "logs-2025-10-15"])
+        self.assertEqual([a["create"]["_id"] for a in actions], builder.ids)
+
+    def test_embedded_event_id(self):
+        """Pour Logstash, l’identifiant est porté par le document (event_id)"""
+        builder = ndjson_builder.NDJSONBuilder(embed_id=True)
+        builder.add_document({"message": "x"})
+        document = json.loads(bytes(builder.view()))
+        self.assertEqual(document["event_id"], builder.ids[0])
+        builder.reset()
+        self.assertEqual(builder.ids, [])
+
+    def test_top_level_fields(self):
+        """Les champs indexés sont placés au premier niveau, hors du contexte"""
+        builder = ndjson_builder.NDJSONBuilder("collector-01", "audit", top_level_fields=("user_id", "amount"))
+        builder.add({"message": "AML", "user_id": "107", "amount": 15000, "country": "US"}, "compliance", "t")
+        document = json.loads(bytes(builder.view()))
+        self.assertEqual(document["user_id"], "107")
+        self.assertEqual(document["amount"], 15000)
+        self.assertEqual(document["context"], {"country": "US"})
+
+    def test_envelope_without_duplicated_message(self):
+        """Chaque ligne est un document complet, le message n’est pas recopié dans le contexte"""
+        self.builder.add({"level": "WARN", "message": "échec", "user_id": 102}, "api", "2025-10-14T08:12:05")
+        self.builder.add({"event": "Service démarré"}, "system", "2025-10-14T08:12:06")
+        lines = bytes(self.builder.view()).decode("utf-8").splitlines()
+        first, second = (json.loads(line) for line in lines)
+        self.assertEqual(first["host"], "collector-01")
+        self.assertEqual(first["severity"], "WARN")
+        self.assertEqual(first["message"], "échec")
+        self.assertEqual(first["context"], {"user_id": 102})
+        self.assertEqual(second["source"], "system")
+        self.assertEqual(second["severity"], "INFO")
+
+    def test_bulk_action_and_reset(self):
+        """La ligne d’action `_bulk` précède chaque document et le tampon est réutilisable"""
+        builder = ndjson_builder.NDJSONBuilder("h", "s", action={"index": {}})
+        builder.add_document({"a": 1})
+        self.assertEqual(bytes(builder.view()), b'{"index":{}}\n{"a":1}\n')
+        buffer = builder.buffer
+        builder.reset()
+        self.assertIs(builder.buffer, buffer)
+        self.assertEqual((len(builder), builder.count), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
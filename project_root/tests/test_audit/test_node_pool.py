@@ -0,0 +1,88 @@
+"""
+---------------------------
+Tests unitaires pour node_pool.py
+Vérifie la sélection des nœuds, la mise à l’écart avec résurrection et la découverte.
+"""
+
+import unittest
+from src.audit import node_pool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+HOSTS = ["http://es1:9200", "http://es2:9200", "http://es3:9200"]
+
+
+class TestNodePool(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.clock = FakeClock()
+        self.pool = node_pool.NodePool(HOSTS, dead_timeout=10, max_dead_timeout=30, clock=self.clock)
+
+    def test_round_robin(self):
+        """Les nœuds sont utilisés à tour de rôle"""
+        urls = [self.pool.peek().url for _ in range(6)]
+        self.assertEqual(urls, HOSTS * 2)
+
+    def test_least_outstanding(self):
+        """Le nœud ayant le moins de requêtes en cours est choisi"""
+        pool = node_pool.NodePool(HOSTS, selector=node_pool.LEAST_OUTSTANDING, clock=self.clock)
+        busy = [pool.select(), pool.select()]
+        self.assertEqual(pool.select().url, HOSTS[2])
+        pool.release(busy[0])
+        self.assertEqual(pool.select().url, HOSTS[0])
+
+    def test_dead_node_backoff_and_resurrection(self):
+        """Nœud écarté avec délai doublé à chaque échec, puis réessayé"""
+        node = self.pool.nodes[0]
+        self.pool.release(self.pool.select(), ok=False)
+        self.assertNotIn(HOSTS[0], {self.pool.peek().url for _ in range(4)})
+        self.clock.now = 10
+        self.pool.mark_dead(node)
+        self.assertEqual(node.dead_until, 30)  # 10 s puis 20 s
+        self.pool.mark_dead(node)
+        self.assertEqual(node.dead_until, 40)  # plafonné à 30 s
+        self.clock.now = 40
+        self.assertIn(HOSTS[0], {self.pool.peek().url for _ in range(3)})
+        self.pool.mark_live(node)
+        self.assertEqual(node.failures, 0)
+
+    def test_all_dead_retries_earliest(self):
+        """Tous les nœuds écartés : celui dont l’écart expire le premier est réessayé"""
+        for node in self.pool.nodes:
+            self.pool.mark_dead(node)
+            self.clock.now += 1
+        self.assertEqual(self.pool.peek().url, HOSTS[0])
+
+    def test_sniff_keeps_known_nodes(self):
+        """La découverte conserve l’état des nœuds connus et ajoute les nouveaux"""
+        payload = {"nodes": {
+            "a": {"http": {"publish_address": "es2/10.0.0.2:9200"}},
+            "b": {"http": {"publish_address": "10.0.0.4:9200"}},
+            "c": {"attributes": {}},
+        }}
+        urls = node_pool.parse_nodes_http(payload)
+        self.assertEqual(urls, ["http://10.0.0.4:9200", "http://es2:9200"])
+        self.pool.mark_dead(self.pool.nodes[1])
+        self.pool.set_hosts(urls)
+        self.assertEqual(self.pool.urls, urls)
+        self.assertEqual(self.pool.nodes[1].failures, 1)
+
+    def test_sniff_due(self):
+        """La découverte périodique n’est déclenchée qu’une fois par intervalle"""
+        pool = node_pool.NodePool(HOSTS, sniff_interval=60, clock=self.clock)
+        self.assertFalse(pool.sniff_due())
+        self.clock.now = 60
+        self.assertTrue(pool.sniff_due())
+        self.assertFalse(pool.sniff_due())
+
+
+if __name__ == "__main__":
+    unittest.main()
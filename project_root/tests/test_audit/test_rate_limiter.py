@@ -0,0 +1,67 @@
+"""
+---------------------------
+Tests unitaires pour rate_limiter.py
+Vérifie la limitation par seau à jetons, l’échantillonnage et les exemptions de conformité.
+"""
+
+import unittest
+from src.audit import rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.clock = FakeClock()
+        self.limiter = rate_limiter.RateLimiter(
+            sources={"database": {"INFO": {"rate": 10, "burst": 5}, "debug": {"rate": None, "sample_rate": 0.5}}},
+            tracked_events=["aml_alert_triggered"],
+            clock=self.clock,
+            rng=iter([0.1, 0.9, 0.3, 0.7]).__next__,
+        )
+
+    def test_token_bucket_burst_then_refill(self):
+        """La rafale est bornée par burst, puis le débit revient avec le temps"""
+        logs = [{"level": "INFO", "query": "SELECT 1"}] * 20
+        self.assertEqual(len(self.limiter.apply(logs, "database")), 5)
+        self.clock.now = 0.5  # 0,5 s à 10 événements/s
+        self.assertEqual(len(self.limiter.apply(logs, "database")), 5)
+        self.assertEqual(self.limiter.stats()["database/INFO"]["dropped"], 30)
+
+    def test_sampling_annotates_kept_events(self):
+        """Les événements échantillonnés portent sample_rate, les autres sont écartés"""
+        kept = self.limiter.apply([{"level": "DEBUG", "query": str(i)} for i in range(4)], "database")
+        self.assertEqual([log["query"] for log in kept], ["0", "2"])
+        self.assertTrue(all(log["sample_rate"] == 0.5 for log in kept))
+
+    def test_compliance_events_exempt(self):
+        """Sources de conformité, niveaux critiques et tracked_events ne sont jamais limités"""
+        info = {"level": "INFO", "query": "x"}
+        self.assertEqual(len(self.limiter.apply([info] * 50, "compliance")), 50)
+        self.assertEqual(len(self.limiter.apply([{"level": "ALERT"}] * 50, "database")), 50)
+        tracked = {"level": "INFO", "event_type": "aml_alert_triggered"}
+        self.assertEqual(len(self.limiter.apply([tracked] * 50, "database")), 50)
+        gdpr = {"level": "INFO", "category": "GDPR", "query": "x"}
+        self.assertEqual(len(self.limiter.apply([gdpr] * 50, "database")), 50)
+
+    def test_unconfigured_source_unlimited(self):
+        """Sans configuration ni limite par défaut, rien n’est écarté"""
+        self.assertEqual(len(self.limiter.apply([{"level": "INFO"}] * 50, "api")), 50)
+
+    def test_from_config(self):
+        """Chargement depuis logging.yaml et compliance_rules.yaml"""
+        limiter = rate_limiter.RateLimiter.from_config("config/logging.yaml", "config/compliance_rules.yaml")
+        self.assertIn("kyc_validation_failed", limiter.tracked_events)
+        self.assertIn("database", limiter.sources)
+
+
+if __name__ == "__main__":
+    unittest.main()
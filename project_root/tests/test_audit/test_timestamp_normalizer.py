@@ -0,0 +1,44 @@
+"""
+---------------------------
+Tests unitaires pour timestamp_normalizer.py
+Vérifie la conversion des timestamps des logs en UTC et en epoch millisecondes.
+"""
+
+import unittest
+from datetime import datetime, timezone
+from src.audit import timestamp_normalizer
+
+
+class TestTimestampNormalizer(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.normalizer = timestamp_normalizer.TimestampNormalizer()
+
+    def test_known_formats_to_utc(self):
+        """Les formats des logs bruts sont convertis en ISO 8601 UTC"""
+        expected = "2025-10-14T08:12:05"
+        for value in ["2025-10-14 08:12:05", "2025-10-14T08:12:05Z", "2025-10-14T10:12:05+02:00",
+                      "14/Oct/2025:10:12:05 +0200", datetime(2025, 10, 14, 8, 12, 5, tzinfo=timezone.utc)]:
+            self.assertEqual(self.normalizer.normalize(value), expected)
+        self.assertEqual(self.normalizer.normalize("2025-10-14 08:12:05,5"), "2025-10-14T08:12:05.500000")
+
+    def test_source_timezone(self):
+        """Les timestamps sans décalage sont interprétés dans le fuseau de la source"""
+        paris = timestamp_normalizer.TimestampNormalizer("Europe/Paris")
+        self.assertEqual(paris.normalize("2025-10-14 10:12:05"), "2025-10-14T08:12:05")
+
+    def test_epoch_millis_array(self):
+        """La conversion par lot produit des epoch millisecondes"""
+        result = self.normalizer.to_epoch_millis_array(["2025-10-14 08:12:05", "2025-10-14T08:12:05.250", 1760429525123])
+        self.assertEqual(result.typecode, "q")
+        self.assertEqual(list(result), [1760429525000, 1760429525250, 1760429525123])
+
+    def test_invalid_falls_back_to_now(self):
+        """Un timestamp illisible est remplacé par l’heure courante"""
+        before = datetime.utcnow().replace(microsecond=0).isoformat()
+        self.assertGreaterEqual(self.normalizer.normalize("pas une date"), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
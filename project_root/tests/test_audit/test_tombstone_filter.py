@@ -0,0 +1,52 @@
+"""
+---------------------------
+Tests unitaires pour tombstone_filter.py
+Vérifie le filtrage à l’ingestion des événements des personnes effacées.
+"""
+
+import os
+import tempfile
+import unittest
+from src.audit import tombstone_filter
+
+
+class TestTombstoneFilter(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "erased_subjects.txt")
+        tombstone_filter.append_tombstones(self.path, ["103", "U42"])
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.tmp_dir.cleanup()
+
+    def test_drop_erased_subject(self):
+        """Les événements d’une personne effacée sont écartés, les autres conservés"""
+        tombstones = tombstone_filter.TombstoneFilter(self.path)
+        self.assertIsNone(tombstones.apply({"user_id": 103, "message": "login"}))
+        event = {"user_id": 101, "message": "login"}
+        self.assertIs(tombstones.apply(event), event)
+        self.assertEqual(tombstones.dropped, 1)
+
+    def test_anonymize_mode(self):
+        """En mode anonymize, seuls les identifiants sont remplacés"""
+        tombstones = tombstone_filter.TombstoneFilter(self.path, mode="anonymize")
+        event = tombstones.apply({"client_id": "U42", "amount": 10})
+        self.assertEqual(event["client_id"], tombstone_filter.ERASED_MARKER)
+        self.assertEqual(event["amount"], 10)
+        self.assertTrue(event["gdpr_erased"])
+
+    def test_reload_without_restart(self):
+        """Un identifiant ajouté au fichier par un autre processus est pris en compte"""
+        tombstones = tombstone_filter.TombstoneFilter(self.path, reload_interval=0)
+        self.assertNotIn("U7", tombstones)
+        tombstone_filter.append_tombstones(self.path, ["U7"])
+        os.utime(self.path, ns=(0, 0))
+        tombstones.maybe_reload()
+        self.assertIn("U7", tombstones)
+
+
+if __name__ == "__main__":
+    unittest.main()
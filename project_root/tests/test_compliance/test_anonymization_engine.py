@@ -0,0 +1,79 @@
+"""
+-----------------------------
+Tests unitaires pour anonymization_engine.py
+Vérifie la compilation des règles GDPR et leur application par lots.
+"""
+
+import unittest
+import pandas as pd
+from src.compliance import anonymization_engine
+
+FIELDS = [
+    {"name": "first_name", "anonymization": "hash"},
+    {"name": "email", "anonymization": "mask", "pattern": "(?<=.{2}).(?=[^@]*?@)"},
+    {"name": "address", "anonymization": "remove"},
+    {"name": "birth_date", "anonymization": "generalize", "rule": "convert_to_year"},
+]
+
+
+class TestAnonymizationEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.engine = anonymization_engine.AnonymizationEngine(FIELDS)
+        self.records = [
+            {"user_id": "U1", "first_name": "Alice", "email": "alice@example.com",
+             "address": "1 rue A", "birth_date": "1990-05-12"},
+            {"user_id": "U2", "first_name": "Alice", "email": "", "address": "2 rue B", "birth_date": "1985-01-01"},
+        ]
+
+    def test_batch_applies_each_strategy(self):
+        """Chaque champ reçoit la stratégie définie dans la configuration"""
+        first, second = self.engine.anonymize_batch(self.records)
+        self.assertEqual(len(first["first_name"]), 64)
+        self.assertEqual(first["first_name"], second["first_name"])
+        self.assertEqual(first["email"], "al***@example.com")
+        self.assertEqual(second["email"], "")
+        self.assertIsNone(first["address"])
+        self.assertEqual(first["birth_date"], "1990")
+        self.assertEqual(first["user_id"], "U1")
+
+    def test_dataframe_matches_batch(self):
+        """Le DataFrame anonymisé correspond au traitement par lots"""
+        df = pd.DataFrame([dict(r) for r in self.records])
+        result = self.engine.anonymize_dataframe(df)
+        expected = self.engine.anonymize_batch(self.records)
+        self.assertEqual(result.to_dict("records"), expected)
+        self.assertEqual(df.loc[0, "first_name"], "Alice")
+
+    def test_numeric_values_coerced(self):
+        """Les valeurs int / float (colonnes numériques) sont hachées ou masquées sous forme texte"""
+        engine = anonymization_engine.AnonymizationEngine(FIELDS + [
+            {"name": "phone_number", "anonymization": "mask", "pattern": "(?<=\\d{2})\\d(?=\\d{2})"},
+            {"name": "score", "anonymization": "hash"},
+        ])
+        records = [
+            {"first_name": 1001, "phone_number": 600123456, "score": 0.75},
+            {"first_name": None, "phone_number": 600123456, "score": 12.5},
+        ]
+        df = pd.DataFrame([dict(r) for r in records])
+        first, second = engine.anonymize_batch(records)
+        self.assertEqual(first["first_name"], anonymization_engine._hash("1001"))
+        self.assertIsNone(second["first_name"])
+        self.assertEqual(first["phone_number"], "60*****56")
+        self.assertEqual(first["score"], anonymization_engine._hash("0.75"))
+
+        result = engine.anonymize_dataframe(df).to_dict("records")
+        self.assertEqual(result[0]["phone_number"], "60*****56")
+        self.assertEqual(result[1]["score"], anonymization_engine._hash("12.5"))
+        self.assertEqual(result[0]["first_name"], anonymization_engine._hash("1001.0"))
+        self.assertTrue(pd.isna(result[1]["first_name"]))
+
+    def test_unknown_strategy_rejected(self):
+        """Une stratégie inconnue est refusée dès la compilation"""
+        with self.assertRaises(ValueError):
+            anonymization_engine.AnonymizationEngine([{"name": "x", "anonymization": "scramble"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
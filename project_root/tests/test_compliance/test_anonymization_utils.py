@@ -4,7 +4,10 @@ Tests unitaires pour anonymization_utils.py
 Vérifie la pseudonymisation et l’anonymisation des données sensibles.
 """
 
+import hmac
+import hashlib
 import unittest
+import pandas as pd
 from src.compliance import anonymization_utils
 
 class TestAnonymizationUtils(unittest.TestCase):
@@ -45,5 +48,65 @@ class TestAnonymizationUtils(unittest.TestCase):
         self.assertNotEqual(anonymized_data["phone"], self.sample_data["phone"])
         self.assertEqual(anonymized_data["user_id"], self.sample_data["user_id"])
 
+
+class TestColumnMasking(unittest.TestCase):
+
+    def test_mask_email_column_matches_scalar(self):
+        """Le masquage par colonne correspond au masquage unitaire et conserve l’index"""
+        emails = ["ahmed.elmajid@example.com", "ab@x.fr", "sans-arobase", ""]
+        series = pd.Series(emails + [None], index=range(10, 15), name="email")
+        masked = anonymization_utils.mask_email_column(series)
+        self.assertEqual(list(masked.index), list(series.index))
+        self.assertEqual(list(masked[:4]), [anonymization_utils.mask_email(e) for e in emails])
+        self.assertTrue(pd.isna(masked.iloc[4]))
+
+    def test_mask_phone_column_matches_scalar(self):
+        """Les 4 derniers chiffres restent visibles, les numéros courts sont masqués"""
+        phones = ["+212600123456", "123", "0600"]
+        masked = anonymization_utils.mask_phone_column(pd.Series(phones))
+        self.assertEqual(list(masked), [anonymization_utils.mask_phone(p) for p in phones])
+
+
+class TestPseudonymizer(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.key = b"k" * 32
+        self.pseudonymizer = anonymization_utils.Pseudonymizer(self.key, length=12)
+
+    def test_matches_standard_hmac(self):
+        """Le pseudonyme est un HMAC-SHA256 standard, donc stable entre processus"""
+        subkey = hashlib.sha256(b"pseudonymization:" + self.key).digest()
+        digest = hmac.new(subkey, b"U123", hashlib.sha256).digest()
+        expected = digest[:12].translate(anonymization_utils._TOKEN_TABLE).decode("ascii")
+        self.assertEqual(self.pseudonymizer.pseudonymize("U123"), expected)
+
+    def test_default_length_and_prefix(self):
+        """Jeton par défaut de 16 caractères ; un jeton court en est le préfixe"""
+        default = anonymization_utils.Pseudonymizer(self.key)
+        token = default.pseudonymize("U123")
+        self.assertEqual(len(token), anonymization_utils.PSEUDONYM_LENGTH)
+        self.assertEqual(anonymization_utils.Pseudonymizer(self.key, length=8).pseudonymize("U123"), token[:8])
+
+    def test_batch_matches_single(self):
+        """Le traitement par lot donne les mêmes pseudonymes et conserve les vides"""
+        values = ["U1", "U2", "", "U1"]
+        result = self.pseudonymizer.pseudonymize_many(values)
+        self.assertEqual(result[0], result[3])
+        self.assertEqual(result[2], "")
+        self.assertEqual(result[1], self.pseudonymizer.pseudonymize("U2"))
+
+    def test_format_preserving(self):
+        """Le mode préservant le format garde longueur, classes et séparateurs"""
+        fpe = anonymization_utils.Pseudonymizer(self.key, preserve_format=True)
+        phone = fpe.pseudonymize("+212-600-123456")
+        self.assertEqual(len(phone), len("+212-600-123456"))
+        self.assertEqual(phone[0], "+")
+        self.assertEqual(phone[4], "-")
+        self.assertTrue(phone.replace("+", "").replace("-", "").isdigit())
+        email = fpe.pseudonymize("Ahmed.ElMajid@example.com" * 2)
+        self.assertEqual(len(email), 50)
+        self.assertTrue(email[0].isupper())
+
 if __name__ == "__main__":
     unittest.main()
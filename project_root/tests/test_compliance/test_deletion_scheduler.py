@@ -0,0 +1,105 @@
+"""
+-----------------------------
+Tests unitaires pour deletion_scheduler.py
+Vérifie la planification différée, l’extraction par lots des suppressions GDPR
+et la remise en attente des effacements incomplets.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.compliance import deletion_scheduler
+
+DAY = 86400
+
+
+class TestDeletionScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.scheduler = deletion_scheduler.DeletionScheduler(
+            os.path.join(self.tmp_dir.name, "pending.db"), grace_days=30, batch_size=2
+        )
+        self.now = 1_760_000_000
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.scheduler.close()
+        self.tmp_dir.cleanup()
+
+    def test_not_due_during_grace_period(self):
+        """Aucune demande n’est extraite avant la fin du délai de grâce"""
+        self.scheduler.schedule(["103"], now=self.now)
+        self.assertEqual(self.scheduler.pop_due(now=self.now + 29 * DAY), {})
+        self.assertEqual(self.scheduler.next_due(), self.now + 30 * DAY)
+
+    def test_pop_due_in_batches(self):
+        """Les demandes échues sont extraites par lots, dans l’ordre des échéances"""
+        self.scheduler.schedule(["101", "102"], now=self.now)
+        self.scheduler.schedule(["103"], delete=True, now=self.now + DAY)
+        first = self.scheduler.pop_due(now=self.now + 40 * DAY)
+        self.assertEqual(first, {False: ["101", "102"]})
+        second = self.scheduler.pop_due(now=self.now + 40 * DAY)
+        self.assertEqual(second, {True: ["103"]})
+
+    def test_cancel_request(self):
+        """Une demande annulée pendant le délai de grâce n’est pas exécutée"""
+        self.scheduler.schedule(["103"], now=self.now)
+        self.scheduler.cancel(["103"])
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_run_once_ack_and_release(self):
+        """Les lots réussis sont acquittés, les échecs remis en attente"""
+        self.scheduler.schedule(["101"], now=self.now)
+        erase = MagicMock(side_effect=Exception("ELK indisponible"))
+        self.assertEqual(self.scheduler.run_once(erase, now=self.now + 31 * DAY), 0)
+        self.assertEqual(self.scheduler.pending_count(), 1)
+
+        erase = MagicMock(return_value=[])
+        self.assertEqual(self.scheduler.run_once(erase, now=self.now + 31 * DAY + 60), 1)
+        erase.assert_called_once_with(["101"], delete=False, timeout=self.scheduler.erase_timeout)
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_release_backs_off(self):
+        """Chaque échec repousse l’échéance (60 s, 120 s, …) au lieu de relancer aussitôt"""
+        self.scheduler.schedule(["101"], now=self.now)
+        erase = MagicMock(return_value=[{"index": "audit-logs", "error": "timeout"}])
+        now = self.now + 31 * DAY
+        for expected_delay in (60, 120, 240):
+            self.scheduler.run_once(erase, now=now)
+            self.assertEqual(self.scheduler.next_due(), now + expected_delay)
+            self.assertEqual(self.scheduler.pop_due(now=now), {})
+            now += expected_delay
+        self.assertEqual(erase.call_count, 3)
+        attempts = self.scheduler.conn.execute("SELECT attempts FROM pending_deletions").fetchone()[0]
+        self.assertEqual(attempts, 3)
+
+    def test_partial_or_pending_erasure_released(self):
+        """Échecs de documents, conflits de version ou tâche inachevée : le lot n’est pas acquitté"""
+        self.scheduler.schedule(["101"], now=self.now)
+        now = self.now + 31 * DAY
+        for task in (
+            {"index": "audit-logs", "completed": True, "response": {"failures": [{"id": "doc-1"}]}},
+            {"index": "audit-logs", "completed": True, "response": {"version_conflicts": 2}},
+            {"index": "audit-logs", "task": "node:1"},  # toujours en cours à l’expiration du délai
+        ):
+            self.assertEqual(self.scheduler.run_once(MagicMock(return_value=[task]), now=now), 0)
+            self.assertEqual(self.scheduler.pending_count(), 1)
+            now = self.scheduler.next_due()
+
+        done = {"index": "audit-logs", "completed": True, "response": {"updated": 1, "failures": []}}
+        self.assertEqual(self.scheduler.run_once(MagicMock(return_value=[done]), now=now), 1)
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_reschedule_upgrades_to_hard_delete(self):
+        """Une suppression demandée pendant une anonymisation en attente l’emporte"""
+        self.scheduler.schedule(["101"], now=self.now)
+        self.scheduler.schedule(["101"], delete=True, now=self.now + DAY)
+        self.scheduler.schedule(["101"], delete=False, now=self.now + 2 * DAY)
+        self.assertEqual(self.scheduler.pop_due(now=self.now + 30 * DAY), {True: ["101"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+-----------------------------
+Tests unitaires pour erasure_executor.py
+Vérifie le regroupement des user_id, le suivi des tâches d’effacement et leur bilan.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+from src.compliance import erasure_executor
+
+
+class TestErasureExecutor(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.connector = MagicMock()
+        self.connector.elastic_url = "http://localhost:9200"
+        self.connector.session.post.return_value.json.return_value = {"task": "node:1"}
+        self.executor = erasure_executor.ErasureExecutor("config/gdpr_config.yaml", connector=self.connector)
+        self.executor.poll_interval = 0
+
+    def test_one_task_per_index(self):
+        """Un lot de personnes ne génère qu’une tâche par index"""
+        tasks = self.executor.submit(["103", "106", "103"])
+        self.assertEqual(len(tasks), len(self.executor.indices))
+        body = self.connector.session.post.call_args.kwargs["json"]
+        self.assertEqual(body["query"]["bool"]["should"][0]["terms"]["user_id"], ["103", "106"])
+        self.assertIn("script", body)
+
+    def test_delete_uses_delete_by_query(self):
+        """La suppression physique utilise _delete_by_query sans script"""
+        self.executor.submit(["103"], delete=True)
+        url = self.connector.session.post.call_args.args[0]
+        self.assertTrue(url.endswith("/_delete_by_query"))
+        self.assertNotIn("script", self.connector.session.post.call_args.kwargs["json"])
+
+    def test_script_params_from_config(self):
+        """Les stratégies de gdpr_config.yaml sont traduites en paramètres Painless"""
+        params = self.executor.script_params
+        self.assertIn("first_name", params["hash_fields"])
+        self.assertIn("user_id", params["hash_fields"])
+        self.assertIn("address", params["remove_fields"])
+        self.assertIn("birth_date", params["year_fields"])
+
+    def test_wait_until_completed(self):
+        """Les tâches sont suivies jusqu’à leur terminaison"""
+        self.connector.session.get.return_value.json.side_effect = [
+            {"completed": False},
+            {"completed": True, "response": {"updated": 4, "failures": []}},
+        ]
+        tasks = [{"index": "audit-logs-*", "task": "node:1", "subjects": 2}]
+        pending = self.executor.wait(tasks)
+        self.assertEqual(pending, [])
+        self.assertTrue(tasks[0]["completed"])
+
+    def test_version_conflicts_not_succeeded(self):
+        """Des documents ignorés pour conflit de version laissent la tâche en échec"""
+        done = {"completed": True, "response": {"updated": 4, "failures": []}}
+        self.assertTrue(erasure_executor.ErasureExecutor.succeeded(done))
+        conflicted = {"completed": True, "response": {"updated": 3, "failures": [], "version_conflicts": 1}}
+        self.assertFalse(erasure_executor.ErasureExecutor.succeeded(conflicted))
+        self.assertFalse(erasure_executor.ErasureExecutor.succeeded({"task": "node:1"}))
+
+    def test_erase_wait_bounded(self):
+        """Avec un délai, erase rend la main même si _tasks reste injoignable"""
+        self.connector.session.get.side_effect = Exception("cluster injoignable")
+        tasks = self.executor.erase(["103"], timeout=0.01)
+        self.assertTrue(tasks)
+        self.assertFalse(any(erasure_executor.ErasureExecutor.succeeded(task) for task in tasks))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+-----------------------------
+Tests unitaires pour scripts/gdpr_cleanup_job.py
+Vérifie la reprise d’un fichier depuis un point de reprise, l’écriture atomique
+de la sortie (complète ou absente) et le respect des champs CSV entre guillemets.
+"""
+
+import os
+import csv
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+from scripts import gdpr_cleanup_job
+from src.compliance import anonymization_utils
+
+CUTOFF = "2025-01-01"
+FIELDNAMES = ["user_id", "first_name", "email", "comment", "created_at"]
+
+
+def write_source(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_rows(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class TestProcessFile(unittest.TestCase):
+
+    def setUp(self):
+        """Répertoires data/archive temporaires et petits lots pour multiplier les points de reprise"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        data_dir = os.path.join(self.tmp_dir.name, "data")
+        os.makedirs(data_dir)
+        self.source = os.path.join(data_dir, "clients.csv")
+        self.output = os.path.join(self.tmp_dir.name, "archive", "clients.csv")
+        self.checkpoint = os.path.join(self.tmp_dir.name, "checkpoints", "clients.csv.json")
+        os.makedirs(os.path.dirname(self.checkpoint))
+        self.rows = [
+            {
+                "user_id": str(100 + i),
+                "first_name": f"Client{i}",
+                "email": f"client{i}@example.com",
+                # Guillemets, virgules et retours à la ligne dans un même champ
+                "comment": f"ligne 1, \"note\" {i}\nligne 2, suite" if i % 3 == 0 else f"RAS {i}",
+                "created_at": "2024-06-01" if i % 2 else "2025-06-01",
+            }
+            for i in range(10)
+        ]
+        write_source(self.source, self.rows)
+        self.patches = [
+            patch.object(gdpr_cleanup_job, "DATA_DIR", data_dir),
+            patch.object(gdpr_cleanup_job, "CHECKPOINT_DIR", os.path.dirname(self.checkpoint)),
+            patch.object(gdpr_cleanup_job, "BATCH_ROWS", 2),
+            patch.object(gdpr_cleanup_job, "CHECKPOINT_EVERY", 4),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+
+    def reference_output(self):
+        """Sortie d’un traitement sans interruption, dans un autre fichier"""
+        with patch.object(gdpr_cleanup_job, "CHECKPOINT_DIR", os.path.join(self.tmp_dir.name, "ref")):
+            reference = os.path.join(self.tmp_dir.name, "ref", "clients.csv")
+            gdpr_cleanup_job.process_file(self.source, CUTOFF, reference)
+        return read_rows(reference)
+
+    def interrupt_after(self, calls):
+        """Lance process_file en faisant échouer l’anonymisation au lot `calls` + 1"""
+        real = anonymization_utils.anonymize_records
+        seen = []
+
+        def flaky(records):
+            seen.append(len(records))
+            if len(seen) > calls:
+                raise RuntimeError("interruption simulée")
+            return real(records)
+
+        with patch.object(gdpr_cleanup_job.anonymization_utils, "anonymize_records", side_effect=flaky):
+            with self.assertRaises(RuntimeError):
+                gdpr_cleanup_job.process_file(self.source, CUTOFF, self.output)
+
+    def test_interrupted_run_leaves_no_output(self):
+        """Après une interruption, la sortie est absente ; seuls le .part et le point de reprise existent"""
+        self.interrupt_after(3)
+        self.assertFalse(os.path.exists(self.output))
+        self.assertTrue(os.path.exists(self.output + ".part"))
+        with open(self.checkpoint, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["rows_done"], 4)
+
+    def test_resume_from_mid_file_checkpoint(self):
+        """La reprise repart du point de reprise et produit exactement la sortie d’un traitement complet"""
+        expected = self.reference_output()
+        self.interrupt_after(3)
+
+        with patch.object(gdpr_cleanup_job.anonymization_utils, "anonymize_records",
+                          wraps=anonymization_utils.anonymize_records) as anonymize:
+            result = gdpr_cleanup_job.process_file(self.source, CUTOFF, self.output)
+
+        # 6 lignes restantes en lots de 2, plus l’appel final sur le lot vide
+        self.assertEqual(anonymize.call_count, 4)
+        self.assertEqual(result["rows"], 10)
+        self.assertEqual(result["anonymized"], 5)
+        self.assertEqual(read_rows(self.output), expected)
+        self.assertFalse(os.path.exists(self.output + ".part"))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_quoted_fields_round_trip(self):
+        """Les champs multilignes avec virgules et guillemets sont conservés tels quels"""
+        gdpr_cleanup_job.process_file(self.source, CUTOFF, self.output)
+        output = read_rows(self.output)
+        self.assertEqual(len(output), len(self.rows))
+        self.assertEqual([row["comment"] for row in output], [row["comment"] for row in self.rows])
+        # Les lignes récentes sont recopiées à l’identique, les expirées anonymisées
+        self.assertEqual(output[0], self.rows[0])
+        self.assertNotEqual(output[3]["first_name"], self.rows[3]["first_name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
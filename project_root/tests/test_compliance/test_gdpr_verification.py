@@ -1,12 +1,16 @@
 """
 -----------------------------
 Tests unitaires pour gdpr_verification.py
-Vérifie la conformité aux règles GDPR : suppression et anonymisation des données.
+Vérifie la conformité aux règles GDPR : suppression et anonymisation des données,
+et la mise à jour de l’index des personnes après effacement.
 """
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from src.compliance import gdpr_verification
+from src.compliance.subject_index import SubjectIndex
 
 class TestGDPRVerification(unittest.TestCase):
 
@@ -47,5 +51,70 @@ class TestGDPRVerification(unittest.TestCase):
         result = self.gdpr.request_deletion(invalid_user)
         self.assertFalse(result)
 
+
+class TestErasureLocations(unittest.TestCase):
+
+    def setUp(self):
+        """GDPRVerification sans connexion ELK ni alerting réels"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = SubjectIndex(os.path.join(self.tmp_dir.name, "index.db"))
+        with patch("src.compliance.gdpr_verification.shared_connector"), \
+                patch("src.compliance.gdpr_verification.AlertingSystem"):
+            self.gdpr = gdpr_verification.GDPRVerification("config/elk_config.yaml", {}, subject_index=self.index)
+        self.gdpr.crypto_shredder = None
+        self.gdpr._tombstones = MagicMock()
+        self.gdpr._erasure_executor = MagicMock()
+        self.index.add_documents("compliance-logs-2025.10.14", [("101", "doc-1")])
+        self.index.add_documents("audit-logs-2025.10.14", [("101", "doc-2")])
+        self.index.add_file_rows("data/clients.csv", [("101", 0)])
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_failed_erasure_keeps_locations(self):
+        """Un index en échec et les lignes CSV restent localisés pour une reprise"""
+        self.gdpr._erasure_executor.erase.return_value = [
+            {"index": "compliance-logs-2025.10.14", "user_ids": ["101"], "completed": True, "response": {}},
+            {"index": "audit-logs-2025.10.14", "user_ids": ["101"], "task": None, "error": "timeout"},
+        ]
+        self.gdpr.erase_subjects(["101"])
+        located = self.index.locate("101")
+        self.assertEqual(located["indices"], {"audit-logs-2025.10.14": ["doc-2"]})
+        self.assertEqual(located["files"], {os.path.normpath("data/clients.csv"): [0]})
+        self.gdpr.alert_system.send_alert.assert_called_once()
+
+    def test_version_conflicts_alert(self):
+        """Une tâche terminée avec des conflits de version déclenche l’alerte et garde la localisation"""
+        self.gdpr._erasure_executor.erase.return_value = [
+            {"index": "compliance-logs-2025.10.14", "user_ids": ["101"], "completed": True,
+             "response": {"updated": 1, "version_conflicts": 1}},
+        ]
+        self.gdpr.erase_subjects(["101"])
+        self.gdpr.alert_system.send_alert.assert_called_once()
+        self.assertIn("compliance-logs-2025.10.14", self.index.locate("101")["indices"])
+
+    def test_pending_tasks_keep_locations(self):
+        """Sans attente de fin des tâches, rien n’est retiré"""
+        self.gdpr._erasure_executor.erase.return_value = [
+            {"index": "compliance-logs-2025.10.14", "user_ids": ["101"], "task": "n:1"},
+        ]
+        self.gdpr.erase_subjects(["101"], wait=False)
+        self.assertIn("compliance-logs-2025.10.14", self.index.locate("101")["indices"])
+
+    def test_crypto_shredding_still_erases_indices(self):
+        """Le crypto-shredding détruit les clés sans dispenser de l’effacement ELK"""
+        self.gdpr.crypto_shredder = MagicMock()
+        self.gdpr._erasure_executor.erase.return_value = [
+            {"index": "compliance-logs-2025.10.14", "user_ids": ["101"], "completed": True, "response": {}},
+            {"index": "audit-logs-2025.10.14", "user_ids": ["101"], "completed": True, "response": {}},
+        ]
+        tasks = self.gdpr.erase_subjects(["101"])
+        self.gdpr.crypto_shredder.forget.assert_called_once_with(["101"])
+        self.gdpr._erasure_executor.erase.assert_called_once()
+        self.assertEqual(len(tasks), 2)
+        self.assertEqual(self.index.locate("101")["indices"], {})
+
+
 if __name__ == "__main__":
     unittest.main()
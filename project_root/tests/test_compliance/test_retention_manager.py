@@ -0,0 +1,54 @@
+"""
+-----------------------------
+Tests unitaires pour retention_manager.py
+Vérifie l’expiration par partitions entières (fichiers et index datés).
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+from src.compliance import retention_manager
+
+
+class TestRetentionManager(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.connector = MagicMock()
+        self.connector.elastic_url = "http://localhost:9200"
+        self.manager = retention_manager.RetentionManager("config/elk_config.yaml", connector=self.connector)
+        self.today = date(2025, 10, 31)
+
+    def test_retention_from_config(self):
+        """Les durées de elk_config.yaml sont associées aux préfixes d’index"""
+        self.assertEqual(self.manager.retention["audit-logs"], 30)
+        self.assertEqual(retention_manager.parse_duration_days("2w"), 14)
+
+    def test_expire_directory(self):
+        """Les partitions expirées sont supprimées, celles à cheval retournées"""
+        with tempfile.TemporaryDirectory() as base:
+            for key in ("2025-09-01", "2025-10", "2025-10-30"):
+                os.makedirs(os.path.join(base, f"dt={key}"))
+            straddling = self.manager.expire_directory(base, 20, today=self.today)
+            self.assertEqual(straddling, ["2025-10"])
+            self.assertEqual(sorted(os.listdir(base)), ["dt=2025-10", "dt=2025-10-30"])
+
+    def test_expire_indices(self):
+        """Les index datés expirés sont supprimés en un seul appel"""
+        self.connector.session.get.return_value.json.return_value = [
+            {"index": "audit-logs-2025.09.01"},
+            {"index": "audit-logs-2025.09.02"},
+            {"index": "audit-logs-2025.10.30"},
+            {"index": "audit-logs-legacy"},
+        ]
+        result = self.manager.expire_indices("audit-logs", 30, today=self.today)
+        self.assertEqual(result["deleted"], ["audit-logs-2025.09.01", "audit-logs-2025.09.02"])
+        self.assertEqual(result["purged"], [])
+        self.connector.session.delete.assert_called_once()
+        self.connector.session.post.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+-----------------------------
+Tests unitaires pour subject_index.py
+Vérifie la localisation des données d’une personne dans les fichiers et index.
+"""
+
+import os
+import tempfile
+import unittest
+from src.compliance import subject_index
+
+
+class TestSubjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = subject_index.SubjectIndex(os.path.join(self.tmp_dir.name, "index.db"))
+        self.csv_path = os.path.join(self.tmp_dir.name, "clients.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write('user_id,email,comment\n101,a@example.com,"ok, merci"\n102,b@example.com,\n101,c@example.com,\n')
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_index_csv_rows(self):
+        """Les lignes d’un CSV sont associées à leur user_id"""
+        self.assertEqual(self.index.index_csv(self.csv_path), 3)
+        files = self.index.locate("101")["files"]
+        self.assertEqual(sorted(files[os.path.normpath(self.csv_path)]), [0, 2])
+
+    def test_reindex_replaces_entries(self):
+        """Réindexer un fichier ne duplique pas les entrées"""
+        self.index.index_csv(self.csv_path)
+        self.index.index_csv(self.csv_path)
+        self.assertEqual(self.index.files_for(["101", "102"]), {os.path.normpath(self.csv_path): {0, 1, 2}})
+
+    def test_documents_and_removal(self):
+        """Documents Elasticsearch et suppression après effacement"""
+        self.index.add_documents("compliance-logs-2025", [("101", "doc-1"), ("101", "doc-2")])
+        self.assertEqual(self.index.indices_for(["101"]), {"compliance-logs-2025"})
+        self.index.remove_subject("101")
+        self.assertEqual(self.index.locate("101"), {"files": {}, "indices": {}})
+
+    def test_remove_locations_scoped(self):
+        """Seules les entrées de l’emplacement effacé sont retirées"""
+        self.index.index_csv(self.csv_path)
+        self.index.add_documents("compliance-logs-2025", [("101", "doc-1")])
+        self.index.add_documents("audit-logs-2025", [("101", "doc-2")])
+        self.index.remove_locations(["101"], subject_index.KIND_INDEX, "compliance-logs-2025")
+        located = self.index.locate("101")
+        self.assertEqual(located["indices"], {"audit-logs-2025": ["doc-2"]})
+        self.assertIn(os.path.normpath(self.csv_path), located["files"])
+
+
+if __name__ == "__main__":
+    unittest.main()
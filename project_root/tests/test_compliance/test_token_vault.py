@@ -0,0 +1,57 @@
+"""
+-----------------------------
+Tests unitaires pour token_vault.py
+Vérifie la tokenisation réversible, le nombre de shards fixé à la création
+et le contrôle d’accès à la dé-tokenisation.
+"""
+
+import os
+import tempfile
+import unittest
+from src.compliance import token_vault
+from src.security.key_management import KeyManager
+
+
+class TestTokenVault(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.key_manager = KeyManager(storage_path=os.path.join(self.tmp_dir.name, "keys.json"))
+        self.vault_dir = os.path.join(self.tmp_dir.name, "vault")
+        self.vault = token_vault.TokenVault(self.key_manager, vault_dir=self.vault_dir, shards=4)
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.vault.close()
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip_after_reopen(self):
+        """Les jetons sont déterministes et réversibles après réouverture du coffre"""
+        tokens = self.vault.tokenize(["FR7630006000011234567890189", "alice@example.com", "alice@example.com"])
+        self.assertEqual(tokens[1], tokens[2])
+        self.assertEqual(len(tokens[0]), token_vault.TOKEN_LENGTH)
+
+        reopened = token_vault.TokenVault(self.key_manager, vault_dir=self.vault_dir, shards=4)
+        self.assertEqual(reopened.tokenize(["alice@example.com"]), [tokens[1]])
+        values = reopened.detokenize(tokens + ["inconnu"], role="compliance_officer")
+        self.assertEqual(values[tokens[0]], "FR7630006000011234567890189")
+        self.assertEqual(values[tokens[1]], "alice@example.com")
+        self.assertIsNone(values["inconnu"])
+        reopened.close()
+
+    def test_reopen_with_other_shard_count(self):
+        """Le nombre de shards est fixé à la création : une autre valeur à la réouverture est refusée"""
+        self.vault.tokenize(["alice@example.com"])
+        with self.assertRaises(ValueError):
+            token_vault.TokenVault(self.key_manager, vault_dir=self.vault_dir, shards=16)
+
+    def test_unauthorized_role(self):
+        """Un rôle non autorisé ne peut pas dé-tokeniser"""
+        tokens = self.vault.tokenize(["alice@example.com"])
+        with self.assertRaises(PermissionError):
+            self.vault.detokenize(tokens, role="analyst")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+-----------------------------
+Tests unitaires pour subject_keyring.py
+Vérifie la gestion des clés par personne et leur destruction (crypto-shredding).
+"""
+
+import os
+import tempfile
+import unittest
+from src.security import subject_keyring
+from src.security.key_management import KeyManager
+
+
+class TestSubjectKeyring(unittest.TestCase):
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.key_manager = KeyManager(storage_path=os.path.join(self.tmp_dir.name, "keys.json"))
+        self.db_path = os.path.join(self.tmp_dir.name, "subject_keys.db")
+        self.keyring = subject_keyring.SubjectKeyring(self.key_manager, db_path=self.db_path, cache_size=2)
+
+    def tearDown(self):
+        """Nettoyage après tests"""
+        self.keyring.close()
+        self.tmp_dir.cleanup()
+
+    def test_keys_are_persistent(self):
+        """Une clé créée est retrouvée après rechargement du trousseau"""
+        token = self.keyring.get_cipher("U1").encrypt("alice@example.com")
+        reloaded = subject_keyring.SubjectKeyring(self.key_manager, db_path=self.db_path)
+        self.assertEqual(reloaded.get_cipher("U1", create=False).decrypt(token), "alice@example.com")
+        reloaded.close()
+
+    def test_batch_load_distinct_keys(self):
+        """Le chargement par lot retourne une clé distincte par personne"""
+        ciphers = self.keyring.get_ciphers(["U1", "U2", "U3", "U1"])
+        self.assertEqual(sorted(ciphers), ["U1", "U2", "U3"])
+        self.assertNotEqual(ciphers["U1"].key, ciphers["U2"].key)
+
+    def test_destroy_makes_data_unreadable(self):
+        """Après destruction, aucune clé n’est retournée ni recréée"""
+        self.keyring.get_cipher("U1")
+        self.keyring.destroy(["U1"])
+        self.assertTrue(self.keyring.is_destroyed("U1"))
+        self.assertIsNone(self.keyring.get_cipher("U1"))
+
+
+if __name__ == "__main__":
+    unittest.main()